@@ -15,6 +15,7 @@ Welcome to the Voyage Consultant Tools suite. Select a tool from the sidebar to
 
 - **Snowflake Test** - Verify database connectivity and write test records
 - **Activity Cards** - Create and manage activity cards for process mapping
+- **Portfolio** - Compare cost, savings and progress across workflows
 
 ---
 
@@ -23,5 +24,5 @@ Welcome to the Voyage Consultant Tools suite. Select a tool from the sidebar to
 - [x] Activity Cards - Track and decompose process activities
 - [ ] Process Map Viewer - Interactive process visualization
 - [ ] Business Case Calculator - ROI and savings analysis
-- [ ] Client Dashboard - Engagement metrics and progress
+- [x] Client Dashboard - Engagement metrics and progress (Portfolio)
 """)
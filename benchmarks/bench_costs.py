@@ -0,0 +1,100 @@
+"""Benchmark the vectorized cost engine against the per-card loop.
+
+Usage: python benchmarks/bench_costs.py [count]
+
+Builds a synthetic activity set (default 100,000 cards) with the same mix
+of t-shirt midpoints, custom values and missing inputs the app produces,
+checks that both paths agree exactly, and prints timings for row dicts
+(what load_activities returns) and for columnar input.
+"""
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from lib.costs import calculate_activity_costs, compute_costs, cost_totals, costs_by_swimlane
+
+MIDPOINTS = {
+    'task_time': {'XS': 2, 'S': 7.5, 'M': 22.5, 'L': 60, 'XL': 180},
+    'labor_rate': {'XS': 22.5, 'S': 32.5, 'M': 45, 'L': 62.5, 'XL': 85},
+    'volume': {'XS': 50, 'S': 300, 'M': 1250, 'L': 5500, 'XL': 15000},
+}
+
+
+def make_activities(count, seed=42, number=float):
+    rng = random.Random(seed)
+    activities = []
+    for i in range(count):
+        activity = {'id': i + 1, 'grid_location': f"{chr(ord('A') + rng.randrange(10))}{rng.randrange(1, 40)}"}
+        for name, sizes in MIDPOINTS.items():
+            pick = rng.random()
+            size = midpoint = custom = None
+            if pick < 0.7:
+                size = rng.choice(list(sizes))
+                midpoint = number(str(sizes[size]))
+            elif pick < 0.85:
+                # Custom values are stored with the midpoint set to the same number
+                custom = number(str(round(rng.uniform(0, 200), 2)))
+                midpoint = custom
+            elif pick < 0.9:
+                size, custom = 'Other', number(str(round(rng.uniform(1, 200), 2)))
+            activity[f'{name}_size'] = size
+            activity[f'{name}_midpoint'] = midpoint
+            activity[f'{name}_custom'] = custom
+        activities.append(activity)
+    return activities
+
+
+def timed(label, func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<32} {best * 1000:10.1f} ms")
+    return result
+
+
+def loop_totals(activities):
+    total_monthly = total_annual = 0
+    for activity in activities:
+        costs = calculate_activity_costs(activity)
+        if costs:
+            total_monthly += costs['monthly_cost']
+            total_annual += costs['annual_cost']
+    return total_monthly, total_annual
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    activities = make_activities(count)
+    columns = pd.DataFrame(activities)
+    decimals = make_activities(count, number=Decimal)
+    print(f"{count:,} activities")
+
+    scalar = timed("per-card loop + totals", lambda: loop_totals(activities))
+    timed("compute_costs (row dicts)", lambda: compute_costs(activities))
+    timed("compute_costs (Decimal dicts)", lambda: compute_costs(decimals))
+    costs = timed("compute_costs (columns)", lambda: compute_costs(columns))
+    totals = timed("cost_totals", lambda: cost_totals(costs))
+    timed("costs_by_swimlane", lambda: costs_by_swimlane(costs))
+
+    # Every row must match the scalar function exactly
+    expected = np.array([
+        (c or {}).get('monthly_cost', np.nan) for c in map(calculate_activity_costs, activities)
+    ])
+    for result in (costs, compute_costs(activities), compute_costs(decimals)):
+        assert np.array_equal(expected, result['monthly_cost'].to_numpy(), equal_nan=True), "per-row costs differ"
+    assert np.isclose(totals['monthly_cost'], scalar[0]) and np.isclose(totals['annual_cost'], scalar[1])
+    print(f"rows match; {totals['costed']:,} costed, monthly total ${totals['monthly_cost']:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
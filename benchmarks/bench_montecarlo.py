@@ -0,0 +1,61 @@
+"""Benchmark the Monte Carlo cost ranges.
+
+Usage: python benchmarks/bench_montecarlo.py [cards] [draws]
+
+Simulates a synthetic workflow (default 1,000 cards, 100,000 draws) and
+prints the time taken and the workflow-level P10/P50/P90. The target is
+under a second on one core.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from bench_costs import MIDPOINTS, make_activities
+from lib.montecarlo import simulate_costs
+
+# Band edges halfway to the neighbouring midpoints
+TSHIRT_CONFIG = {}
+for category, sizes in MIDPOINTS.items():
+    points = list(sizes.values())
+    TSHIRT_CONFIG[category] = [
+        {
+            'size': size,
+            'midpoint': midpoint,
+            'min_value': (points[i - 1] + midpoint) / 2 if i else midpoint / 2,
+            'max_value': (points[i + 1] + midpoint) / 2 if i + 1 < len(points) else midpoint * 1.5,
+        }
+        for i, (size, midpoint) in enumerate(sizes.items())
+    ]
+
+
+def main():
+    cards = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    draws = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    activities = make_activities(cards)
+    for i, activity in enumerate(activities):
+        activity['data_confidence'] = ('estimate', 'partial', 'confirmed', None)[i % 4]
+
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        result = simulate_costs(activities, TSHIRT_CONFIG, draws=draws)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    workflow = result['workflow']
+    print(f"{cards:,} cards x {draws:,} draws: {best * 1000:.1f} ms "
+          f"({workflow['activities']:,} costed, {len(result['swimlanes'])} swimlanes)")
+    print(f"monthly P10 ${workflow['monthly_p10']:,.0f}  P50 ${workflow['monthly_p50']:,.0f}  "
+          f"P90 ${workflow['monthly_p90']:,.0f}")
+
+    # The swimlane totals are drawn jointly, so their medians should add up to roughly the workflow median
+    lane_sum = result['swimlanes']['monthly_p50'].sum()
+    assert np.isclose(lane_sum, workflow['monthly_p50'], rtol=0.05), (lane_sum, workflow['monthly_p50'])
+
+
+if __name__ == '__main__':
+    main()
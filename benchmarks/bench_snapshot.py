@@ -0,0 +1,177 @@
+"""Benchmark the Arrow-backed activity snapshot against the old row-dict path.
+
+Usage: python benchmarks/bench_snapshot.py [count ...]
+
+For each size (default 10,000 and 100,000 cards) builds the same synthetic
+result twice: as the list of tuples ``fetchall()`` returns, and as the
+Arrow table ``fetch_pandas_all()`` converts. It then builds the snapshot
+both ways. The old way keeps the raw rows plus a dict per card for the
+list and another for the grid. The new way keeps one DataFrame and views.
+Prints build time, cost computation time, a pass over the list view (the
+first one converts the columns it reads) and the memory each snapshot keeps. Python allocations are measured with
+tracemalloc and Arrow buffers with pyarrow's allocator. No database is
+involved.
+"""
+import datetime
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow as pa
+
+from bench_costs import make_activities
+from lib.activities import FRAME_COLUMNS, ActivitySnapshot
+from lib.costs import compute_costs
+
+STATUSES = ('not_started', 'analyzing', 'in_progress', 'transformed', None)
+
+
+def make_columns(count):
+    """FRAME_COLUMNS -> list of values, shaped like the activities query result."""
+    activities = make_activities(count)
+    base = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    columns = {name: [] for name in FRAME_COLUMNS}
+    for i, activity in enumerate(activities):
+        stamp = base + datetime.timedelta(minutes=i)
+        values = dict(activity)
+        values.update({
+            'activity_name': f"Activity {i + 1}",
+            'activity_type': 'decision' if i % 7 == 0 else 'task',
+            'status': STATUSES[i % len(STATUSES)],
+            'created_at': stamp,
+            'connections': f'[{{"next": "{activity["grid_location"]}"}}]' if i % 3 else None,
+            'data_confidence': 'estimate',
+            'disposition_complete_pct': 80.0 if i % 2 else None,
+            'disposition_forwarded_pct': 15.0 if i % 2 else None,
+            'disposition_pended_pct': 5.0 if i % 2 else None,
+            'changed_at': stamp,
+        })
+        for name in FRAME_COLUMNS:
+            columns[name].append(values.get(name))
+    # ORDER BY grid_location, activity_name
+    order = sorted(range(count), key=lambda i: (columns['grid_location'][i], columns['activity_name'][i]))
+    return {name: [values[i] for i in order] for name, values in columns.items()}
+
+
+# The snapshot as it was built before: raw rows, a list dict and a grid dict per card
+def legacy_snapshot(rows):
+    activities_list = [{
+        'id': r[0], 'name': r[1], 'type': r[2], 'grid_location': r[3], 'status': r[4],
+        'created_at': r[5],
+        'task_time_size': r[7], 'task_time_midpoint': r[8], 'task_time_custom': r[9],
+        'labor_rate_size': r[10], 'labor_rate_midpoint': r[11], 'labor_rate_custom': r[12],
+        'volume_size': r[13], 'volume_midpoint': r[14], 'volume_custom': r[15],
+        'data_confidence': r[16],
+        'disposition_complete_pct': r[17], 'disposition_forwarded_pct': r[18],
+        'disposition_pended_pct': r[19], 'changed_at': r[20],
+    } for r in rows]
+    grid = {}
+    for r in rows:
+        if r[3]:
+            grid[r[3].upper()] = {'id': r[0], 'name': r[1], 'type': r[2], 'connections': r[6], 'changed_at': r[20]}
+    return {r[0]: r for r in rows}, activities_list, grid
+
+
+def arrow_snapshot(table):
+    snapshot = ActivitySnapshot(0)
+    snapshot.load_frame(table.to_pandas())
+    return snapshot
+
+
+def timed(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def retained(build):
+    """(bytes kept by build()'s result, peak bytes while building) - Python heap plus Arrow."""
+    gc.collect()
+    tracemalloc.start()
+    arrow_before = pa.total_allocated_bytes()
+    result = build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    arrow = pa.total_allocated_bytes() - arrow_before
+    tracemalloc.stop()
+    return current + arrow, peak + arrow, result
+
+
+def read_list(activities_list):
+    # What the Rows view and Monte Carlo do: touch a few keys of every card
+    total = 0
+    for activity in activities_list:
+        if activity['grid_location'] and activity.get('task_time_midpoint'):
+            total += 1
+    return total
+
+
+def read_snapshot(table):
+    snapshot = arrow_snapshot(table)
+    read_list(snapshot.views.activities_list)
+    return snapshot
+
+
+def run(count):
+    columns = make_columns(count)
+    rows = list(zip(*(columns[name] for name in FRAME_COLUMNS)))
+    table = pa.table({name: columns[name] for name in FRAME_COLUMNS})
+    print(f"\n{count:,} activities")
+
+    legacy_build, (_, legacy_list, legacy_grid) = timed(lambda: legacy_snapshot(rows))
+    arrow_build, snapshot = timed(lambda: arrow_snapshot(table))
+    legacy_costs, expected = timed(lambda: compute_costs(legacy_list))
+    arrow_costs, costs = timed(lambda: compute_costs(snapshot.views.activities_list.frame))
+    legacy_read, _ = timed(lambda: read_list(legacy_list))
+    first_read, _ = timed(lambda: read_list(arrow_snapshot(table).views.activities_list), repeat=1)
+    arrow_read, _ = timed(lambda: read_list(snapshot.views.activities_list))
+
+    # Memory: the old path keeps fetchall()'s tuples; the Arrow table is dropped after conversion
+    legacy_kept, legacy_peak, _ = retained(lambda: legacy_snapshot(list(zip(*(columns[n] for n in FRAME_COLUMNS)))))
+    arrow_kept, arrow_peak, _ = retained(
+        lambda: arrow_snapshot(pa.table({name: columns[name] for name in FRAME_COLUMNS}))
+    )
+    # Reading the list view converts the columns it touches, once per snapshot
+    arrow_read_kept, _, _ = retained(lambda: read_snapshot(pa.table({name: columns[name] for name in FRAME_COLUMNS})))
+
+    # Same cards, same grid, same costs
+    assert len(snapshot.views.activities_list) == len(legacy_list)
+    assert set(snapshot.views.grid) == set(legacy_grid)
+    for i in range(0, count, max(1, count // 100)):
+        assert dict(snapshot.views.activities_list[i]) == legacy_list[i], f"row {i} differs"
+    for location in list(legacy_grid)[:100]:
+        assert dict(snapshot.views.grid[location]) == legacy_grid[location], f"grid {location} differs"
+    assert expected['monthly_cost'].equals(costs['monthly_cost']), "costs differ"
+
+    print(f"{'':<26} {'row dicts':>12} {'arrow frame':>12}")
+    for label, legacy, arrow in (
+        ("build snapshot", legacy_build, arrow_build),
+        ("compute costs", legacy_costs, arrow_costs),
+        ("read list view (first)", legacy_read, first_read),
+        ("read list view", legacy_read, arrow_read),
+    ):
+        print(f"{label:<26} {legacy * 1000:9.1f} ms {arrow * 1000:9.1f} ms")
+    for label, legacy, arrow in (
+        ("memory kept", legacy_kept, arrow_kept),
+        ("memory kept after a read", legacy_kept, arrow_read_kept),
+        ("peak while building", legacy_peak, arrow_peak),
+    ):
+        print(f"{label:<26} {legacy / 2**20:9.1f} MB {arrow / 2**20:9.1f} MB")
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for count in counts:
+        run(count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,836 @@
+"""Activity data for a workflow, kept as an incrementally refreshed snapshot.
+
+The first read of a workflow loads every activity. After that, a refresh
+only fetches rows whose ``modified_at`` (or ``created_at`` for rows never
+modified) is newer than the snapshot's watermark, plus ids deleted since
+then according to ``activity_audit_log``, and patches the list and grid
+views. Steady-state refresh cost is proportional to what changed.
+
+Rows are fetched as Arrow batches (``fetch_pandas_all``) into one
+DataFrame per snapshot. The list view, grid view and cost engine all read
+that frame: ``ActivityList`` and ``ActivityGrid`` hand out dict-like row
+views on demand instead of keeping a dict per card (twice, for the list
+and the grid), and costs are computed straight from its columns.
+
+A refresh only happens when the workflow's version stamp (lib/versions.py)
+has moved since the snapshot was built. As a safety net for changes that
+leave no trace the refresh can see (rows deleted without a DELETE audit
+entry, by the map/ app or by hand), the snapshot is reloaded in full once
+it is ``RELOAD_AFTER_SECONDS`` old.
+
+The edit form needs every column of one card. ``ActivityCardStore`` fetches
+that once with an explicit projection and keeps it in the session, and the
+grid handler, form and save path share the copy. It is only refetched when
+the snapshot shows the card's ``changed_at`` has moved.
+
+Writes (``save_activity``, ``delete_activity``, ``shift_activities``) keep
+the audit log, rollups and version stamp in the same transaction. Saves
+are optimistic: ``changed_columns`` diffs the form against that card
+and the UPDATE only matches if ``modified_at`` is still the value it was
+loaded with, so a concurrent edit shows up as a zero row count rather than
+needing a read inside the write transaction. Both sides of that check are
+``modified_at`` as integer epoch nanoseconds computed by the server, so it
+never depends on a timestamp surviving the round trip through Python.
+"""
+import threading
+import time
+from collections import namedtuple
+from collections.abc import Mapping, Sequence
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from lib.audit import AuditWriter
+from lib.cache import get_cache
+from lib.costs import compute_costs
+from lib.graph import ProcessGraph
+from lib.grid import GridIndex, parse_location
+from lib.db import SNOWFLAKE, SQLITE, dialect, get_read_cursor, write_transaction
+from lib.ids import next_id
+from lib.rollups import apply_activity_rollup
+from lib.versions import bump_version, forget_version, workflow_version
+
+# Safety net: reload a snapshot in full this long after its last full load
+RELOAD_AFTER_SECONDS = 30 * 60
+
+# Re-read a little before the watermark so rows committed by a slow transaction
+# (stamped earlier than they became visible) are not missed. Re-reads are idempotent.
+WATERMARK_OVERLAP = timedelta(seconds=30)
+
+# Cost inputs come back as FLOAT so the cost engine gets floats rather than Decimals.
+# Aliased so the Arrow result's column names are the plain column names.
+ACTIVITY_COLUMNS = """
+    id, activity_name, activity_type, grid_location, status, created_at, connections,
+    task_time_size, task_time_midpoint::FLOAT AS task_time_midpoint, task_time_custom::FLOAT AS task_time_custom,
+    labor_rate_size, labor_rate_midpoint::FLOAT AS labor_rate_midpoint, labor_rate_custom::FLOAT AS labor_rate_custom,
+    volume_size, volume_midpoint::FLOAT AS volume_midpoint, volume_custom::FLOAT AS volume_custom,
+    data_confidence,
+    disposition_complete_pct::FLOAT AS disposition_complete_pct,
+    disposition_forwarded_pct::FLOAT AS disposition_forwarded_pct,
+    disposition_pended_pct::FLOAT AS disposition_pended_pct,
+    COALESCE(modified_at, created_at) AS changed_at
+"""
+
+# Snapshot frame columns, in ACTIVITY_COLUMNS order
+FRAME_COLUMNS = (
+    'id', 'activity_name', 'activity_type', 'grid_location', 'status', 'created_at', 'connections',
+    'task_time_size', 'task_time_midpoint', 'task_time_custom',
+    'labor_rate_size', 'labor_rate_midpoint', 'labor_rate_custom',
+    'volume_size', 'volume_midpoint', 'volume_custom',
+    'data_confidence',
+    'disposition_complete_pct', 'disposition_forwarded_pct', 'disposition_pended_pct',
+    'changed_at',
+)
+
+# List-view key -> frame column
+LIST_FIELDS = {
+    'id': 'id',
+    'name': 'activity_name',
+    'type': 'activity_type',
+    'grid_location': 'grid_location',
+    'status': 'status',
+    'created_at': 'created_at',
+    'task_time_size': 'task_time_size',
+    'task_time_midpoint': 'task_time_midpoint',
+    'task_time_custom': 'task_time_custom',
+    'labor_rate_size': 'labor_rate_size',
+    'labor_rate_midpoint': 'labor_rate_midpoint',
+    'labor_rate_custom': 'labor_rate_custom',
+    'volume_size': 'volume_size',
+    'volume_midpoint': 'volume_midpoint',
+    'volume_custom': 'volume_custom',
+    'data_confidence': 'data_confidence',
+    'disposition_complete_pct': 'disposition_complete_pct',
+    'disposition_forwarded_pct': 'disposition_forwarded_pct',
+    'disposition_pended_pct': 'disposition_pended_pct',
+    'changed_at': 'changed_at',
+}
+
+# Grid-view key -> frame column
+GRID_FIELDS = {
+    'id': 'id',
+    'name': 'activity_name',
+    'type': 'activity_type',
+    'connections': 'connections',
+    'changed_at': 'changed_at',
+}
+
+# Same order as ORDER BY grid_location, activity_name (NULLs last)
+SORT_COLUMNS = ['grid_location', 'activity_name']
+
+# Every column the edit form and audit diff read, in place of SELECT *
+ACTIVITY_CARD_COLUMNS = (
+    'id', 'workflow_id', 'activity_name', 'activity_type', 'grid_location', 'connections',
+    'task_time_size', 'task_time_midpoint', 'task_time_custom',
+    'labor_rate_size', 'labor_rate_midpoint', 'labor_rate_custom',
+    'volume_size', 'volume_midpoint', 'volume_custom',
+    'target_cycle_time_hours', 'actual_cycle_time_hours',
+    'disposition_complete_pct', 'disposition_forwarded_pct', 'disposition_pended_pct',
+    'transformation_plan', 'phase', 'status', 'cost_to_change', 'projected_annual_savings',
+    'process_steps', 'systems_touched', 'constraints_rules', 'opportunities', 'next_steps',
+    'attachments', 'comments', 'data_confidence', 'data_source',
+    'created_by', 'created_at', 'modified_by', 'modified_at',
+)
+
+_stats = {'full_loads': 0, 'incremental_refreshes': 0, 'rows_refreshed': 0, 'deletes_applied': 0}
+_stats_lock = threading.Lock()
+
+# workflow_id -> ActivitySnapshot (no TTL; refresh is driven by the snapshot itself)
+_snapshots = get_cache('activity_snapshots', ttl=0, max_entries=64)
+
+# workflow_id -> lock held while a snapshot is created, reloaded or refreshed
+_workflow_locks = {}
+_workflow_locks_lock = threading.Lock()
+
+# One published version of a snapshot: the frame and every view over it
+SnapshotViews = namedtuple('SnapshotViews', ('frame', 'ids', 'activities_list', 'grid'))
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def _fetch_frame(cursor):
+    """The executed query's rows as one DataFrame, fetched as Arrow batches."""
+    frame = cursor.fetch_pandas_all()
+    if frame.empty:
+        return pd.DataFrame(columns=list(FRAME_COLUMNS))
+    frame.columns = [str(column).lower() for column in frame.columns]
+    return frame[list(FRAME_COLUMNS)]
+
+
+def _scalar(value):
+    # What fetchall() would have returned: None for nulls, plain Python values
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _python_values(series):
+    # One column as an object array of fetchall()-style values
+    if isinstance(series.dtype, pd.DatetimeTZDtype) or series.dtype.kind == 'M':
+        values = np.empty(len(series), dtype=object)
+        values[:] = [_scalar(value) for value in series.array]
+        return values
+    return series.to_numpy(dtype=object, na_value=None)
+
+
+class FrameColumns(dict):
+    """A snapshot frame's columns as Python values, each converted on first read.
+
+    Row views index these arrays, so reading a card costs an array lookup
+    rather than a per-value Arrow conversion, and columns nobody reads (the
+    cost inputs, which compute_costs takes from the frame) are never
+    converted. Two threads converting the same column is harmless.
+    """
+
+    def __init__(self, frame):
+        super().__init__()
+        self._frame = frame
+
+    def __missing__(self, name):
+        values = self[name] = _python_values(self._frame[name])
+        return values
+
+
+class ActivityRow(Mapping):
+    """Read-only dict-like view of one card in a snapshot frame."""
+
+    __slots__ = ('_columns', '_fields', '_position')
+
+    def __init__(self, columns, fields, position):
+        self._columns = columns
+        self._fields = fields
+        self._position = position
+
+    def __getitem__(self, key):
+        return self._columns[self._fields[key]][self._position]
+
+    def get(self, key, default=None):
+        field = self._fields.get(key)
+        return default if field is None else self._columns[field][self._position]
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return f"ActivityRow({dict(self)!r})"
+
+
+class ActivityList(Sequence):
+    """The list view: a row view per card, in grid order.
+
+    ``frame`` is the underlying DataFrame, for columnar consumers such as
+    ``compute_costs``.
+    """
+
+    def __init__(self, frame, columns):
+        self.frame = frame
+        self._columns = columns
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return ActivityRow(self._columns, LIST_FIELDS, position)
+
+    def __iter__(self):
+        columns = self._columns
+        for position in range(len(self.frame)):
+            yield ActivityRow(columns, LIST_FIELDS, position)
+
+
+class ActivityGrid(Mapping):
+    """The grid view: upper-case location -> view of the card there."""
+
+    def __init__(self, frame, columns):
+        self._columns = columns
+        locations = frame['grid_location']
+        located = locations.notna() & (locations != '')
+        located = locations[located]
+        # The last card at a location wins, as in the list order
+        self._positions = {
+            location.upper(): position
+            for location, position in zip(located.tolist(), located.index.tolist())
+        }
+
+    def __getitem__(self, location):
+        return ActivityRow(self._columns, GRID_FIELDS, self._positions[location])
+
+    def __contains__(self, location):
+        return location in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+
+class ActivitySnapshot:
+    """Last known activities for one workflow plus the watermarks to refresh it.
+
+    The rows live in one DataFrame fetched as Arrow batches; ``activities_list``
+    and ``grid`` are views over its columns rather than per-row dicts. All of
+    them are published together in ``views``, so read that once and take
+    the list and grid from the same tuple.
+    """
+
+    def __init__(self, workflow_id):
+        self.workflow_id = workflow_id
+        self._publish(pd.DataFrame(columns=list(FRAME_COLUMNS)))
+        self.watermark = None          # newest changed_at seen
+        self.deleted_watermark = None  # newest DELETE audit entry seen
+        self.refreshed_at = 0.0
+        self.loaded_at = 0.0  # last full load
+        self.version = None  # workflow version stamp the snapshot reflects
+        self.stale = False
+        self._lock = threading.Lock()
+        self._costs = None  # (activities_list, cost frame) for the list it was computed from
+        self._graph = None  # (grid, ProcessGraph) for the grid it was built from
+        self._grid_index = None  # (grid, GridIndex) likewise
+
+    def costs_for(self, activities_list):
+        """Cost frame for a published activities_list, computed once per list."""
+        cached = self._costs
+        if cached is None or cached[0] is not activities_list:
+            cached = (activities_list, compute_costs(activities_list.frame))
+            self._costs = cached
+        return cached[1]
+
+    def graph_for(self, grid):
+        """ProcessGraph for a published grid, built (and its JSON parsed) once per grid."""
+        cached = self._graph
+        if cached is None or cached[0] is not grid:
+            cached = (grid, ProcessGraph.from_grid(grid))
+            self._graph = cached
+        return cached[1]
+
+    def grid_index_for(self, grid):
+        """GridIndex for a published grid, built once per grid."""
+        cached = self._grid_index
+        if cached is None or cached[0] is not grid:
+            cached = (grid, GridIndex.from_grid(grid))
+            self._grid_index = cached
+        return cached[1]
+
+    def changed_at(self, activity_id):
+        """changed_at of one card, or None if the snapshot doesn't have it."""
+        frame, ids = self.views.frame, self.views.ids
+        if activity_id not in ids:
+            return None
+        return _scalar(frame['changed_at'].iat[ids.get_loc(activity_id)])
+
+    def needs_refresh(self, version):
+        return self.stale or version != self.version
+
+    def needs_reload(self):
+        """True once the last full load is older than RELOAD_AFTER_SECONDS."""
+        return time.monotonic() - self.loaded_at > RELOAD_AFTER_SECONDS
+
+    def _publish(self, frame):
+        """Swap in a new frame and views. Caller holds the lock.
+
+        Snapshots are shared between sessions, so a change publishes new
+        objects rather than mutating what a reader may be holding, and
+        publishes them in one assignment so a reader never pairs a list
+        from one version with a grid from another.
+        """
+        frame = frame.reset_index(drop=True)
+        columns = FrameColumns(frame)
+        self.views = SnapshotViews(frame, pd.Index(frame['id']),
+                                   ActivityList(frame, columns), ActivityGrid(frame, columns))
+
+    def load_frame(self, frame, version=None):
+        """Publish a full load (FRAME_COLUMNS, already in grid order)."""
+        with self._lock:
+            self._publish(frame)
+            self.watermark = _scalar(frame['changed_at'].max()) if len(frame) else None
+            self.deleted_watermark = self.watermark
+            self.refreshed_at = self.loaded_at = time.monotonic()
+            self.version = version
+            self.stale = False
+        _count(full_loads=1)
+
+    def load_full(self, version=None):
+        cursor = get_read_cursor()
+        cursor.execute(f"""
+            SELECT {ACTIVITY_COLUMNS}
+            FROM activities
+            WHERE workflow_id = %s
+            ORDER BY grid_location, activity_name
+        """, (self.workflow_id,))
+        frame = _fetch_frame(cursor)
+        cursor.close()
+        self.load_frame(frame, version)
+
+    def refresh(self, version=None):
+        """Fetch only what changed since the watermark and patch the views."""
+        if self.watermark is None:
+            # Nothing loaded yet (or an empty workflow) - a full load is just as cheap
+            return self.load_full(version)
+
+        cursor = get_read_cursor()
+        cursor.execute(f"""
+            SELECT {ACTIVITY_COLUMNS}
+            FROM activities
+            WHERE workflow_id = %s AND COALESCE(modified_at, created_at) >= %s
+        """, (self.workflow_id, self.watermark - WATERMARK_OVERLAP))
+        changed = _fetch_frame(cursor)
+        cursor.execute("""
+            SELECT activity_id, MAX(changed_at)
+            FROM activity_audit_log
+            WHERE action = 'DELETE' AND changed_at >= %s
+            GROUP BY activity_id
+        """, (self.deleted_watermark - WATERMARK_OVERLAP,))
+        deleted = cursor.fetchall()
+        cursor.close()
+
+        with self._lock:
+            self._patch(changed, deleted)
+            self.refreshed_at = time.monotonic()
+            self.version = version
+            self.stale = False
+        _count(incremental_refreshes=1, rows_refreshed=len(changed))
+
+    def _patch(self, changed, deleted):
+        """Apply a frame of changed rows and deletions. Caller holds the lock."""
+        changed_ids = set(changed['id'].tolist())
+        current = self.views.frame
+        deleted_ids = {row[0] for row in deleted if row[0] in self.views.ids and row[0] not in changed_ids}
+        touched = changed_ids | deleted_ids
+        self.deleted_watermark = max([self.deleted_watermark] + [row[1] for row in deleted])
+        newest = _scalar(changed['changed_at'].max()) if len(changed) else None
+        if newest is not None:
+            self.watermark = max(self.watermark, newest)
+        if not touched:
+            return
+
+        kept = current[~current['id'].isin(touched)]
+        frame = pd.concat([kept, changed], ignore_index=True) if len(changed) else kept
+        # Nearly sorted already, and a stable sort keeps the last card at a shared location last
+        frame = frame.sort_values(SORT_COLUMNS, na_position='last', kind='stable')
+        self._publish(frame)
+        _count(deletes_applied=len(deleted_ids))
+
+
+def _workflow_lock(workflow_id):
+    with _workflow_locks_lock:
+        return _workflow_locks.setdefault(workflow_id, threading.Lock())
+
+
+def _current_snapshot(workflow_id):
+    # Read the stamp before the data so a write landing in between triggers another refresh
+    version = workflow_version(workflow_id)
+    snapshot = _snapshots.get(workflow_id, None)
+    if snapshot is not None and not snapshot.needs_reload() and not snapshot.needs_refresh(version):
+        return snapshot
+
+    # One loader per workflow: other sessions (and the page's bootstrap threads)
+    # wait here and then find the snapshot already current
+    with _workflow_lock(workflow_id):
+        snapshot = _snapshots.get(workflow_id, None)
+        if snapshot is None:
+            snapshot = ActivitySnapshot(workflow_id)
+            snapshot.load_full(version)
+            _snapshots.set(workflow_id, snapshot)
+        elif snapshot.needs_reload():
+            # Also drops rows deleted without an audit entry, which refresh() can't see
+            snapshot.load_full(version)
+        elif snapshot.needs_refresh(version):
+            snapshot.refresh(version)
+    return snapshot
+
+
+def load_activities_data(workflow_id):
+    """Return (activities_list, grid) for a workflow, refreshing incrementally."""
+    views = _current_snapshot(workflow_id).views
+    return views.activities_list, views.grid
+
+
+def load_activities_with_costs(workflow_id):
+    """Return (activities_list, costs) with costs computed once per snapshot version.
+
+    ``costs`` is the lib.costs.compute_costs frame, row-aligned with the list.
+    """
+    snapshot = _current_snapshot(workflow_id)
+    activities_list = snapshot.views.activities_list
+    return activities_list, snapshot.costs_for(activities_list)
+
+
+def load_process_graph(workflow_id):
+    """Return (grid, graph) - the connection graph built once per snapshot version."""
+    snapshot = _current_snapshot(workflow_id)
+    grid = snapshot.views.grid
+    return grid, snapshot.graph_for(grid)
+
+
+def load_grid(workflow_id):
+    """Return (grid, grid_index, graph) for one consistent version of the workflow."""
+    snapshot = _current_snapshot(workflow_id)
+    grid = snapshot.views.grid
+    return grid, snapshot.grid_index_for(grid), snapshot.graph_for(grid)
+
+
+def activity_changed_at(workflow_id, activity_id):
+    """changed_at of one card as of the current snapshot, or None if unknown."""
+    snapshot = _snapshots.get(workflow_id, None)
+    return snapshot.changed_at(activity_id) if snapshot is not None else None
+
+
+def grid_locations(workflow_id):
+    """Upper-case grid locations in use, read from the table rather than the snapshot."""
+    cursor = get_read_cursor()
+    cursor.execute(
+        "SELECT UPPER(grid_location) FROM activities WHERE workflow_id = %s AND grid_location IS NOT NULL",
+        (workflow_id,)
+    )
+    locations = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return locations
+
+
+def fetch_activity_card(activity_id):
+    """Every column of one activity, keyed by upper-case column name."""
+    cursor = get_read_cursor()
+    cursor.execute(f"""
+        SELECT {', '.join(ACTIVITY_CARD_COLUMNS)}, COALESCE(modified_at, created_at) AS changed_at,
+            DATE_PART(epoch_nanosecond, modified_at) AS modified_ns
+        FROM activities
+        WHERE id = %s
+    """, (activity_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    if row is None:
+        return None
+    keys = [column.upper() for column in ACTIVITY_CARD_COLUMNS] + ['CHANGED_AT', 'MODIFIED_NS']
+    return dict(zip(keys, row))
+
+
+class ConcurrentEditError(Exception):
+    """The card was changed by someone else after it was loaded for editing."""
+
+
+def changed_columns(card, data):
+    """Columns of ``data`` whose value differs from the loaded card."""
+    return {
+        column: value for column, value in data.items()
+        if card.get(column.upper()) != value
+    }
+
+
+def update_activity(cursor, activity_id, changes, expected_modified_ns, user):
+    """Write only ``changes`` if the card's ``modified_at`` is still ``expected_modified_ns``.
+
+    ``expected_modified_ns`` is the card's MODIFIED_NS from fetch_activity_card
+    (None for a card never modified). One statement does both the conflict
+    check and the write. Raises ConcurrentEditError when no row matched.
+    """
+    for column in changes:
+        if column not in ACTIVITY_CARD_COLUMNS:
+            raise ValueError(f"Unknown activity column {column!r}")
+    assignments = ''.join(f"{column} = %s, " for column in changes)
+    cursor.execute(f"""
+        UPDATE activities
+        SET {assignments}modified_at = CURRENT_TIMESTAMP(), modified_by = %s
+        WHERE id = %s AND EQUAL_NULL(DATE_PART(epoch_nanosecond, modified_at), %s)
+    """, (*changes.values(), user, activity_id, expected_modified_ns))
+    if cursor.rowcount == 0:
+        raise ConcurrentEditError(
+            f"Activity #{activity_id} was changed or deleted by someone else since it was opened"
+        )
+
+
+class ActivityCardStore:
+    """Full activity cards for one session, fetched at most once per version.
+
+    Lives in ``st.session_state`` so a card loaded by a grid click is the same
+    copy the form renders and the save diffs against on later reruns.
+    """
+
+    def __init__(self):
+        self._cards = {}  # id -> card dict
+        self.fetches = 0
+        self.reuses = 0
+
+    def get(self, activity_id, changed_at=None):
+        """Return the card, refetching only if ``changed_at`` shows it moved."""
+        card = self._cards.get(activity_id)
+        if card is not None and (changed_at is None or card['CHANGED_AT'] == changed_at):
+            self.reuses += 1
+            return card
+        card = fetch_activity_card(activity_id)
+        self.fetches += 1
+        if card is None:
+            self._cards.pop(activity_id, None)
+        else:
+            self._cards[activity_id] = card
+        return card
+
+    def forget(self, activity_id=None):
+        """Drop one card (after a save or delete) or all of them."""
+        if activity_id is None:
+            self._cards.clear()
+        else:
+            self._cards.pop(activity_id, None)
+
+
+def mark_activities_stale(workflow_id):
+    """Make the next read of this workflow pick up recent writes."""
+    snapshot = _snapshots.get(workflow_id, None)
+    if snapshot is not None:
+        snapshot.stale = True
+
+
+def clear_activities_cache(workflow_id):
+    """Have the next read of this workflow fetch the rows changed by a write."""
+    forget_version(workflow_id)
+    mark_activities_stale(workflow_id)
+
+
+# Activities in one swimlane from a column up to (not including) another. Uses named params:
+# workflow_id, lane, pattern (lane + digits), offset (first digit position), from_position,
+# to_position (NULL for the rest of the lane)
+SHIFT_PREDICATE = """
+    workflow_id = %(workflow_id)s
+    AND REGEXP_LIKE(UPPER(grid_location), %(pattern)s)
+    AND TRY_TO_NUMBER(SUBSTR(grid_location, %(offset)s)) >= %(from_position)s
+    AND (%(to_position)s IS NULL OR TRY_TO_NUMBER(SUBSTR(grid_location, %(offset)s)) < %(to_position)s)
+"""
+
+# Mapping table of old -> new grid location for every card being shifted
+SHIFT_MAPPING = f"""
+    SELECT id,
+           UPPER(grid_location) AS old_location,
+           %(lane)s || TO_VARCHAR(TRY_TO_NUMBER(SUBSTR(grid_location, %(offset)s)) + %(delta)s) AS new_location
+    FROM activities
+    WHERE {SHIFT_PREDICATE}
+"""
+
+
+# Rewrite the `next` of every connection that points at a shifted card (SHIFT_PREDICATE params plus user)
+REWRITE_CONNECTIONS = {
+    SNOWFLAKE: f"""
+        UPDATE activities
+        SET connections = rewritten.connections, modified_at = CURRENT_TIMESTAMP(), modified_by = %(user)s
+        FROM (
+            SELECT e.id,
+                   TO_JSON(ARRAY_AGG(
+                       IFF(m.new_location IS NULL, e.value,
+                           OBJECT_INSERT(e.value::OBJECT, 'next', m.new_location, TRUE))
+                   ) WITHIN GROUP (ORDER BY e.idx)) AS connections
+            FROM (
+                SELECT a.id, f.index AS idx, f.value, UPPER(f.value:next::STRING) AS next_location
+                FROM activities a, LATERAL FLATTEN(input => TRY_PARSE_JSON(a.connections)) f
+                WHERE a.workflow_id = %(workflow_id)s AND a.connections IS NOT NULL
+            ) e
+            LEFT JOIN ({SHIFT_MAPPING}) m ON m.old_location = e.next_location
+            GROUP BY e.id
+            HAVING COUNT(m.new_location) > 0
+        ) rewritten
+        WHERE activities.id = rewritten.id
+    """,
+    # json_each() walks the array in order, so the rebuilt array keeps it; invalid JSON is skipped
+    SQLITE: f"""
+        UPDATE activities
+        SET connections = (
+                SELECT json_group_array(json(CASE WHEN m.new_location IS NULL THEN e.value
+                                                  ELSE json_set(e.value, '$.next', m.new_location) END))
+                FROM json_each(CASE WHEN json_valid(activities.connections) THEN activities.connections END) e
+                LEFT JOIN ({SHIFT_MAPPING}) m ON m.old_location = UPPER(json_extract(e.value, '$.next'))
+            ),
+            modified_at = CURRENT_TIMESTAMP(), modified_by = %(user)s
+        WHERE workflow_id = %(workflow_id)s AND EXISTS (
+            SELECT 1
+            FROM json_each(CASE WHEN json_valid(activities.connections) THEN activities.connections END) e
+            JOIN ({SHIFT_MAPPING}) m ON m.old_location = UPPER(json_extract(e.value, '$.next'))
+        )
+    """,
+}
+
+def _shift_lane(cursor, workflow_id, swimlane_letter, from_position, delta, user, to_position=None):
+    """Move the cards in a swimlane from from_position (up to to_position) by delta columns.
+
+    The range comes from the grid index (``GridIndex.shift_plan``), which
+    has already checked that no card lands on one that stays put.
+
+    Runs a fixed three statements regardless of workflow size: one audit
+    INSERT ... SELECT, one UPDATE that rewrites matching `next` pointers
+    server-side through the mapping table, and one UPDATE of grid_location.
+    """
+    lane = swimlane_letter.upper()
+    params = {
+        'workflow_id': workflow_id,
+        'lane': lane,
+        'pattern': f"{lane}[0-9]+",
+        'offset': len(lane) + 1,
+        'from_position': from_position,
+        'to_position': to_position,
+        'delta': delta,
+        'user': user,
+    }
+
+    # Log the shift for every moved card
+    cursor.execute(f"""
+        INSERT INTO activity_audit_log (activity_id, action, field_changed, old_value, new_value, changed_by)
+        SELECT id, 'SHIFT', 'grid_location', old_location, new_location, %(user)s
+        FROM ({SHIFT_MAPPING})
+    """, params)
+    if cursor.rowcount == 0:
+        return 0
+
+    # Point connections at the new locations (before the cards move, so the mapping still matches)
+    cursor.execute(REWRITE_CONNECTIONS[dialect()], params)
+
+    # Move the cards themselves
+    cursor.execute(f"""
+        UPDATE activities
+        SET grid_location = %(lane)s || TO_VARCHAR(TRY_TO_NUMBER(SUBSTR(grid_location, %(offset)s)) + %(delta)s),
+            modified_at = CURRENT_TIMESTAMP(), modified_by = %(user)s
+        WHERE {SHIFT_PREDICATE}
+    """, params)
+    return cursor.rowcount
+
+
+def shift_activities(workflow_id, swimlane_letter, from_position, user, delta=1, to_position=None):
+    """Shift a swimlane's activities from position (up to to_position) by delta (default +1)."""
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        shifted = _shift_lane(cursor, workflow_id, swimlane_letter, from_position, delta, user, to_position)
+        if shifted:
+            bump_version(cursor, workflow_id)
+        cursor.close()
+    clear_activities_cache(workflow_id)
+    return shifted
+
+
+def save_activity(data, workflow_id, user, activity_id=None, old_data=None, cards=None):
+    """Insert a card, or update ``activity_id`` from the form ``data``.
+
+    ``old_data`` is the card the form was rendered from (fetched through
+    ``cards``, the session's ActivityCardStore, if not given): only the
+    columns that differ from it are written, and the write fails with
+    ConcurrentEditError if someone else saved the card in the meantime.
+    """
+    if activity_id:
+        if old_data is None and cards is not None:
+            old_data = cards.get(activity_id, activity_changed_at(workflow_id, activity_id))
+        if old_data is None:
+            raise ConcurrentEditError(f"Activity #{activity_id} no longer exists")
+        changes = changed_columns(old_data, data)
+        if not changes:
+            return True
+
+    # Take the id before opening the transaction so both never wait on the same pool
+    new_id = None if activity_id else next_id('activities')
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        audit = AuditWriter(cursor, user)
+
+        if activity_id:
+            # Update existing - conflict check and write in one statement; the rollup
+            # drops the card's old contribution and takes the new one
+            apply_activity_rollup(cursor, workflow_id, [activity_id], -1)
+            update_activity(cursor, activity_id, changes, old_data.get('MODIFIED_NS'), user)
+            apply_activity_rollup(cursor, workflow_id, [activity_id], 1)
+
+            # Log changes to audit
+            audit.add_changes(activity_id, 'UPDATE', old_data, data)
+        else:
+            # Insert new with the pre-allocated ID
+            cursor.execute("""
+                INSERT INTO activities (
+                    id, workflow_id, activity_name, activity_type, grid_location, connections,
+                    task_time_size, task_time_midpoint, task_time_custom,
+                    labor_rate_size, labor_rate_midpoint, labor_rate_custom,
+                    volume_size, volume_midpoint, volume_custom,
+                    target_cycle_time_hours, actual_cycle_time_hours,
+                    disposition_complete_pct, disposition_forwarded_pct, disposition_pended_pct,
+                    transformation_plan, phase, status, cost_to_change, projected_annual_savings,
+                    process_steps, systems_touched, constraints_rules, opportunities, next_steps,
+                    attachments, comments, data_confidence, data_source, created_by
+                ) VALUES (
+                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                )
+            """, (
+                new_id, workflow_id, data['activity_name'], data['activity_type'], data['grid_location'],
+                data['connections'], data['task_time_size'], data['task_time_midpoint'],
+                data['task_time_custom'], data['labor_rate_size'], data['labor_rate_midpoint'],
+                data['labor_rate_custom'], data['volume_size'], data['volume_midpoint'],
+                data['volume_custom'], data['target_cycle_time_hours'], data['actual_cycle_time_hours'],
+                data['disposition_complete_pct'], data['disposition_forwarded_pct'],
+                data['disposition_pended_pct'], data['transformation_plan'], data['phase'],
+                data['status'], data['cost_to_change'], data['projected_annual_savings'],
+                data['process_steps'], data['systems_touched'], data['constraints_rules'],
+                data['opportunities'], data['next_steps'], data['attachments'],
+                data['comments'], data['data_confidence'], data['data_source'], user
+            ))
+
+            apply_activity_rollup(cursor, workflow_id, [new_id], 1)
+
+            # Log creation with the ID we assigned
+            audit.add(new_id, 'CREATE')
+
+        audit.flush()
+        bump_version(cursor, workflow_id)
+        cursor.close()
+    if activity_id and cards is not None:
+        cards.forget(activity_id)
+    clear_activities_cache(workflow_id)
+    return True
+
+
+def delete_activity(activity_id, workflow_id, user, close_gap_at=None, cards=None):
+    """Delete an activity.
+
+    close_gap_at: optional grid location of the deleted card. Later cards in
+    its swimlane shift left one column in the same transaction (a shift keeps
+    cards in their swimlane, so it leaves the rollup as it is).
+    """
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        audit = AuditWriter(cursor, user)
+
+        # Log deletion
+        audit.add(activity_id, 'DELETE')
+
+        # Delete, taking the card out of the rollup first
+        apply_activity_rollup(cursor, workflow_id, [activity_id], -1)
+        cursor.execute("DELETE FROM activities WHERE id = %s", (activity_id,))
+        audit.flush()
+
+        # Close the gap; connections into the removed cell now reach the card that slides into it
+        if close_gap_at:
+            letter, num = parse_location(close_gap_at)
+            if letter and num:
+                _shift_lane(cursor, workflow_id, letter, num + 1, -1, user)
+        bump_version(cursor, workflow_id)
+        cursor.close()
+    if cards is not None:
+        cards.forget(activity_id)
+    clear_activities_cache(workflow_id)
+
+
+def snapshot_stats():
+    """Counts of full loads versus incremental refreshes."""
+    with _stats_lock:
+        return dict(_stats)
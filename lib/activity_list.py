@@ -0,0 +1,100 @@
+"""One page of a workflow's Activity List, filtered and sorted in Snowflake.
+
+The data-grid view of the list only ever shows one page, so it only fetches
+one: filters, sort and LIMIT / OFFSET are part of the query, costs come from
+the shared SQL cost expression and ``COUNT(*) OVER ()`` gives the number of
+matching cards for the pager in the same round trip. Pages are cached per
+workflow version, so paging back and forth or rerunning the script does
+not hit the database again until the workflow changes.
+"""
+import pandas as pd
+
+from lib.cache import keyed_cache
+from lib.costs import SQL_ANNUAL_COST, SQL_MONTHLY_COST
+from lib.db import get_read_cursor
+from lib.grid import SQL_COLUMN, SQL_LANE
+from lib.versions import workflow_version
+
+PAGE_SIZES = (25, 50, 100, 250)
+
+LIST_COLUMNS = ('id', 'name', 'type', 'grid_location', 'swimlane', 'status',
+                'monthly_cost', 'annual_cost', 'changed_at')
+
+# Sort choices -> ORDER BY terms (never user text in the SQL); id breaks ties
+SORTS = {
+    'grid': ('LENGTH(swimlane) {dir} NULLS LAST', 'swimlane {dir} NULLS LAST', 'grid_column {dir} NULLS LAST'),
+    'name': ('LOWER(name) {dir} NULLS LAST',),
+    'type': ('type {dir} NULLS LAST',),
+    'status': ('status {dir} NULLS LAST',),
+    'monthly_cost': ('monthly_cost {dir} NULLS LAST',),
+    'changed_at': ('changed_at {dir}',),
+    'id': ('id {dir}',),
+}
+
+# Filter name -> column it matches (values are bound as parameters)
+FILTERS = {
+    'type': 'type',
+    'status': 'status',
+    'swimlane': 'swimlane',
+}
+
+_LIST_QUERY = f"""
+    SELECT {', '.join(LIST_COLUMNS)}, COUNT(*) OVER () AS matching
+    FROM (
+        SELECT a.id, a.activity_name AS name, a.activity_type AS type, a.grid_location,
+               {SQL_LANE.format(a='a.')} AS swimlane,
+               {SQL_COLUMN.format(a='a.')} AS grid_column,
+               a.status,
+               {SQL_MONTHLY_COST.format(a='a.')} AS monthly_cost,
+               {SQL_ANNUAL_COST.format(a='a.')} AS annual_cost,
+               COALESCE(a.modified_at, a.created_at) AS changed_at
+        FROM activities a
+        WHERE a.workflow_id = %(workflow_id)s
+    )
+    {{where}}
+    ORDER BY {{order}}
+    LIMIT %(limit)s OFFSET %(offset)s
+"""
+
+
+def _where(filters, params):
+    clauses = []
+    for name, values in filters:
+        if name not in FILTERS or not values:
+            continue
+        placeholders = []
+        for i, value in enumerate(values):
+            params[f'{name}_{i}'] = value
+            placeholders.append(f'%({name}_{i})s')
+        clauses.append(f"{FILTERS[name]} IN ({', '.join(placeholders)})")
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+
+# Pages of the list - cached per workflow version, 30 min safety TTL
+@keyed_cache(ttl=1800, max_entries=256)
+def _load_activity_page(workflow_id, version, filters, sort, descending, page, page_size):
+    params = {'workflow_id': workflow_id, 'limit': page_size, 'offset': page * page_size}
+    where = _where(filters, params)
+    direction = 'DESC' if descending else 'ASC'
+    order = ', '.join(term.format(dir=direction) for term in SORTS.get(sort, SORTS['grid']) + ('id {dir}',))
+    cursor = get_read_cursor()
+    cursor.execute(_LIST_QUERY.format(where=where, order=order), params)
+    rows = cursor.fetchall()
+    cursor.close()
+    matching = int(rows[0][-1]) if rows else 0
+    frame = pd.DataFrame([row[:-1] for row in rows], columns=list(LIST_COLUMNS))
+    for column in ('monthly_cost', 'annual_cost'):
+        frame[column] = pd.to_numeric(frame[column]).astype(float)
+    return frame, matching
+
+
+def load_activity_page(workflow_id, filters=None, sort='grid', descending=False, page=0, page_size=PAGE_SIZES[0]):
+    """(DataFrame of LIST_COLUMNS for one page, number of matching cards).
+
+    ``filters`` maps a FILTERS name to the values to keep (empty keeps all);
+    ``page`` is 0-based. A page past the end comes back empty with a count
+    of 0, so callers should step back to page 0. The frame is shared between
+    sessions - copy before modifying.
+    """
+    key = tuple(sorted((name, tuple(values)) for name, values in (filters or {}).items() if values))
+    return _load_activity_page(workflow_id, workflow_version(workflow_id), key, sort, descending, page, page_size)
@@ -0,0 +1,82 @@
+"""Buffered writes to ``activity_audit_log``.
+
+Audit rows are collected for the duration of a write transaction and
+flushed as a single multi-row INSERT just before it commits, instead of one
+INSERT per changed field or shifted card.
+"""
+import threading
+
+from lib.db import insert_rows
+
+AUDIT_COLUMNS = ('activity_id', 'action', 'field_changed', 'old_value', 'new_value', 'changed_by')
+
+# Card fields whose edits get a row each in the audit log
+AUDITED_FIELDS = (
+    'activity_name', 'activity_type', 'grid_location',
+    'connections', 'task_time_size', 'labor_rate_size', 'volume_size',
+    'transformation_plan', 'status', 'data_confidence',
+)
+
+_stats = {'rows': 0, 'statements': 0}
+_stats_lock = threading.Lock()
+
+
+class AuditWriter:
+    """Collects audit rows and writes them in one statement.
+
+    Create it on the transaction's cursor and call ``flush()`` as the last
+    statement before the commit (or use it as a context manager, which
+    flushes on a clean exit and drops the rows if the block raises)::
+
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+            audit = AuditWriter(cursor, CURRENT_USER)
+            ...
+            audit.add(activity_id, 'UPDATE', 'status', old, new)
+            audit.flush()
+    """
+
+    def __init__(self, cursor, changed_by):
+        self._cursor = cursor
+        self.changed_by = changed_by
+        self._rows = []
+
+    def add(self, activity_id, action, field_changed=None, old_value=None, new_value=None):
+        self._rows.append((activity_id, action, field_changed, old_value, new_value, self.changed_by))
+
+    def add_changes(self, activity_id, action, old_card, new_data):
+        """One row per AUDITED_FIELDS entry that differs between the loaded card and the form."""
+        for field in AUDITED_FIELDS:
+            old_value = str(old_card.get(field.upper(), '')) if old_card else ''
+            new_value = str(new_data.get(field, ''))
+            if old_value != new_value:
+                self.add(activity_id, action, field, old_value, new_value)
+
+    def flush(self):
+        """Write buffered rows; returns how many rows were written."""
+        if not self._rows:
+            return 0
+        rows, self._rows = self._rows, []
+        statements = insert_rows(self._cursor, 'activity_audit_log', AUDIT_COLUMNS, rows)
+        with _stats_lock:
+            _stats['rows'] += len(rows)
+            _stats['statements'] += statements
+        return len(rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self._rows = []
+        return False
+
+
+def audit_stats():
+    """Rows written, statements issued, and statements saved versus one INSERT per row."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['statements_saved'] = stats['rows'] - stats['statements']
+    return stats
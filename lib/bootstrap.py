@@ -0,0 +1,147 @@
+"""Concurrent prefetch of the independent queries a page needs to render.
+
+On a cold load the Activity Cards page used to read the t-shirt config, the
+workflow list, the swimlane names and the activity snapshot one after
+another, so the first render waited for the sum of those round trips.
+None of them depends on another, so ``bootstrap`` starts each loader on
+its own thread and waits for all of them. The first render then waits
+only as long as the slowest one.
+
+Each worker reads through its own connection from the read pool
+(``lib.db.dedicated_reads``), so the queries really do run side by side:
+on SQLite the shared read connection's lock would serialize them, and on
+Snowflake its cursors would be used from several threads at once. A worker
+that finds the pool busy falls back to the shared connection.
+
+The loaders are the usual cached functions, so a warm rerun costs a few
+cache lookups. Results, errors and per-loader timings come back in one
+``PageContext``, and process-wide timing stats are kept for the
+Snowflake Test page.
+"""
+import threading
+import time
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+from lib.db import dedicated_reads
+
+# Give up waiting on a loader after this long; it finishes in the background
+BOOTSTRAP_TIMEOUT_SECONDS = 120
+
+_stats = {'runs': 0, 'elapsed_seconds': 0.0, 'sequential_seconds': 0.0, 'errors': 0}
+_loader_stats = {}  # name -> {'runs', 'total_seconds', 'max_seconds', 'last_seconds'}
+_stats_lock = threading.Lock()
+
+
+class BootstrapTimeout(Exception):
+    """A loader was still running when the bootstrap stopped waiting."""
+
+
+class PageContext:
+    """Everything a bootstrap loaded, keyed by loader name.
+
+    ``context[name]`` returns the result or re-raises the loader's
+    exception; ``error(name)`` returns the exception without raising.
+    ``timings`` maps each name to seconds taken and ``elapsed`` is the
+    wall-clock time of the whole stage.
+    """
+
+    def __init__(self, results, errors, timings, elapsed):
+        self.results = results
+        self.errors = errors
+        self.timings = timings
+        self.elapsed = elapsed
+
+    def __getitem__(self, name):
+        if name in self.errors:
+            raise self.errors[name]
+        return self.results[name]
+
+    def __contains__(self, name):
+        return name in self.results or name in self.errors
+
+    def get(self, name, default=None):
+        """Result of ``name``, or ``default`` if it failed or was not loaded."""
+        return self.results.get(name, default)
+
+    def error(self, name):
+        return self.errors.get(name)
+
+    @property
+    def sequential(self):
+        """Time the same loaders would have taken one after another."""
+        return sum(self.timings.values())
+
+    def summary(self):
+        """One line: total time and each loader's share, slowest first."""
+        parts = [f"{name} {seconds * 1000:.0f} ms"
+                 for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1])]
+        return (f"Loaded in {self.elapsed * 1000:.0f} ms "
+                f"({self.sequential * 1000:.0f} ms one after another): " + " · ".join(parts))
+
+
+def _run(name, loader, results, errors, timings):
+    start = time.perf_counter()
+    try:
+        with dedicated_reads():
+            results[name] = loader()
+    except Exception as e:
+        errors[name] = e
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def bootstrap(loaders):
+    """Run every loader in ``loaders`` (name -> no-argument callable) concurrently.
+
+    Loaders must not draw anything; they run on worker threads that share
+    the calling script's context so ``st.cache_data`` and ``st.secrets``
+    behave as on the script thread.
+    """
+    results, errors, timings = {}, {}, {}
+    start = time.perf_counter()
+    threads = []
+    for name, loader in loaders.items():
+        thread = threading.Thread(
+            target=_run, args=(name, loader, results, errors, timings),
+            name=f"bootstrap-{name}", daemon=True,
+        )
+        add_script_run_ctx(thread)
+        thread.start()
+        threads.append((name, thread))
+
+    deadline = start + BOOTSTRAP_TIMEOUT_SECONDS
+    for name, thread in threads:
+        thread.join(max(0.0, deadline - time.perf_counter()))
+        if thread.is_alive():
+            errors[name] = BootstrapTimeout(f"{name} still loading after {BOOTSTRAP_TIMEOUT_SECONDS}s")
+    elapsed = time.perf_counter() - start
+
+    # Snapshot so a loader that timed out can't change the context afterwards
+    context = PageContext(dict(results), dict(errors), dict(timings), elapsed)
+    with _stats_lock:
+        _stats['runs'] += 1
+        _stats['elapsed_seconds'] += elapsed
+        _stats['sequential_seconds'] += context.sequential
+        _stats['errors'] += len(context.errors)
+        for name, seconds in context.timings.items():
+            stats = _loader_stats.setdefault(
+                name, {'runs': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'last_seconds': 0.0}
+            )
+            stats['runs'] += 1
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['last_seconds'] = seconds
+    return context
+
+
+def bootstrap_stats():
+    """Bootstrap runs, wall-clock versus one-after-another time, and per-loader timings."""
+    with _stats_lock:
+        stats = dict(_stats)
+        loaders = {name: dict(values) for name, values in _loader_stats.items()}
+    stats['saved_seconds'] = stats['sequential_seconds'] - stats['elapsed_seconds']
+    for values in loaders.values():
+        values['avg_seconds'] = values['total_seconds'] / values['runs'] if values['runs'] else 0.0
+    stats['loaders'] = loaders
+    return stats
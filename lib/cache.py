@@ -0,0 +1,125 @@
+"""Keyed in-process caches with per-key invalidation.
+
+``st.cache_data`` can only be cleared as a whole, so saving one workflow
+threw away every other workflow's cached data for every session. These
+caches are keyed by the function arguments (normally the workflow id),
+bounded with LRU eviction, expire entries by TTL, and keep hit/miss
+statistics. Cached values are shared between sessions, so callers must
+treat them as read-only.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+_MISSING = object()
+
+# name -> KeyedCache, shared by every page and session in the process
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class KeyedCache:
+    """Thread-safe LRU cache with a per-key TTL."""
+
+    def __init__(self, name, ttl=300, max_entries=128):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    def get(self, key, default=_MISSING):
+        """Return the cached value, or ``default`` if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self._stats['expirations'] += 1
+            self._stats['misses'] += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Store a value; ``ttl`` overrides the cache default for this key."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key):
+        """Drop one key; other keys stay warm."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+def get_cache(name, ttl=300, max_entries=128):
+    """Return the process-wide cache called ``name``, creating it on first use."""
+    with _registry_lock:
+        cache = _registry.get(name)
+        if cache is None:
+            cache = _registry[name] = KeyedCache(name, ttl=ttl, max_entries=max_entries)
+        return cache
+
+
+def keyed_cache(ttl=300, max_entries=128):
+    """Cache a function's results keyed by its positional arguments.
+
+    The decorated function gains ``invalidate(*args)`` to drop a single key
+    and ``clear()`` to drop everything. The cache is registered under the
+    function's file and name, so re-running a page script reuses it.
+    """
+    def decorator(func):
+        name = f"{func.__code__.co_filename}:{func.__qualname__}"
+        cache = get_cache(name, ttl=ttl, max_entries=max_entries)
+
+        @wraps(func)
+        def wrapper(*args):
+            value = cache.get(args)
+            if value is _MISSING:
+                value = func(*args)
+                cache.set(args, value)
+            return value
+
+        wrapper.invalidate = lambda *args: cache.invalidate(args)
+        wrapper.clear = cache.clear
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """Stats for every registered cache, keyed by function name."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name.rsplit(':', 1)[-1]: cache.stats() for cache in caches}
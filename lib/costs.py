@@ -0,0 +1,169 @@
+"""Activity cost model, computed for a whole activity set at once.
+
+``compute_costs`` resolves each card's effective task time, labor rate and
+volume and derives cost per task, monthly and annual cost as column
+operations over NumPy arrays instead of a Python loop per card. The
+arithmetic is done in the same order as ``calculate_activity_costs`` so
+results match it exactly; that scalar version is kept for single cards.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Cost assumptions - eventually move to a settings page or database
+CONFIG = {
+    "productivity_factor": 0.85,  # Assumes 85% productive time
+    "hours_per_year": 1840,       # Total work hours per year
+    "training_hours_per_year": 40, # Hours spent on training per year
+    "work_months_per_year": 12,
+}
+# Derived: adjusted work hours per month
+CONFIG["work_hours_per_month"] = (CONFIG["hours_per_year"] - CONFIG["training_hours_per_year"]) / CONFIG["work_months_per_year"]
+
+# Inputs that can be either a t-shirt size midpoint or a custom value
+COST_INPUTS = ('task_time', 'labor_rate', 'volume')
+
+COST_COLUMNS = ('task_time', 'labor_rate', 'volume', 'cost_per_task', 'tasks_per_hour',
+                'monthly_cost', 'annual_cost')
+
+_LANE_PATTERN = re.compile(r'^([A-Z]+)\d')
+
+
+def _sql_effective(name):
+    # effective_value in SQL; NULLIF makes 0 fall through like Python truthiness
+    return (
+        f"CASE WHEN {{a}}{name}_size = 'Other' AND NULLIF({{a}}{name}_custom, 0) IS NOT NULL"
+        f" THEN {{a}}{name}_custom::FLOAT"
+        f" WHEN NULLIF({{a}}{name}_midpoint, 0) IS NOT NULL THEN {{a}}{name}_midpoint::FLOAT END"
+    )
+
+
+# calculate_activity_costs as SQL expressions over the activities columns, NULL
+# where it returns None. Format with a= the table alias and a dot ('' for none).
+SQL_MONTHLY_COST = (
+    f"IFF(({_sql_effective('task_time')}) > 0"
+    f" AND ({_sql_effective('labor_rate')}) IS NOT NULL AND ({_sql_effective('volume')}) IS NOT NULL,"
+    f" ({_sql_effective('labor_rate')}) / (60 / (({_sql_effective('task_time')}) / {CONFIG['productivity_factor']!r}))"
+    f" * ({_sql_effective('volume')}), NULL)"
+)
+SQL_ANNUAL_COST = f"({SQL_MONTHLY_COST}) * {CONFIG['work_months_per_year']!r}"
+
+
+def effective_value(activity, name):
+    """Value costing uses for one input: custom if "Other" was selected, otherwise midpoint."""
+    if activity.get(f'{name}_size') == 'Other' and activity.get(f'{name}_custom'):
+        return float(activity[f'{name}_custom'])
+    if activity.get(f'{name}_midpoint'):
+        return float(activity[f'{name}_midpoint'])
+    return None
+
+
+def calculate_activity_costs(activity):
+    """Calculate monthly and annual costs for one activity dict."""
+    task_time = effective_value(activity, 'task_time')
+    labor_rate = effective_value(activity, 'labor_rate')
+    volume = effective_value(activity, 'volume')
+
+    # Calculate costs if we have all required values
+    if task_time and labor_rate and volume and task_time > 0:
+        productivity = CONFIG["productivity_factor"]
+        effective_task_time = task_time / productivity  # minutes per task adjusted
+        tasks_per_hour = 60 / effective_task_time
+        cost_per_task = labor_rate / tasks_per_hour
+        monthly_cost = cost_per_task * volume
+        annual_cost = monthly_cost * CONFIG["work_months_per_year"]
+        return {
+            'monthly_cost': monthly_cost,
+            'annual_cost': annual_cost,
+            'cost_per_task': cost_per_task,
+            'tasks_per_hour': tasks_per_hour,
+        }
+    return None
+
+
+def _column(activities, column, dtype):
+    """One input column as an array; missing keys and None become NaN / None."""
+    if isinstance(activities, (pd.DataFrame, dict)):
+        if column not in activities:
+            return np.full(len(activities), np.nan if dtype is float else None, dtype=dtype)
+        values = pd.Series(activities[column])
+        if dtype is float:
+            return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        return values.to_numpy(dtype=object)
+    # numpy turns None into NaN for float arrays (and converts Decimals like float())
+    return np.array([activity.get(column) for activity in activities], dtype=dtype)
+
+
+def _effective_column(activities, name):
+    """Vectorized effective_value: NaN where the card has no usable value."""
+    custom = _column(activities, f'{name}_custom', float)
+    midpoint = _column(activities, f'{name}_midpoint', float)
+    is_other = _column(activities, f'{name}_size', object) == 'Other'
+    # Truthiness: NaN (None) and 0 both fall through
+    use_custom = is_other & (custom != 0) & ~np.isnan(custom)
+    use_midpoint = (midpoint != 0) & ~np.isnan(midpoint)
+    return np.where(use_custom, custom, np.where(use_midpoint, midpoint, np.nan))
+
+
+def compute_costs(activities):
+    """Cost columns for every activity in one vectorized pass.
+
+    ``activities`` is a list of activity dicts (as from load_activities), a
+    DataFrame, or a dict of equal-length columns with the same keys. Columnar
+    input is fastest; a list of dicts first has to be transposed. Returns a
+    DataFrame in the same row order with the input's id and grid_location
+    and COST_COLUMNS; costs are NaN where calculate_activity_costs returns
+    None.
+    """
+    task_time = _effective_column(activities, 'task_time')
+    labor_rate = _effective_column(activities, 'labor_rate')
+    volume = _effective_column(activities, 'volume')
+    valid = (task_time > 0) & ~np.isnan(labor_rate) & ~np.isnan(volume)
+
+    # Same operation order as calculate_activity_costs, so floats match bit for bit
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_task_time = np.where(valid, task_time, np.nan) / CONFIG["productivity_factor"]
+        tasks_per_hour = 60 / effective_task_time
+        cost_per_task = labor_rate / tasks_per_hour
+        monthly_cost = cost_per_task * volume
+        annual_cost = monthly_cost * CONFIG["work_months_per_year"]
+
+    return pd.DataFrame({
+        'id': _column(activities, 'id', object),
+        'grid_location': _column(activities, 'grid_location', object),
+        'task_time': task_time,
+        'labor_rate': labor_rate,
+        'volume': volume,
+        'cost_per_task': cost_per_task,
+        'tasks_per_hour': tasks_per_hour,
+        'monthly_cost': monthly_cost,
+        'annual_cost': annual_cost,
+    })
+
+
+def cost_totals(costs):
+    """Monthly and annual totals over the cards that have a cost."""
+    return {
+        'monthly_cost': float(np.nansum(costs['monthly_cost'].to_numpy())),
+        'annual_cost': float(np.nansum(costs['annual_cost'].to_numpy())),
+        'costed': int(costs['monthly_cost'].notna().sum()),
+        'activities': len(costs),
+    }
+
+
+def swimlane_column(costs):
+    """Swimlane of each row's grid location (NA where it has none)."""
+    return costs['grid_location'].astype('string').str.upper().str.extract(_LANE_PATTERN, expand=False)
+
+
+def costs_by_swimlane(costs):
+    """Per-swimlane activity count, costed count and monthly/annual totals."""
+    swimlane = swimlane_column(costs)
+    grouped = costs.assign(swimlane=swimlane).groupby('swimlane', sort=True, dropna=True).agg(
+        activities=('id', 'size'),
+        costed=('monthly_cost', 'count'),
+        monthly_cost=('monthly_cost', 'sum'),
+        annual_cost=('annual_cost', 'sum'),
+    )
+    return grouped.reset_index()
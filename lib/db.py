@@ -0,0 +1,525 @@
+"""Database connection handling shared by every page.
+
+Writes go through a single bounded pool so a save reuses an already
+authenticated session instead of paying a full login handshake per click.
+Reads share one long-lived connection that is never pinged; it is replaced
+only when it is too old or when a real query fails with a connection error.
+Code that reads from several threads at once (the page bootstrap) wraps
+each thread in ``dedicated_reads()``, which gives that thread its own
+connection from a small read pool, so threads never share a cursor's
+connection.
+
+Connections come from the storage backend chosen in the ``[storage]``
+section of the app secrets (``VOYAGE_STORAGE_BACKEND`` / ``_PATH`` in the
+environment win): ``snowflake`` (the default) or ``sqlite``, an embedded
+local database (lib/local_db.py) for development, tests and demos. SQL is
+written for Snowflake; the few statements SQLite can't run as rewritten
+branch on ``dialect()``.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+import snowflake.connector
+
+SNOWFLAKE = 'snowflake'
+SQLITE = 'sqlite'
+
+# Pool sizing - eventually move to a settings page or secrets
+POOL_MAX_SIZE = 4            # Max open write connections per server process
+POOL_MAX_IDLE_SECONDS = 600  # Idle connections older than this are closed
+POOL_CHECKOUT_TIMEOUT = 30   # Seconds to wait for a free connection
+
+# Connections for threads that read in parallel (dedicated_reads); when all are
+# busy a thread falls back to the shared read connection rather than waiting
+READ_POOL_MAX_SIZE = 4
+
+# Read connection lifetime - replace before Snowflake's 4 hour session timeout
+READ_MAX_AGE_SECONDS = 3 * 60 * 60
+READ_MAX_IDLE_SECONDS = 60 * 60
+
+# Snowflake error numbers that mean the session or network is gone
+CONNECTION_ERRNOS = {
+    250001,  # Could not connect
+    250002,  # Connection closed
+    250003,  # Failed to get a response
+    390111,  # Session no longer exists
+    390112,  # Session expired
+    390114,  # Authentication token expired
+}
+
+
+class SnowflakeBackend:
+    """Storage in the Snowflake account from ``st.secrets["snowflake"]``."""
+
+    name = SNOWFLAKE
+
+    def describe(self):
+        return f"Snowflake ({st.secrets['snowflake']['account']})"
+
+    def connect(self, **overrides):
+        """Open a new Snowflake connection using the app secrets."""
+        params = dict(
+            account=st.secrets["snowflake"]["account"],
+            user=st.secrets["snowflake"]["user"],
+            password=st.secrets["snowflake"]["password"],
+            warehouse=st.secrets["snowflake"]["warehouse"],
+            database=st.secrets["snowflake"]["database"],
+            schema=st.secrets["snowflake"]["schema"]
+        )
+        params.update(overrides)
+        return snowflake.connector.connect(**params)
+
+    def bootstrap(self):
+        # The schema lives in the warehouse; helper tables are created on first use
+        pass
+
+    def is_connection_error(self, exc):
+        if isinstance(exc, (snowflake.connector.errors.OperationalError,
+                            snowflake.connector.errors.InterfaceError)):
+            return True
+        return getattr(exc, 'errno', None) in CONNECTION_ERRNOS
+
+
+def storage_settings():
+    """{'backend', 'path'} from the secrets' [storage] section and the environment."""
+    try:
+        settings = dict(st.secrets.get("storage", {}))
+    except FileNotFoundError:
+        # No secrets file at all - fine for a local database
+        settings = {}
+    for key in ('backend', 'path'):
+        value = os.environ.get(f"VOYAGE_STORAGE_{key.upper()}")
+        if value:
+            settings[key] = value
+    settings['backend'] = str(settings.get('backend') or SNOWFLAKE).lower()
+    return settings
+
+
+# One backend per server process
+@st.cache_resource
+def get_backend():
+    settings = storage_settings()
+    if settings['backend'] == SNOWFLAKE:
+        return SnowflakeBackend()
+    if settings['backend'] == SQLITE:
+        from lib.local_db import DEFAULT_PATH, SQLiteBackend
+        return SQLiteBackend(settings.get('path') or DEFAULT_PATH)
+    raise ValueError(f"Unknown storage backend {settings['backend']!r} (use {SNOWFLAKE!r} or {SQLITE!r})")
+
+
+def dialect():
+    """SQL dialect of the configured backend: SNOWFLAKE or SQLITE."""
+    return get_backend().name
+
+
+def connect(**overrides):
+    """Open a new connection to the configured backend."""
+    return get_backend().connect(**overrides)
+
+
+def is_connection_error(exc):
+    """True if the error means the connection is unusable (vs. a bad query)."""
+    return get_backend().is_connection_error(exc)
+
+
+def insert_rows(cursor, table, columns, rows, batch_size=1000):
+    """Insert ``rows`` with one multi-row INSERT per ``batch_size`` rows.
+
+    Returns the number of statements executed.
+    """
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    statements = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        params = [value for row in batch for value in row]
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join([row_sql] * len(batch)),
+            params
+        )
+        statements += 1
+    return statements
+
+
+def merge_missing_rows(cursor, table, columns, rows, key_columns, batch_size=1000):
+    """Insert only the ``rows`` whose key is not already in ``table``.
+
+    Each batch is staged as an inline VALUES list and applied with one
+    MERGE ... WHEN NOT MATCHED THEN INSERT, so re-running a load is a no-op.
+    SQLite has no MERGE and gets INSERT ... SELECT ... WHERE NOT EXISTS.
+    Returns the number of rows inserted.
+    """
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    source_columns = ", ".join(f"column{i + 1} AS {col}" for i, col in enumerate(columns))
+    match = " AND ".join(f"t.{col} = s.{col}" for col in key_columns)
+    inserted = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        params = [value for row in batch for value in row]
+        values = ", ".join([row_sql] * len(batch))
+        if dialect() == SQLITE:
+            cursor.execute(f"""
+                INSERT INTO {table} ({", ".join(columns)})
+                SELECT {", ".join("s." + col for col in columns)}
+                FROM (SELECT {source_columns} FROM (VALUES {values})) s
+                WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {match})
+            """, params)
+        else:
+            cursor.execute(f"""
+                MERGE INTO {table} t
+                USING (SELECT {source_columns} FROM VALUES {values}) s
+                ON {match}
+                WHEN NOT MATCHED THEN INSERT ({", ".join(columns)})
+                    VALUES ({", ".join("s." + col for col in columns)})
+            """, params)
+        inserted += cursor.rowcount
+    return inserted
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up within the checkout timeout."""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of write connections.
+
+    Connections are opened lazily up to ``max_size`` and returned to the
+    pool on checkin. Connections that sit idle longer than ``max_idle``
+    seconds are closed on the next checkout.
+    """
+
+    def __init__(self, connect_fn, max_size=POOL_MAX_SIZE, max_idle=POOL_MAX_IDLE_SECONDS):
+        self._connect = connect_fn
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self._idle = []  # (connection, returned_at), most recently returned last
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'evicted': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+        }
+
+    def _evict_idle(self, now):
+        """Close idle connections past max_idle. Caller holds the lock."""
+        keep = []
+        for conn, returned_at in self._idle:
+            if now - returned_at > self.max_idle:
+                self._close_quietly(conn)
+                self._stats['evicted'] += 1
+            else:
+                keep.append((conn, returned_at))
+        self._idle = keep
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def checkout(self, timeout=POOL_CHECKOUT_TIMEOUT):
+        """Borrow a connection, opening one if the pool has room."""
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            while True:
+                self._evict_idle(time.monotonic())
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    if conn.is_closed():
+                        self._stats['discarded'] += 1
+                        continue
+                    break
+                if self._in_use < self.max_size:
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"No database connection available after {timeout}s")
+                self._cond.wait(remaining)
+            self._in_use += 1
+            waited = time.monotonic() - started
+            self._stats['checkouts'] += 1
+            self._stats['wait_seconds_total'] += waited
+            self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], waited)
+
+        if conn is None:
+            # Open outside the lock so a slow login doesn't block other checkins
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats['created'] += 1
+        return conn
+
+    def checkin(self, conn, discard=False):
+        """Return a borrowed connection. Broken connections should be discarded.
+
+        The caller is responsible for ending its transaction first;
+        ``transaction()`` does this automatically.
+        """
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.is_closed():
+                self._stats['discarded'] += 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def transaction(self, timeout=POOL_CHECKOUT_TIMEOUT):
+        """Check out a connection for one transaction.
+
+        Commits when the block exits normally and rolls back if it raises.
+        The connection goes back to the pool either way.
+        """
+        conn = self.checkout(timeout)
+        try:
+            yield conn
+            conn.commit()
+        except BaseException as e:
+            broken = is_connection_error(e)
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            self.checkin(conn, discard=broken)
+            raise
+        else:
+            self.checkin(conn)
+
+    def stats(self):
+        """Snapshot of pool metrics."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['in_use'] = self._in_use
+            stats['idle'] = len(self._idle)
+            stats['max_size'] = self.max_size
+        stats['wait_seconds_avg'] = (
+            stats['wait_seconds_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        )
+        return stats
+
+    def close_all(self):
+        """Close every idle connection (borrowed ones close on checkin)."""
+        with self._cond:
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._idle = []
+
+
+# One pool per server process, shared by every page and session
+@st.cache_resource
+def get_pool():
+    # Explicit transactions so the pool can commit/rollback per checkout
+    return ConnectionPool(lambda: connect(autocommit=False))
+
+
+def write_transaction(timeout=POOL_CHECKOUT_TIMEOUT):
+    """Pooled connection for writes: commits on success, rolls back on error."""
+    return get_pool().transaction(timeout)
+
+
+class ReadConnection:
+    """Shared read connection with ping-free liveness tracking.
+
+    Rather than running ``SELECT 1`` before every read, the connection is
+    trusted until it is older than ``max_age``, idle longer than ``max_idle``,
+    or a real query fails with a connection-class error. In that last case
+    the query is retried once on a fresh connection.
+    """
+
+    def __init__(self, connect_fn, max_age=READ_MAX_AGE_SECONDS, max_idle=READ_MAX_IDLE_SECONDS):
+        self._connect = connect_fn
+        self.max_age = max_age
+        self.max_idle = max_idle
+        self._conn = None
+        self.created_at = None
+        self.last_success_at = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'queries': 0,
+            'pings_avoided': 0,
+            'reconnects': 0,
+            'retries': 0,
+        }
+
+    def _open(self):
+        """Replace the current connection. Caller holds the lock."""
+        if self._conn is not None:
+            ConnectionPool._close_quietly(self._conn)
+            self._stats['reconnects'] += 1
+        self._conn = self._connect()
+        self.created_at = self.last_success_at = time.monotonic()
+
+    def connection(self):
+        """Current connection, reopened only if closed, too old or idle too long."""
+        with self._lock:
+            now = time.monotonic()
+            if (self._conn is None or self._conn.is_closed()
+                    or now - self.created_at > self.max_age
+                    or now - self.last_success_at > self.max_idle):
+                self._open()
+            return self._conn
+
+    def reconnect(self, failed_conn):
+        """Swap out a connection that just failed, unless another thread already did."""
+        with self._lock:
+            if self._conn is failed_conn:
+                self._open()
+            return self._conn
+
+    def mark_success(self):
+        with self._lock:
+            self.last_success_at = time.monotonic()
+            self._stats['queries'] += 1
+            # Every query runs without a liveness ping in front of it
+            self._stats['pings_avoided'] += 1
+
+    def cursor(self):
+        """Cursor whose execute() transparently retries once after a dropped connection."""
+        return ReadCursor(self)
+
+    def count_retry(self):
+        with self._lock:
+            self._stats['retries'] += 1
+
+    def stats(self):
+        """Snapshot of read connection counters and age."""
+        with self._lock:
+            stats = dict(self._stats)
+            now = time.monotonic()
+            stats['age_seconds'] = now - self.created_at if self.created_at else 0.0
+            stats['idle_seconds'] = now - self.last_success_at if self.last_success_at else 0.0
+        return stats
+
+
+class ReadCursor:
+    """Thin cursor wrapper used by ReadConnection."""
+
+    def __init__(self, manager):
+        self._manager = manager
+        self._conn = manager.connection()
+        self._cursor = self._conn.cursor()
+
+    def execute(self, sql, params=None):
+        try:
+            self._cursor.execute(sql, params)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            # Connection dropped under us - reconnect and retry this query once
+            self._manager.count_retry()
+            self._conn = self._manager.reconnect(self._conn)
+            self._cursor = self._conn.cursor()
+            self._cursor.execute(sql, params)
+        self._manager.mark_success()
+        return self
+
+    def __getattr__(self, name):
+        # fetchone, fetchall, description, rowcount, close, ...
+        return getattr(self._cursor, name)
+
+
+class PooledRead:
+    """One thread's read connection, checked out of the read pool.
+
+    Cursors are ReadCursors, so a dropped connection is swapped for a
+    fresh pooled one and the query retried once, as on the shared one.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def connection(self):
+        return self._conn
+
+    def reconnect(self, failed_conn):
+        if self._conn is failed_conn:
+            self._conn = None
+            self._pool.checkin(failed_conn, discard=True)
+            self._conn = self._pool.checkout()
+        return self._conn
+
+    def mark_success(self):
+        # Pooled reads are counted in the read pool's checkouts
+        pass
+
+    def count_retry(self):
+        pass
+
+    def cursor(self):
+        return ReadCursor(self)
+
+    def release(self, discard=False):
+        if self._conn is not None:
+            self._pool.checkin(self._conn, discard=discard)
+            self._conn = None
+
+
+# One read connection per server process, shared by every page and session
+@st.cache_resource
+def get_read_connection():
+    return ReadConnection(connect)
+
+
+# Read connections handed to one thread at a time, shared by every page and session
+@st.cache_resource
+def get_read_pool():
+    return ConnectionPool(connect, max_size=READ_POOL_MAX_SIZE)
+
+
+_thread_reads = threading.local()
+
+
+@contextmanager
+def dedicated_reads():
+    """Route this thread's ``get_read_cursor()`` calls to its own pooled connection.
+
+    For work that runs on several threads at once: each gets a separate
+    connection instead of all of them queueing on (or, on Snowflake,
+    sharing cursors of) the one shared read connection. If the read pool
+    is fully in use the thread just uses the shared connection.
+    """
+    pool = get_read_pool()
+    try:
+        reads = PooledRead(pool, pool.checkout(timeout=0))
+    except PoolTimeout:
+        reads = None
+    if reads is None:
+        yield
+        return
+
+    _thread_reads.reads = reads
+    try:
+        yield
+    except BaseException as e:
+        reads.release(discard=is_connection_error(e))
+        raise
+    else:
+        reads.release()
+    finally:
+        del _thread_reads.reads
+
+
+def get_read_cursor():
+    """Get a cursor on this thread's dedicated read connection, else the shared one."""
+    reads = getattr(_thread_reads, 'reads', None)
+    if reads is not None:
+        return reads.cursor()
+    return get_read_connection().cursor()
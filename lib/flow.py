@@ -0,0 +1,281 @@
+"""Volume flow through a workflow's process graph.
+
+Each card's own ``volume`` is an estimate entered in isolation. This module
+derives the volume each card *should* see from the entry points and the
+branch splits, so the two can be compared and costed.
+
+How a card's work leaves it, in order of preference:
+
+1. Branch probabilities entered on its connections (``"probability"`` on a
+   connection, 0-1 or a percentage). Blank branches share whatever is left;
+   anything not assigned leaves the process.
+2. Its disposition percentages: *pended* work comes back to the same card
+   (rework), *complete* work leaves the process and *forwarded* work is
+   split evenly over its connections.
+3. Otherwise an even split over its connections (a card with none is an
+   end point).
+
+Cards with no incoming connections receive their own entered volume as
+arrivals. Volumes then satisfy ``v = arrivals + P^T v``. That is an absorbing
+Markov chain, so loops such as rework count every pass through a card. The
+system is solved per strongly connected component in topological order
+(the process graph's own ``topological_order`` when it has no cycles).
+Acyclic stretches are a single multiply-add per edge. Only genuine loops
+need a linear solve: a dense one for small loops, or sparse fixed-point
+iteration for large ones. Workflows with thousands of cards stay fast.
+"""
+import numpy as np
+import pandas as pd
+
+from lib.costs import compute_costs, effective_value
+from lib.graph import CycleError
+
+# Loops up to this many cards get a direct dense solve; larger ones iterate
+DENSE_SOLVE_LIMIT = 400
+MAX_ITERATIONS = 10_000
+TOLERANCE = 1e-12
+
+
+def _probability(conn):
+    try:
+        value = float(conn.get('probability'))
+    except (TypeError, ValueError):
+        return None
+    if value > 1:
+        value /= 100  # Entered as a percentage
+    return value if value >= 0 else None
+
+
+def card_shares(connections, activity):
+    """Split of one card's outflow: (branch_shares, pended_share, exit_share).
+
+    ``branch_shares`` is parallel to ``connections``; entries without a
+    ``next`` location get 0. The three parts add up to 1.
+    """
+    shares = [0.0] * len(connections)
+    branches = [i for i, conn in enumerate(connections) if str(conn.get('next') or '').strip()]
+
+    given = {i: _probability(connections[i]) for i in branches}
+    if any(value is not None for value in given.values()):
+        blank = [i for i in branches if given[i] is None]
+        remaining = max(0.0, 1.0 - sum(value for value in given.values() if value is not None))
+        for i in branches:
+            shares[i] = given[i] if given[i] is not None else remaining / len(blank)
+        total = sum(shares)
+        if total > 1:
+            return [share / total for share in shares], 0.0, 0.0
+        return shares, 0.0, 1.0 - total
+
+    complete, forwarded, pended = (
+        float(activity.get(f'disposition_{kind}_pct') or 0) for kind in ('complete', 'forwarded', 'pended')
+    )
+    total = complete + forwarded + pended
+    if total > 0:
+        if not branches:
+            # Nowhere to forward to, so forwarded work leaves too
+            return shares, pended / total, (complete + forwarded) / total
+        for i in branches:
+            shares[i] = forwarded / total / len(branches)
+        return shares, pended / total, complete / total
+
+    if not branches:
+        return shares, 0.0, 1.0
+    for i in branches:
+        shares[i] = 1.0 / len(branches)
+    return shares, 0.0, 0.0
+
+
+def _solve_loop(size, loop, sources, targets, weights, rhs):
+    """Solve (I - P^T) v = rhs for one strongly connected component; None if singular.
+
+    Small loops are solved directly. Large ones use fixed-point iteration
+    v <- rhs + P^T v, which costs one pass over the edges per step and
+    converges because work can leave the loop.
+    """
+    if not rhs.any():
+        return np.zeros(size)
+    if size <= DENSE_SOLVE_LIMIT:
+        system = np.eye(size)
+        system[np.arange(size), np.arange(size)] -= loop
+        np.add.at(system, (targets, sources), -weights)
+        try:
+            solved = np.linalg.solve(system, rhs)
+        except np.linalg.LinAlgError:
+            return None
+    else:
+        solved = rhs.copy()
+        for _ in range(MAX_ITERATIONS):
+            following = rhs + loop * solved + np.bincount(targets, weights * solved[sources], minlength=size)
+            converged = np.max(np.abs(following - solved)) <= TOLERANCE * max(1.0, np.max(np.abs(following)))
+            solved = following
+            if converged:
+                break
+        else:
+            return None
+    if not np.all(np.isfinite(solved)) or np.any(solved < -1e-9):
+        return None
+    return solved
+
+
+def strongly_connected_components(count, indptr, indices):
+    """Tarjan's algorithm without recursion; components come out in reverse topological order."""
+    index = [-1] * count
+    low = [0] * count
+    on_stack = [False] * count
+    stack = []
+    components = []
+    counter = 0
+    for root in range(count):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [[root, indptr[root]]]
+        while work:
+            frame = work[-1]
+            v, pos = frame
+            if pos < indptr[v + 1]:
+                frame[1] += 1
+                w = indices[pos]
+                if index[w] < 0:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append([w, indptr[w]])
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components
+
+
+def solve_flow(graph, activities, costs=None):
+    """Implied volume and cost for every card in ``graph``.
+
+    ``activities`` is the workflow's activity list (for entered volume,
+    dispositions and costs) and ``costs`` its compute_costs frame if already
+    computed. Returns a dict with a ``cards`` DataFrame and lists of
+    ``trapped`` locations (loops work can never leave) and ``dangling``
+    connections (to empty cells; that share leaves the process).
+    """
+    count = len(graph)
+    by_location = {(activity.get('grid_location') or '').upper(): activity for activity in activities}
+    cards = [by_location.get(location, {}) for location in graph.locations]
+    entered = np.array([effective_value(card, 'volume') or 0.0 for card in cards])
+
+    # Weighted edges between different cards; pended work and self-connections are loops
+    loop = np.zeros(count)
+    sources, targets, weights = [], [], []
+    for i, location in enumerate(graph.locations):
+        connections = graph.connections(location)
+        shares, pended, _ = card_shares(connections, cards[i])
+        loop[i] += pended
+        for conn, share in zip(connections, shares):
+            j = graph.index.get(str(conn.get('next') or '').strip().upper())
+            if share <= 0 or j is None:
+                continue
+            if j == i:
+                loop[i] += share
+            else:
+                sources.append(i)
+                targets.append(j)
+                weights.append(share)
+
+    sources = np.array(sources, dtype=np.int64)
+    targets = np.array(targets, dtype=np.int64)
+    weights = np.array(weights, dtype=float)
+    order = np.argsort(sources, kind='stable')
+    sources, targets, weights = sources[order], targets[order], weights[order]
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=count), out=indptr[1:])
+
+    # Entry points: cards nothing else flows into
+    has_inflow = np.zeros(count, dtype=bool)
+    has_inflow[targets] = True
+    inflow = np.where(has_inflow, 0.0, entered)
+    arrivals = inflow.copy()
+
+    indptr_list, targets_list, weights_list = indptr.tolist(), targets.tolist(), weights.tolist()
+    try:
+        # Acyclic process: every card is its own component, in the graph's topological order
+        components = [[graph.index[location]] for location in reversed(graph.topological_order())]
+    except CycleError:
+        components = strongly_connected_components(count, indptr_list, targets_list)
+    component_of = [0] * count
+    for c, component in enumerate(components):
+        for i in component:
+            component_of[i] = c
+
+    volume = np.zeros(count)
+    trapped = []
+    for c in range(len(components) - 1, -1, -1):
+        component = components[c]
+        if len(component) == 1:
+            i = component[0]
+            if loop[i] < 1:
+                volume[i] = inflow[i] / (1.0 - loop[i])
+            elif inflow[i] > 0:
+                volume[i] = np.nan
+                trapped.append(graph.locations[i])
+        else:
+            position = {i: k for k, i in enumerate(component)}
+            inner_sources, inner_targets, inner_weights = [], [], []
+            for i in component:
+                for e in range(indptr_list[i], indptr_list[i + 1]):
+                    j = targets_list[e]
+                    if j in position:
+                        inner_sources.append(position[i])
+                        inner_targets.append(position[j])
+                        inner_weights.append(weights_list[e])
+            rhs = inflow[component]
+            solved = _solve_loop(
+                len(component), loop[component],
+                np.array(inner_sources, dtype=np.int64), np.array(inner_targets, dtype=np.int64),
+                np.array(inner_weights), rhs,
+            )
+            if solved is None:
+                # A loop with no way out. Only a problem if work flows into it.
+                solved = np.full(len(component), np.nan if rhs.any() else 0.0)
+                if rhs.any():
+                    trapped.extend(graph.locations[i] for i in component)
+            volume[component] = solved
+
+        # Push this component's outflow downstream
+        for i in component:
+            for e in range(indptr_list[i], indptr_list[i + 1]):
+                j = targets_list[e]
+                if component_of[j] != c:
+                    inflow[j] += volume[i] * weights_list[e]
+
+    if costs is None:
+        costs = compute_costs(activities)
+    cost_per_task = dict(zip(costs['id'], costs['cost_per_task']))
+    unit_cost = np.array([cost_per_task.get(card.get('id'), np.nan) for card in cards], dtype=float)
+    frame = pd.DataFrame({
+        'grid_location': graph.locations,
+        'id': graph.ids,
+        'name': [card.get('name') for card in cards],
+        'arrivals': arrivals,
+        'entered_volume': np.where(entered > 0, entered, np.nan),
+        'implied_volume': volume,
+        'cost_per_task': unit_cost,
+    })
+    frame['volume_gap'] = frame['implied_volume'] - frame['entered_volume']
+    frame['entered_monthly_cost'] = frame['cost_per_task'] * frame['entered_volume']
+    frame['implied_monthly_cost'] = frame['cost_per_task'] * frame['implied_volume']
+    return {'cards': frame, 'trapped': trapped, 'dangling': list(graph.dangling)}
@@ -0,0 +1,174 @@
+"""Process graph over the activities' ``connections`` JSON.
+
+Each activity stores its outgoing connections as a JSON list of
+``{"next": <grid location>, "condition": <label>}`` objects. ``ProcessGraph``
+parses those once and keeps them as compact CSR arrays (``indptr`` /
+``indices`` over node numbers, nodes keyed by grid location) plus the
+reverse-edge index, so walking the process never touches JSON again. The
+activity snapshot builds one graph per version (see
+``lib.activities.load_process_graph``).
+"""
+import json
+from collections import deque
+
+import numpy as np
+
+
+class CycleError(ValueError):
+    """The graph has a cycle, so it has no topological order."""
+
+    def __init__(self, nodes):
+        super().__init__(f"Process has a cycle through {', '.join(nodes)}")
+        self.nodes = nodes
+
+
+def parse_connections(raw):
+    """Connections as a list of dicts; accepts JSON text, a list, or None."""
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    return [conn for conn in raw if isinstance(conn, dict)] if isinstance(raw, list) else []
+
+
+def _csr(count, sources, targets):
+    # Edges sorted by source (stable, so each node keeps its connection order)
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(count + 1, dtype=np.int32)
+    np.cumsum(np.bincount(sources, minlength=count), out=indptr[1:])
+    return indptr, targets[order].astype(np.int32)
+
+
+class ProcessGraph:
+    """Directed graph of one workflow's activities, keyed by grid location.
+
+    Read-only once built and shared between sessions. Edges whose target is
+    not an activity are kept in ``dangling`` rather than in the arrays.
+    """
+
+    def __init__(self, nodes):
+        """``nodes`` is an iterable of (grid_location, activity_id, connections)."""
+        self.locations = []
+        self.ids = []
+        self._connections = []
+        for location, activity_id, connections in nodes:
+            if not location:
+                continue
+            self.locations.append(location.upper())
+            self.ids.append(activity_id)
+            self._connections.append(parse_connections(connections))
+        self.index = {location: i for i, location in enumerate(self.locations)}
+
+        sources, targets, self.conditions, self.dangling = [], [], [], []
+        for i, connections in enumerate(self._connections):
+            for conn in connections:
+                target = str(conn.get('next') or '').strip().upper()
+                if not target:
+                    continue
+                j = self.index.get(target)
+                if j is None:
+                    self.dangling.append((self.locations[i], target))
+                    continue
+                sources.append(i)
+                targets.append(j)
+                self.conditions.append(conn.get('condition'))
+
+        count = len(self.locations)
+        sources = np.array(sources, dtype=np.int32)
+        targets = np.array(targets, dtype=np.int32)
+        self.indptr, self.indices = _csr(count, sources, targets)
+        self.rindptr, self.rindices = _csr(count, targets, sources)
+        # Conditions line up with self.indices
+        self.conditions = [self.conditions[k] for k in np.argsort(sources, kind='stable')]
+
+    @classmethod
+    def from_grid(cls, grid):
+        """Build from a snapshot grid ({location: {'id', 'connections', ...}})."""
+        return cls((location, entry['id'], entry.get('connections')) for location, entry in grid.items())
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, location):
+        return bool(location) and location.upper() in self.index
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    def _node(self, location):
+        return self.index[location.upper()]
+
+    def connections(self, location):
+        """The parsed connection list for a card (shared - do not modify)."""
+        i = self.index.get((location or '').upper())
+        return self._connections[i] if i is not None else []
+
+    def branch_count(self, location):
+        """Number of connection entries on the card, dangling ones included."""
+        return len(self.connections(location))
+
+    def successors(self, location):
+        i = self._node(location)
+        return [self.locations[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def predecessors(self, location):
+        i = self._node(location)
+        return [self.locations[j] for j in self.rindices[self.rindptr[i]:self.rindptr[i + 1]]]
+
+    def out_degree(self, location):
+        i = self._node(location)
+        return int(self.indptr[i + 1] - self.indptr[i])
+
+    def in_degree(self, location):
+        i = self._node(location)
+        return int(self.rindptr[i + 1] - self.rindptr[i])
+
+    def _walk(self, start, indptr, indices):
+        # Breadth-first from start's neighbours; start itself is only reached via a cycle
+        seen = np.zeros(len(self.locations), dtype=bool)
+        queue = deque([start])
+        while queue:
+            i = queue.popleft()
+            for j in indices[indptr[i]:indptr[i + 1]]:
+                if not seen[j]:
+                    seen[j] = True
+                    queue.append(j)
+        return [self.locations[j] for j in np.flatnonzero(seen)]
+
+    def reachable(self, location):
+        """Every card downstream of ``location`` (itself only if it is on a cycle)."""
+        return self._walk(self._node(location), self.indptr, self.indices)
+
+    def upstream(self, location):
+        """Every card that can reach ``location``."""
+        return self._walk(self._node(location), self.rindptr, self.rindices)
+
+    def sources(self):
+        """Cards with no incoming connections (process entry points)."""
+        in_degree = np.diff(self.rindptr)
+        return [self.locations[i] for i in np.flatnonzero(in_degree == 0)]
+
+    def sinks(self):
+        """Cards with no outgoing connections (process end points)."""
+        out_degree = np.diff(self.indptr)
+        return [self.locations[i] for i in np.flatnonzero(out_degree == 0)]
+
+    def topological_order(self):
+        """Locations so every connection points forward; raises CycleError on loops."""
+        in_degree = np.diff(self.rindptr).astype(np.int64)
+        queue = deque(np.flatnonzero(in_degree == 0).tolist())
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(self.locations[i])
+            for j in self.indices[self.indptr[i]:self.indptr[i + 1]]:
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    queue.append(int(j))
+        if len(order) < len(self.locations):
+            raise CycleError([self.locations[i] for i in np.flatnonzero(in_degree > 0)])
+        return order
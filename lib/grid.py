@@ -0,0 +1,158 @@
+"""Grid locations and a per-snapshot index of occupied cells.
+
+A grid location is a swimlane id followed by a column number (``C12``).
+Swimlane ids use bijective base 26 like spreadsheet columns: A..Z, then
+AA, AB, ... AZ, BA, ... so a process map is not limited to 26 lanes.
+
+``GridIndex`` parses every location once and keeps, for each lane, the
+sorted list of occupied columns. Bounds, neighbours, gaps and shift ranges
+are then bisect lookups instead of a regex pass over the whole grid.
+"""
+import re
+from bisect import bisect_left, bisect_right
+
+_LOCATION_PATTERN = re.compile(r'([A-Z]+)(\d+)')
+
+# parse_location in SQL, over a grid_location column; format with a= the
+# table alias and a dot ('' for none). NULL where the location has no lane.
+SQL_LANE = "REGEXP_SUBSTR(UPPER({a}grid_location), '^([A-Z]+)[0-9]', 1, 1, 'e', 1)"
+SQL_COLUMN = "TRY_TO_NUMBER(REGEXP_SUBSTR({a}grid_location, '^[A-Za-z]+([0-9]+)', 1, 1, 'e', 1))"
+
+
+def parse_location(location):
+    """Split a grid location into (lane, column), or (None, None) if it isn't one."""
+    if not location:
+        return None, None
+    match = _LOCATION_PATTERN.match(location.upper())
+    if match:
+        return match.group(1), int(match.group(2))
+    return None, None
+
+
+def build_location(lane, column):
+    return f"{lane}{column}"
+
+
+def lane_number(lane):
+    """1-based position of a lane id: A=1, Z=26, AA=27."""
+    number = 0
+    for char in lane.upper():
+        number = number * 26 + ord(char) - ord('A') + 1
+    return number
+
+
+def lane_id(number):
+    """Lane id for a 1-based position (inverse of lane_number)."""
+    chars = []
+    while number > 0:
+        number, remainder = divmod(number - 1, 26)
+        chars.append(chr(ord('A') + remainder))
+    return ''.join(reversed(chars))
+
+
+def lane_ids(count):
+    """The first ``count`` lane ids: A, B, ... Z, AA, ..."""
+    return [lane_id(n) for n in range(1, count + 1)]
+
+
+def lane_sort_key(lane):
+    # AA sorts after Z, not between A and B
+    return (len(lane), lane)
+
+
+class GridIndex:
+    """Occupied columns per lane, kept sorted for bisect queries."""
+
+    def __init__(self, locations=()):
+        self._columns = {}  # lane -> sorted list of occupied columns
+        self._max_column = 0
+        self._max_lane = 0
+        for location in locations:
+            self.add(location)
+
+    @classmethod
+    def from_grid(cls, grid):
+        return cls(grid.keys())
+
+    def add(self, location):
+        lane, column = parse_location(location)
+        if lane is None:
+            return
+        columns = self._columns.setdefault(lane, [])
+        position = bisect_left(columns, column)
+        if position == len(columns) or columns[position] != column:
+            columns.insert(position, column)
+        self._max_column = max(self._max_column, column)
+        self._max_lane = max(self._max_lane, lane_number(lane))
+
+    def lanes(self):
+        """Lanes with at least one card, in grid order."""
+        return sorted(self._columns, key=lane_sort_key)
+
+    def columns(self, lane):
+        """Occupied columns in a lane, ascending (shared - do not modify)."""
+        return self._columns.get(lane.upper(), [])
+
+    def max_column(self):
+        return self._max_column
+
+    def max_lane_number(self):
+        return self._max_lane
+
+    def occupied(self, lane, column):
+        columns = self.columns(lane)
+        position = bisect_left(columns, column)
+        return position < len(columns) and columns[position] == column
+
+    def next_occupied(self, lane, column):
+        """First occupied column after ``column`` in the lane, or None."""
+        columns = self.columns(lane)
+        position = bisect_right(columns, column)
+        return columns[position] if position < len(columns) else None
+
+    def previous_occupied(self, lane, column):
+        """Last occupied column before ``column`` in the lane, or None."""
+        columns = self.columns(lane)
+        position = bisect_left(columns, column)
+        return columns[position - 1] if position else None
+
+    def first_gap(self, lane, column=1):
+        """First free column at or after ``column`` in the lane."""
+        columns = self.columns(lane)
+        position = bisect_left(columns, column)
+        while position < len(columns) and columns[position] == column:
+            position += 1
+            column += 1
+        return column
+
+    def count_from(self, lane, column):
+        """Number of cards at or after ``column`` in the lane (what a shift moves)."""
+        columns = self.columns(lane)
+        return len(columns) - bisect_left(columns, column)
+
+    def shift_plan(self, lane, column, delta, end=None):
+        """[(old_location, new_location)] for shifting a lane's cards by ``delta``.
+
+        Moves the cards from ``column`` up to (not including) ``end``, or to
+        the end of the lane if ``end`` is None. Raises ValueError if a card
+        would land before column 1 or on a card that is not moving.
+        """
+        columns = self.columns(lane)
+        stop = len(columns) if end is None else bisect_left(columns, end)
+        moving = columns[bisect_left(columns, column):stop]
+        if moving and moving[0] + delta < 1:
+            raise ValueError(f"Shifting {lane}{column} by {delta} would move cards before column 1")
+        for current in moving:
+            target = current + delta
+            if self.occupied(lane, target) and not (target >= column and (end is None or target < end)):
+                raise ValueError(f"Shifting {lane}{column} by {delta} would overwrite {lane}{target}")
+        return [(build_location(lane, c), build_location(lane, c + delta)) for c in moving]
+
+    def lanes_to_show(self, named_lanes=(), minimum=3):
+        """Lane ids from A through the last used lane plus one spare, at least ``minimum``."""
+        last = max([self._max_lane] + [lane_number(lane) for lane in named_lanes])
+        return lane_ids(max(last + 1, minimum))
+
+    def columns_to_show(self, minimum=4):
+        """Columns 1 through the last used column plus one spare, at least ``minimum``."""
+        return list(range(1, max(self._max_column + 1, minimum) + 1))
@@ -0,0 +1,219 @@
+"""The Process Grid as one Vega-Lite chart instead of a button per cell.
+
+``grid_chart_spec`` lays out every lane x column cell, an icon per card
+(type, with name, connections and the cards feeding it in the tooltip) and an arrow per
+connection. The page renders it with ``st.vega_lite_chart(on_select=...)``
+and reads the clicked cell back from the ``cell`` selection, so the grid is
+a single element no matter how many cells it has.
+
+Building the spec touches every cell and edge, so specs are cached under a
+content hash of what they show (cards, connections, lanes, columns and
+swimlane names). A rerun that changes none of those reuses the spec, and
+editing one card rebuilds one spec rather than re-rendering hundreds of
+widgets.
+"""
+import hashlib
+import json
+import math
+
+from lib.cache import get_cache
+from lib.grid import build_location, parse_location
+
+# Cell size in pixels; the chart is sized from these so arrows can be angled correctly
+CELL_WIDTH = 56
+CELL_HEIGHT = 40
+LABEL_WIDTH = 180
+
+# Name of the click selection the page reads back
+SELECTION = 'cell'
+
+TYPE_ICONS = {
+    'task': '🔵',
+    'decision': '🔶',
+}
+DEFAULT_ICON = '🔵'
+
+# Arrowheads sit this far along each connection (0 = source, 1 = target)
+ARROW_POSITION = 0.7
+
+_specs = get_cache('grid_chart_specs', ttl=0, max_entries=64)
+
+
+def layout_key(grid, lanes, columns, swimlane_names):
+    """Content hash of everything the grid chart shows."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([list(lanes), list(columns), sorted(swimlane_names.items())]).encode())
+    for location in sorted(grid):
+        entry = grid[location]
+        digest.update(json.dumps(
+            [location, entry['id'], entry.get('name'), entry.get('type'), str(entry.get('changed_at'))],
+            default=str,
+        ).encode())
+    return digest.hexdigest()
+
+
+def _lane_labels(lanes, swimlane_names):
+    labels = [f"{lane} - {swimlane_names.get(lane) or '(unnamed)'}" for lane in lanes]
+    return [label if len(label) <= 26 else label[:25] + '…' for label in labels]
+
+
+def _cells(grid, graph, lanes, columns, swimlane_names):
+    # Connections to empty cells aren't graph edges, but the tooltip still lists them
+    dangling = {}
+    for source, target in graph.dangling:
+        dangling.setdefault(source, []).append(target)
+    cells = []
+    for row, lane in enumerate(lanes):
+        named = lane in swimlane_names
+        for column in columns:
+            location = build_location(lane, column)
+            entry = grid.get(location)
+            cell = {'location': location, 'row': row, 'column': column, 'occupied': entry is not None}
+            if entry:
+                known = location in graph
+                successors = (graph.successors(location) if known else []) + dangling.get(location, [])
+                predecessors = graph.predecessors(location) if known else []
+                cell.update({
+                    'icon': TYPE_ICONS.get(entry.get('type'), DEFAULT_ICON),
+                    'name': entry.get('name') or '(no name)',
+                    'type': entry.get('type') or 'task',
+                    'next': ', '.join(successors) or '-',
+                    'previous': ', '.join(predecessors) or '-',
+                })
+            else:
+                cell.update({'icon': '', 'name': 'Empty' if named else 'Empty - name the swimlane first',
+                             'type': '', 'next': '', 'previous': ''})
+            cells.append(cell)
+    return cells
+
+
+def _edges(graph, lanes):
+    row_of = {lane: row for row, lane in enumerate(lanes)}
+    edges = []
+    for i, source in enumerate(graph.locations):
+        source_lane, source_column = parse_location(source)
+        for k in range(graph.indptr[i], graph.indptr[i + 1]):
+            target = graph.locations[graph.indices[k]]
+            if target == source:
+                continue
+            target_lane, target_column = parse_location(target)
+            if source_lane not in row_of or target_lane not in row_of:
+                continue
+            x, y = source_column, row_of[source_lane]
+            x2, y2 = target_column, row_of[target_lane]
+            # Screen angle (y grows downwards) for the arrowhead, 0 = pointing right
+            angle = math.degrees(math.atan2((y2 - y) * CELL_HEIGHT, (x2 - x) * CELL_WIDTH))
+            edges.append({
+                'from': source, 'to': target, 'condition': graph.conditions[k] or '',
+                'x': x, 'y': y, 'x2': x2, 'y2': y2,
+                'ax': x + (x2 - x) * ARROW_POSITION, 'ay': y + (y2 - y) * ARROW_POSITION,
+                'angle': (angle + 90) % 360,  # triangle-up points up at angle 0
+            })
+    return edges
+
+
+def _build_spec(grid, graph, lanes, columns, swimlane_names):
+    labels = _lane_labels(lanes, swimlane_names)
+    x_scale = {'domain': [columns[0] - 0.5, columns[-1] + 0.5], 'nice': False, 'zero': False}
+    y_scale = {'domain': [len(lanes) - 0.5, -0.5], 'nice': False, 'zero': False}
+    x_axis = {'orient': 'top', 'values': list(columns), 'title': None, 'grid': False,
+              'labelFontWeight': 'bold', 'domain': False, 'ticks': False}
+    y_axis = {'values': list(range(len(lanes))), 'title': None, 'grid': False, 'domain': False,
+              'ticks': False, 'labelLimit': LABEL_WIDTH, 'labelFontWeight': 'bold',
+              'labelExpr': f"{json.dumps(labels)}[datum.value]"}
+    x = {'field': 'column', 'type': 'quantitative', 'scale': x_scale, 'axis': x_axis}
+    y = {'field': 'row', 'type': 'quantitative', 'scale': y_scale, 'axis': y_axis}
+    tooltip = [
+        {'field': 'location', 'title': 'Cell'},
+        {'field': 'name', 'title': 'Activity'},
+        {'field': 'type', 'title': 'Type'},
+        {'field': 'next', 'title': 'Connects to'},
+        {'field': 'previous', 'title': 'Fed by'},
+    ]
+
+    cells = {
+        'data': {'values': _cells(grid, graph, lanes, columns, swimlane_names)},
+        'params': [{'name': SELECTION, 'select': {'type': 'point', 'fields': ['location'], 'on': 'click'}}],
+        'mark': {'type': 'rect', 'cornerRadius': 4, 'stroke': 'white', 'strokeWidth': 3, 'cursor': 'pointer'},
+        'encoding': {
+            'x': {'field': 'x0', 'type': 'quantitative', 'scale': x_scale, 'axis': x_axis},
+            'x2': {'field': 'x1'},
+            'y': {'field': 'y0', 'type': 'quantitative', 'scale': y_scale, 'axis': y_axis},
+            'y2': {'field': 'y1'},
+            'color': {
+                'field': 'occupied', 'type': 'nominal', 'legend': None,
+                'scale': {'domain': [False, True], 'range': ['#f0f2f6', '#dbe7fb']},
+            },
+            'tooltip': tooltip,
+        },
+        'transform': [
+            {'calculate': 'datum.column - 0.5', 'as': 'x0'},
+            {'calculate': 'datum.column + 0.5', 'as': 'x1'},
+            {'calculate': 'datum.row - 0.5', 'as': 'y0'},
+            {'calculate': 'datum.row + 0.5', 'as': 'y1'},
+        ],
+    }
+    edges = _edges(graph, lanes)
+    layers = [cells]
+    if edges:
+        edge_tooltip = [{'field': 'from', 'title': 'From'}, {'field': 'to', 'title': 'To'},
+                        {'field': 'condition', 'title': 'Condition'}]
+        layers.append({
+            'data': {'values': edges},
+            'mark': {'type': 'rule', 'color': '#5b6b8c', 'strokeWidth': 1.5, 'opacity': 0.8},
+            'encoding': {
+                'x': {**x, 'field': 'x'}, 'y': {**y, 'field': 'y'},
+                'x2': {'field': 'x2'}, 'y2': {'field': 'y2'},
+                'tooltip': edge_tooltip,
+            },
+        })
+        layers.append({
+            'data': {'values': edges},
+            'mark': {'type': 'point', 'shape': 'triangle-up', 'filled': True, 'size': 70, 'color': '#5b6b8c'},
+            'encoding': {
+                'x': {**x, 'field': 'ax'}, 'y': {**y, 'field': 'ay'},
+                'angle': {'field': 'angle', 'type': 'quantitative', 'scale': None},
+                'tooltip': edge_tooltip,
+            },
+        })
+    layers.append({
+        'data': {'values': [cell for cell in cells['data']['values'] if cell['occupied']]},
+        'mark': {'type': 'text', 'fontSize': 18, 'cursor': 'pointer'},
+        'encoding': {'x': x, 'y': y, 'text': {'field': 'icon'}, 'tooltip': tooltip},
+    })
+    return {
+        'width': CELL_WIDTH * len(columns),
+        'height': CELL_HEIGHT * len(lanes),
+        'layer': layers,
+        'config': {'view': {'stroke': None}},
+    }
+
+
+def grid_chart_spec(grid, graph, lanes, columns, swimlane_names, selected=None):
+    """Vega-Lite spec of the grid; clicks come back in the ``cell`` selection.
+
+    ``grid`` and ``graph`` are the snapshot's grid dict and ProcessGraph.
+    ``selected`` (a location) is outlined. The cached spec is shared, so a
+    selection gets a shallow copy with one extra layer.
+    """
+    lanes, columns = list(lanes), list(columns)
+    key = layout_key(grid, lanes, columns, swimlane_names)
+    spec = _specs.get(key, None)
+    if spec is None:
+        spec = _build_spec(grid, graph, lanes, columns, swimlane_names)
+        _specs.set(key, spec)
+    lane, column = parse_location(selected)
+    if lane not in lanes or column not in columns:
+        return spec
+    row = lanes.index(lane)
+    highlight = {
+        'data': {'values': [{'x0': column - 0.5, 'x1': column + 0.5, 'y0': row - 0.5, 'y1': row + 0.5}]},
+        'mark': {'type': 'rect', 'filled': False, 'stroke': '#ff4b4b', 'strokeWidth': 3, 'cornerRadius': 4},
+        'encoding': {
+            'x': {'field': 'x0', 'type': 'quantitative', 'scale': spec['layer'][0]['encoding']['x']['scale']},
+            'x2': {'field': 'x1'},
+            'y': {'field': 'y0', 'type': 'quantitative', 'scale': spec['layer'][0]['encoding']['y']['scale']},
+            'y2': {'field': 'y1'},
+        },
+    }
+    return {**spec, 'layer': spec['layer'] + [highlight]}
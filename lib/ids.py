@@ -0,0 +1,133 @@
+"""Block-based id allocation from shared Snowflake sequences.
+
+Instead of ``SELECT COALESCE(MAX(id), 0) + 1`` before every insert, each
+server process fetches a block of ids from the table's sequence
+(``<table>_id_seq``) in one round trip and hands them out locally. Inserts
+then need no read round trip and bulk paths can reserve many ids in one
+go. Every other writer of these tables (the map/ app, the CI workflow)
+takes its ids from the same sequences, so no two writers can be given
+the same id - Snowflake does not enforce primary keys, so this matters.
+Unused ids in a block are simply skipped, so ids stay unique and
+increasing but may have gaps.
+
+map/scripts/create-id-sequences.sql creates the sequences; a process that
+finds one missing creates it past the table's current ids.
+
+The local SQLite backend has no sequences and a single writer, so there
+blocks come from the ``id_allocator`` counter table instead.
+"""
+import threading
+
+import streamlit as st
+
+from lib.db import SQLITE, dialect, write_transaction
+
+# Ids reserved per round trip
+ID_BLOCK_SIZE = 50
+
+# Tables whose ids come from the allocator (names are interpolated into SQL)
+ALLOCATED_TABLES = ('workflows', 'activities', 'test_input')
+
+ID_ALLOCATOR_DDL = """
+    CREATE TABLE IF NOT EXISTS id_allocator (
+        table_name VARCHAR(100) NOT NULL PRIMARY KEY,
+        next_id NUMBER(38, 0) NOT NULL
+    )
+"""
+
+
+def sequence_name(table):
+    """Snowflake sequence every writer of ``table`` takes its ids from."""
+    return f"{table}_id_seq"
+
+
+class IdAllocator:
+    """Hands out ids from in-process blocks reserved from the table's sequence."""
+
+    def __init__(self, block_size=ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self._blocks = {}  # table -> ids still available locally, smallest last
+        self._lock = threading.Lock()
+        self._sequences_ready = set()
+        self.blocks_reserved = 0
+
+    def _ensure_sequence(self, cursor, table):
+        """Create the table's sequence past its existing ids if it doesn't exist yet."""
+        if table in self._sequences_ready:
+            return
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+        start = int(cursor.fetchone()[0])
+        cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence_name(table)} START = {start} INCREMENT = 1 ORDER")
+        self._sequences_ready.add(table)
+
+    def _reserve_sequence_block(self, cursor, table, size):
+        self._ensure_sequence(cursor, table)
+        cursor.execute(
+            f"SELECT {sequence_name(table)}.NEXTVAL FROM TABLE(GENERATOR(ROWCOUNT => {int(size)}))"
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+    def _reserve_counter_block(self, cursor, table, size):
+        cursor.execute("""
+            UPDATE id_allocator SET next_id = next_id + %s WHERE table_name = %s
+        """, (size, table))
+        if cursor.rowcount == 0:
+            # First reservation for this table - seed the counter past existing rows
+            cursor.execute(f"""
+                INSERT INTO id_allocator (table_name, next_id)
+                SELECT %s, COALESCE(MAX(id), 0) + 1 + %s FROM {table}
+            """, (table, size))
+        cursor.execute("SELECT next_id FROM id_allocator WHERE table_name = %s", (table,))
+        end = cursor.fetchone()[0]
+        return list(range(end - size, end))
+
+    def _reserve_block(self, table, size):
+        """Claim ``size`` ids in a transaction of their own.
+
+        The block is claimed straight away so it stays claimed even if the
+        caller's insert later rolls back.
+        """
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+            if dialect() == SQLITE:
+                ids = self._reserve_counter_block(cursor, table, size)
+            else:
+                ids = self._reserve_sequence_block(cursor, table, size)
+            cursor.close()
+        self.blocks_reserved += 1
+        return ids[::-1]
+
+    def reserve(self, table, count):
+        """Return ``count`` unique ids for ``table``."""
+        if table not in ALLOCATED_TABLES:
+            raise ValueError(f"Table {table!r} does not use the id allocator")
+        ids = []
+        with self._lock:
+            while len(ids) < count:
+                block = self._blocks.get(table)
+                if not block:
+                    block = self._reserve_block(table, max(self.block_size, count - len(ids)))
+                    self._blocks[table] = block
+                take = min(count - len(ids), len(block))
+                ids.extend(block.pop() for _ in range(take))
+        return ids
+
+    def next_id(self, table):
+        """Return a single unique id for ``table``."""
+        return self.reserve(table, 1)[0]
+
+
+# One allocator per server process, shared by every page and session
+@st.cache_resource
+def get_id_allocator():
+    return IdAllocator()
+
+
+def next_id(table):
+    """Next id for ``table`` - usually served from memory with no round trip."""
+    return get_id_allocator().next_id(table)
+
+
+def reserve_ids(table, count):
+    """Reserve ``count`` ids for a bulk insert."""
+    return get_id_allocator().reserve(table, count)
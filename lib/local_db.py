@@ -0,0 +1,477 @@
+"""Embedded SQLite storage backend for local development, tests and demos.
+
+Selected with ``backend = "sqlite"`` under ``[storage]`` in the app secrets
+(or ``VOYAGE_STORAGE_BACKEND=sqlite``), the whole app runs against one
+database file with no network and no warehouse. The first connection
+creates the ``workflows``, ``activities``, ``swimlane_config``,
+``tshirt_config``, ``activity_audit_log`` and ``test_input`` tables and
+seeds the default t-shirt bands. The helper tables (``id_allocator``,
+``workflow_versions``, ``workflow_rollups``) are created at the same time
+from their modules' DDL.
+
+Connections look like Snowflake ones to the rest of lib/: cursors take
+pyformat parameters, have ``fetch_pandas_all`` and upper-case column names,
+and ``translate`` rewrites the Snowflake SQL the app uses that SQLite lacks
+(``CURRENT_TIMESTAMP()``, ``::`` casts, ``IFF``,
+``DATE_PART(epoch_nanosecond, ...)``). Snowflake functions are registered
+as Python functions. The few statements that can't be rewritten
+that way (MERGE, FLATTEN, GROUPING SETS) have SQLite versions next to the
+Snowflake ones, picked with ``lib.db.dialect()``.
+
+Timestamps are stored as UTC text (``YYYY-MM-DD HH:MM:SS[.ffffff]``), which
+sorts and compares correctly as text. Result columns named ``*_AT`` (and
+aggregates of them) come back as timezone-aware datetimes, as TIMESTAMP_LTZ
+columns do on Snowflake.
+"""
+import datetime
+import os
+import re
+import sqlite3
+import threading
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache
+
+import pandas as pd
+
+DEFAULT_PATH = 'voyage_local.db'
+
+# Wait this long for another connection's write lock before failing
+BUSY_TIMEOUT_SECONDS = 30
+
+# Snowflake cast types -> SQLite
+CAST_TYPES = {
+    'FLOAT': 'REAL',
+    'DOUBLE': 'REAL',
+    'NUMBER': 'INTEGER',
+    'INT': 'INTEGER',
+    'INTEGER': 'INTEGER',
+    'STRING': 'TEXT',
+    'VARCHAR': 'TEXT',
+    'TEXT': 'TEXT',
+}
+
+LOCAL_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS workflows (
+        id NUMBER(38, 0) NOT NULL PRIMARY KEY,
+        workflow_name VARCHAR NOT NULL,
+        description VARCHAR,
+        created_by VARCHAR,
+        created_at TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP,
+        modified_by VARCHAR,
+        modified_at TIMESTAMP_LTZ
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS activities (
+        id NUMBER(38, 0) NOT NULL PRIMARY KEY,
+        workflow_id NUMBER(38, 0) NOT NULL,
+        activity_name VARCHAR,
+        activity_type VARCHAR,
+        grid_location VARCHAR,
+        connections VARCHAR,
+        task_time_size VARCHAR,
+        task_time_midpoint NUMBER(10, 2),
+        task_time_custom NUMBER(10, 2),
+        labor_rate_size VARCHAR,
+        labor_rate_midpoint NUMBER(10, 2),
+        labor_rate_custom NUMBER(10, 2),
+        volume_size VARCHAR,
+        volume_midpoint NUMBER(12, 2),
+        volume_custom NUMBER(12, 2),
+        target_cycle_time_hours NUMBER(10, 2),
+        actual_cycle_time_hours NUMBER(10, 2),
+        disposition_complete_pct NUMBER(5, 2),
+        disposition_forwarded_pct NUMBER(5, 2),
+        disposition_pended_pct NUMBER(5, 2),
+        transformation_plan VARCHAR,
+        phase VARCHAR,
+        status VARCHAR,
+        cost_to_change NUMBER(14, 2),
+        projected_annual_savings NUMBER(14, 2),
+        process_steps VARCHAR,
+        systems_touched VARCHAR,
+        constraints_rules VARCHAR,
+        opportunities VARCHAR,
+        next_steps VARCHAR,
+        attachments VARCHAR,
+        comments VARCHAR,
+        data_confidence VARCHAR,
+        data_source VARCHAR,
+        created_by VARCHAR,
+        created_at TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP,
+        modified_by VARCHAR,
+        modified_at TIMESTAMP_LTZ
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS activities_workflow ON activities (workflow_id, grid_location)",
+    """
+    CREATE TABLE IF NOT EXISTS swimlane_config (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        workflow_id NUMBER(38, 0) NOT NULL,
+        swimlane_letter VARCHAR NOT NULL,
+        swimlane_name VARCHAR,
+        display_order NUMBER(38, 0),
+        created_at TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP,
+        modified_at TIMESTAMP_LTZ
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS swimlane_config_workflow ON swimlane_config (workflow_id, swimlane_letter)",
+    """
+    CREATE TABLE IF NOT EXISTS tshirt_config (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        engagement_id NUMBER(38, 0),
+        category VARCHAR NOT NULL,
+        size VARCHAR NOT NULL,
+        label VARCHAR,
+        min_value NUMBER(12, 2),
+        max_value NUMBER(12, 2),
+        midpoint NUMBER(12, 2),
+        unit VARCHAR
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS activity_audit_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        activity_id NUMBER(38, 0),
+        action VARCHAR NOT NULL,
+        field_changed VARCHAR,
+        old_value VARCHAR,
+        new_value VARCHAR,
+        changed_by VARCHAR,
+        changed_at TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS activity_audit_log_changed ON activity_audit_log (action, changed_at)",
+    """
+    CREATE TABLE IF NOT EXISTS test_input (
+        id NUMBER(38, 0) NOT NULL PRIMARY KEY,
+        user_text VARCHAR,
+        created_at TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+)
+
+# Default size bands (category, size, label, min, max, midpoint, unit) for a new database
+DEFAULT_TSHIRT_CONFIG = (
+    ('task_time', 'XS', '< 2 min', 0, 2, 1, 'minutes'),
+    ('task_time', 'S', '2-4 min', 2, 4, 3, 'minutes'),
+    ('task_time', 'M', '5-10 min', 5, 10, 7.5, 'minutes'),
+    ('task_time', 'L', '15-30 min', 15, 30, 22.5, 'minutes'),
+    ('task_time', 'XL', '30-60 min', 30, 60, 45, 'minutes'),
+    ('task_time', 'XXL', '1-2 hours', 60, 120, 90, 'minutes'),
+    ('labor_rate', 'L', '$20-30/hr', 20, 30, 25, 'dollars per hour'),
+    ('labor_rate', 'M', '$30-50/hr', 30, 50, 40, 'dollars per hour'),
+    ('labor_rate', 'H', '$50-70/hr', 50, 70, 60, 'dollars per hour'),
+    ('labor_rate', 'XH', '$70-100/hr', 70, 100, 85, 'dollars per hour'),
+    ('volume', 'XS', '< 50/month', 0, 50, 25, 'per month'),
+    ('volume', 'S', '50-100/month', 50, 100, 75, 'per month'),
+    ('volume', 'M', '100-500/month', 100, 500, 300, 'per month'),
+    ('volume', 'L', '500-1,000/month', 500, 1000, 750, 'per month'),
+    ('volume', 'XL', '1,000-3,000/month', 1000, 3000, 2000, 'per month'),
+    ('volume', 'XXL', '3,000+/month', 3000, 12000, 7500, 'per month'),
+)
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+_CAST = re.compile(r"([\w.]+)::(\w+)")
+_DEFAULT_NOW = re.compile(r"\bDEFAULT\s+CURRENT_TIMESTAMP\(\)", re.IGNORECASE)
+_NOW = re.compile(r"\bCURRENT_TIMESTAMP\(\)", re.IGNORECASE)
+_IFF = re.compile(r"\bIFF\(", re.IGNORECASE)
+_EPOCH_NS = re.compile(r"\bDATE_PART\(\s*epoch_nanosecond\s*,", re.IGNORECASE)
+# Result columns holding timestamps: created_at, MAX(changed_at), ...
+_STAMP_COLUMN = re.compile(r"_AT\b")
+
+
+def format_timestamp(value):
+    """A datetime as the UTC text stored in timestamp columns."""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value.isoformat(sep=' ')
+
+
+def parse_timestamp(value):
+    """Stored timestamp text back to an aware UTC datetime (other values pass through)."""
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
+
+sqlite3.register_adapter(datetime.datetime, format_timestamp)
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(Decimal, float)
+
+
+@lru_cache(maxsize=512)
+def _translate_sql(sql):
+    sql = _DEFAULT_NOW.sub("DEFAULT CURRENT_TIMESTAMP", sql)
+    sql = _NOW.sub("NOW_UTC()", sql)
+    sql = _EPOCH_NS.sub("EPOCH_NS(", sql)
+    sql = _CAST.sub(lambda m: f"CAST({m.group(1)} AS {CAST_TYPES.get(m.group(2).upper(), m.group(2))})", sql)
+    return _IFF.sub("IIF(", sql)
+
+
+def translate(sql, params=None):
+    """(SQLite statement, parameters) for a Snowflake statement with pyformat parameters."""
+    sql = _translate_sql(sql)
+    if params is None:
+        return sql, ()
+    if isinstance(params, dict):
+        return _PLACEHOLDER.sub(lambda m: f":{m.group(1)}" if m.group(1) else '%', sql), params
+    return _PLACEHOLDER.sub(lambda m: '%' if m.group(0) == '%%' else '?', sql), tuple(params)
+
+
+# Snowflake functions used by lib/ SQL, as SQLite user functions
+
+def _equal_null(a, b):
+    return a == b or (a is None and b is None)
+
+
+def _try_to_number(value, *args):
+    # TRY_TO_NUMBER with the default scale of 0: rounds half up, NULL if not a number
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(Decimal(str(value).strip()).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _to_varchar(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _regex_flags(parameters):
+    flags = 0
+    for flag in parameters or 'c':
+        if flag == 'i':
+            flags |= re.IGNORECASE
+        elif flag == 'c':
+            flags &= ~re.IGNORECASE
+        elif flag == 'm':
+            flags |= re.MULTILINE
+        elif flag == 's':
+            flags |= re.DOTALL
+    return flags
+
+
+def _regexp_like(subject, pattern, parameters='c'):
+    # Snowflake matches the whole subject
+    if subject is None or pattern is None:
+        return None
+    return re.fullmatch(pattern, subject, _regex_flags(parameters)) is not None
+
+
+def _regexp_substr(subject, pattern, position=1, occurrence=1, parameters='c', group=None):
+    if subject is None or pattern is None:
+        return None
+    matches = re.finditer(pattern, subject[position - 1:], _regex_flags(parameters))
+    for i, match in enumerate(matches, 1):
+        if i == occurrence:
+            if group is None:
+                group = 1 if 'e' in (parameters or '') else 0
+            return match.group(group)
+    return None
+
+
+def _now_utc():
+    return format_timestamp(datetime.datetime.now(datetime.timezone.utc))
+
+
+def _epoch_ns(value):
+    # Integer nanoseconds since the epoch for stored timestamp text, exact to the microsecond
+    value = parse_timestamp(value)
+    if not isinstance(value, datetime.datetime):
+        return None
+    since_epoch = value - datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    return since_epoch // datetime.timedelta(microseconds=1) * 1000
+
+
+FUNCTIONS = (
+    ('EQUAL_NULL', 2, _equal_null, True),
+    ('TRY_TO_NUMBER', -1, _try_to_number, True),
+    ('TO_VARCHAR', 1, _to_varchar, True),
+    ('REGEXP_LIKE', -1, _regexp_like, True),
+    ('REGEXP_SUBSTR', -1, _regexp_substr, True),
+    ('NOW_UTC', 0, _now_utc, False),
+    ('EPOCH_NS', 1, _epoch_ns, True),
+)
+
+
+class LocalCursor:
+    """Cursor with the parts of the Snowflake cursor API lib/ uses.
+
+    A statement's rows are fetched as soon as it runs, under the
+    connection's lock, so threads sharing the read connection never
+    interleave on one SQLite statement.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._rows = []
+        self._next = 0
+        self.description = None
+        self.rowcount = -1
+
+    def execute(self, sql, params=None):
+        statement, params = translate(sql, params)
+        with self._connection.lock:
+            cursor = self._connection.raw.execute(statement, params)
+            rows = cursor.fetchall() if cursor.description else []
+            description = cursor.description
+            rowcount = cursor.rowcount
+            cursor.close()
+        if description:
+            self.description = [(column[0].upper(),) + tuple(column[1:]) for column in description]
+            stamps = [i for i, column in enumerate(self.description) if _STAMP_COLUMN.search(column[0])]
+            if stamps and rows:
+                rows = [list(row) for row in rows]
+                for row in rows:
+                    for i in stamps:
+                        row[i] = parse_timestamp(row[i])
+                rows = [tuple(row) for row in rows]
+            self.rowcount = len(rows)
+        else:
+            self.description = None
+            self.rowcount = rowcount
+        self._rows, self._next = rows, 0
+        return self
+
+    def fetchone(self):
+        if self._next >= len(self._rows):
+            return None
+        self._next += 1
+        return self._rows[self._next - 1]
+
+    def fetchmany(self, size=1):
+        rows = self._rows[self._next:self._next + size]
+        self._next += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._next:]
+        self._next = len(self._rows)
+        return rows
+
+    def fetch_pandas_all(self):
+        """Remaining rows as a DataFrame with upper-case column names."""
+        columns = [column[0] for column in self.description or []]
+        return pd.DataFrame.from_records(self.fetchall(), columns=columns, coerce_float=True)
+
+    def close(self):
+        self._rows = []
+
+
+class LocalConnection:
+    """SQLite connection shaped like a Snowflake one (``cursor``, ``is_closed``, ...).
+
+    ``autocommit=False`` connections take the write lock when their first
+    write runs (BEGIN IMMEDIATE) and hold it until commit or rollback.
+    """
+
+    def __init__(self, path, autocommit=True):
+        uri = path.startswith('file:')
+        self.raw = sqlite3.connect(
+            path, uri=uri, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False,
+            isolation_level=None if autocommit else 'IMMEDIATE',
+        )
+        for name, args, func, deterministic in FUNCTIONS:
+            self.raw.create_function(name, args, func, deterministic=deterministic)
+        self.lock = threading.RLock()
+        self._closed = False
+
+    def cursor(self):
+        return LocalCursor(self)
+
+    def commit(self):
+        with self.lock:
+            self.raw.commit()
+
+    def rollback(self):
+        with self.lock:
+            self.raw.rollback()
+
+    def close(self):
+        with self.lock:
+            self.raw.close()
+            self._closed = True
+
+    def is_closed(self):
+        return self._closed
+
+
+def _helper_tables():
+    # Created up front: SQLite has one writer, so their modules' first-use DDL
+    # would wait on the write transaction that triggered it
+    from lib.ids import ID_ALLOCATOR_DDL
+    from lib.rollups import WORKFLOW_ROLLUPS_DDL
+    from lib.versions import WORKFLOW_VERSIONS_DDL
+    return (ID_ALLOCATOR_DDL, WORKFLOW_VERSIONS_DDL, WORKFLOW_ROLLUPS_DDL)
+
+
+class SQLiteBackend:
+    """Storage in one local SQLite file (``:memory:`` for a throwaway shared database)."""
+
+    name = 'sqlite'
+
+    def __init__(self, path=DEFAULT_PATH):
+        if path == ':memory:':
+            # Shared cache so the pool and the read connection see one database;
+            # kept alive by the connection held below
+            path = 'file:voyage_local?mode=memory&cache=shared'
+        self.path = path
+        self._lock = threading.Lock()
+        self._keepalive = None
+        self.bootstrapped = False
+
+    def describe(self):
+        return f"SQLite ({self.path})"
+
+    def connect(self, autocommit=True, **overrides):
+        """Open a connection, creating the schema on first use."""
+        self.bootstrap()
+        return LocalConnection(self.path, autocommit=autocommit)
+
+    def bootstrap(self):
+        """Create missing tables and seed the t-shirt bands into an empty config."""
+        with self._lock:
+            if self.bootstrapped:
+                return
+            if not self.path.startswith('file:'):
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+            conn = LocalConnection(self.path)
+            if not self.path.startswith('file:'):
+                # Readers don't block the writer (and vice versa)
+                conn.raw.execute("PRAGMA journal_mode = WAL")
+            cursor = conn.cursor()
+            for statement in LOCAL_SCHEMA + _helper_tables():
+                cursor.execute(statement)
+            cursor.execute("SELECT COUNT(*) FROM tshirt_config")
+            if cursor.fetchone()[0] == 0:
+                cursor.execute("BEGIN")
+                for row in DEFAULT_TSHIRT_CONFIG:
+                    cursor.execute("""
+                        INSERT INTO tshirt_config (category, size, label, min_value, max_value, midpoint, unit)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """, row)
+                cursor.execute("COMMIT")
+            cursor.close()
+            if self.path.startswith('file:'):
+                self._keepalive = conn
+            else:
+                conn.close()
+            self.bootstrapped = True
+
+    def is_connection_error(self, exc):
+        # A local file doesn't drop sessions; every error is about the statement
+        return False
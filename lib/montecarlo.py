@@ -0,0 +1,182 @@
+"""Monte Carlo cost ranges from t-shirt size bands.
+
+Costing a card from midpoints gives one number with false precision. Here
+each cost input is drawn from a triangular distribution instead: between
+the size's ``min_value`` and ``max_value`` with the card's midpoint as the
+mode, or, for custom values, a band around the value whose width depends
+on ``data_confidence``.
+
+The simulation stays vectorized and cheap at 100k draws:
+
+* Monthly cost is ``task_time * labor_rate * volume / (60 * productivity)``,
+  and every band is a scaled copy of a standard shape. Each distinct shape
+  is drawn once, cards with the same three shapes share the product of
+  those draws, and a card's percentiles are that pool's percentiles times
+  the card's scale.
+* Swimlane and workflow totals need joint draws. Each card adds its scaled
+  pool to the total starting at its own random offset (a circular shift).
+  Shifted copies of one pool are not independent draws: they reuse the
+  same values, so cards sharing a pool are only approximately independent
+  in the sum. For totals of many cards over 100k draws the approximation is
+  close enough for P10/P50/P90 of a sum, but the joint draws shouldn't be
+  read as independent samples for anything else.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from lib.costs import CONFIG, effective_value
+
+# Draws per simulation
+MC_DRAWS = 100_000
+
+PERCENTILES = (10, 50, 90)
+
+# Per-card percentiles read this many draws of the card's pool. Three
+# quantiles are already stable to a fraction of a percent at this size, and
+# selecting them is the slowest step when a workflow has hundreds of
+# distinct size combinations. Swimlane and workflow totals use every draw.
+CARD_PERCENTILE_DRAWS = 25_000
+
+# Half-width of the band around a custom value, as a fraction of the value
+CONFIDENCE_SPREAD = {
+    'confirmed': 0.05,
+    'partial': 0.15,
+    'estimate': 0.30,
+}
+DEFAULT_SPREAD = 0.30  # No confidence recorded
+
+_LANE_PATTERN = re.compile(r'^([A-Z]+)\d')
+
+
+def size_bands(tshirt_config):
+    """(category, size) -> (min_value, max_value) for sizes with both bounds."""
+    bands = {}
+    for category, sizes in tshirt_config.items():
+        for item in sizes:
+            if item.get('min_value') is not None and item.get('max_value') is not None:
+                bands[(category, item['size'])] = (float(item['min_value']), float(item['max_value']))
+    return bands
+
+
+def input_band(activity, name, bands):
+    """((low, mode, high), scale) for one cost input, or None if it has no value.
+
+    Size bands are absolute (scale 1). Custom values use a relative band
+    around 1 scaled by the value, so every card with the same confidence
+    shares a shape.
+    """
+    value = effective_value(activity, name)
+    if not value:
+        return None
+    size = activity.get(f'{name}_size')
+    band = bands.get((name, size)) if size and size != 'Other' else None
+    if band:
+        low, high = band
+        return (min(low, value), value, max(high, value)), 1.0
+    spread = CONFIDENCE_SPREAD.get(activity.get('data_confidence'), DEFAULT_SPREAD)
+    return (1.0 - spread, 1.0, 1.0 + spread), value
+
+
+def _triangular(rng, low, mode, high, draws):
+    # Inverse CDF; unlike Generator.triangular this allows low == high
+    if high <= low:
+        return np.full(draws, low)
+    u = rng.random(draws)
+    c = (mode - low) / (high - low)
+    x = np.where(u < c, np.sqrt(u * c), 1.0 - np.sqrt((1.0 - u) * (1.0 - c)))
+    return low + (high - low) * x
+
+
+def _percentile_columns(prefix, values):
+    # values: (len(PERCENTILES), n) -> {'monthly_p10': [...], ...}
+    return {f'{prefix}_p{p}': values[i] for i, p in enumerate(PERCENTILES)}
+
+
+def simulate_costs(activities, tshirt_config, draws=MC_DRAWS, seed=0):
+    """P10/P50/P90 monthly and annual cost per activity, swimlane and workflow.
+
+    Returns a dict with ``activities`` and ``swimlanes`` DataFrames, a
+    ``workflow`` dict of percentiles and the number of ``draws``. Cards
+    missing a cost input are left out, as in the deterministic costing.
+    """
+    rng = np.random.default_rng(seed)
+    bands = size_bands(tshirt_config)
+    factor = 1.0 / (60.0 * CONFIG["productivity_factor"])
+    months = CONFIG["work_months_per_year"]
+
+    # Describe each costed card as (pool key, scale, swimlane)
+    cards = []
+    for activity in activities:
+        inputs = [input_band(activity, name, bands) for name in ('task_time', 'labor_rate', 'volume')]
+        if None in inputs or effective_value(activity, 'task_time') <= 0:
+            continue
+        key = tuple(shape for shape, _ in inputs)
+        scale = factor * inputs[0][1] * inputs[1][1] * inputs[2][1]
+        match = _LANE_PATTERN.match((activity.get('grid_location') or '').upper())
+        cards.append((activity, key, scale, match.group(1) if match else None))
+
+    # Draws per distinct input shape, then one product pool (and its percentiles) per shape triple
+    shape_draws = {}
+    pools = {}
+    pool_percentiles = {}
+    for _, key, _, _ in cards:
+        if key in pools:
+            continue
+        factors = []
+        for category, shape in zip(('task_time', 'labor_rate', 'volume'), key):
+            # Keyed by category too, so the three factors of a pool are always independent draws
+            if (category, shape) not in shape_draws:
+                shape_draws[(category, shape)] = _triangular(rng, *shape, draws)
+            factors.append(shape_draws[(category, shape)])
+        pool = factors[0] * factors[1]
+        pool *= factors[2]
+        pools[key] = pool
+        pool_percentiles[key] = np.percentile(pool[:CARD_PERCENTILE_DRAWS], PERCENTILES)
+
+    # Joint draws per swimlane: each card adds its pool circularly shifted by its own offset
+    lanes = sorted({lane for *_, lane in cards}, key=lambda lane: (lane is None, lane or ''))
+    lane_index = {lane: i for i, lane in enumerate(lanes)}
+    totals = np.zeros((len(lanes), draws))
+    offsets = rng.integers(0, draws, size=len(cards))
+    scratch = np.empty(draws)
+    for (_, key, scale, lane), offset in zip(cards, offsets):
+        row = totals[lane_index[lane]]
+        np.multiply(pools[key], scale, out=scratch)
+        row[:draws - offset] += scratch[offset:]
+        row[draws - offset:] += scratch[:offset]
+
+    card_monthly = np.array(
+        [pool_percentiles[key] * scale for _, key, scale, _ in cards]
+    ).reshape(len(cards), len(PERCENTILES)).T
+    activity_frame = pd.DataFrame({
+        'id': [activity['id'] for activity, *_ in cards],
+        'grid_location': [activity.get('grid_location') for activity, *_ in cards],
+        'swimlane': [lane for *_, lane in cards],
+        **_percentile_columns('monthly', card_monthly),
+        **_percentile_columns('annual', card_monthly * months),
+    })
+
+    lane_monthly = np.percentile(totals, PERCENTILES, axis=1) if lanes else np.zeros((len(PERCENTILES), 0))
+    lane_counts = Counter(lane for *_, lane in cards)
+    swimlane_frame = pd.DataFrame({
+        'swimlane': lanes,
+        'activities': [lane_counts[lane] for lane in lanes],
+        **_percentile_columns('monthly', lane_monthly),
+        **_percentile_columns('annual', lane_monthly * months),
+    })
+
+    workflow_monthly = np.percentile(totals.sum(axis=0), PERCENTILES)
+    workflow = {'activities': len(cards)}
+    for i, p in enumerate(PERCENTILES):
+        workflow[f'monthly_p{p}'] = float(workflow_monthly[i])
+        workflow[f'annual_p{p}'] = float(workflow_monthly[i] * months)
+
+    return {
+        'activities': activity_frame,
+        'swimlanes': swimlane_frame,
+        'workflow': workflow,
+        'draws': draws,
+    }
@@ -0,0 +1,120 @@
+"""Cross-workflow aggregates for the Portfolio page.
+
+Snowflake does the aggregation: one grouped query returns a row per
+(workflow, phase, status, confidence) combination with counts and cost
+sums, using the same SQL cost expression as the rollups. That result has
+at most a few thousand rows however many activities there are, and the
+per-workflow, per-phase and mix views are pivots of it in pandas. It is
+cached on the all-workflows version stamp, so any write anywhere refreshes
+it on the next read and nothing else does.
+"""
+import pandas as pd
+
+from lib.cache import keyed_cache
+from lib.costs import SQL_ANNUAL_COST, SQL_MONTHLY_COST
+from lib.db import get_read_cursor
+from lib.versions import ALL_WORKFLOWS, workflow_version
+
+STATUSES = ('not_started', 'analyzing', 'in_progress', 'transformed', 'deferred')
+CONFIDENCES = ('confirmed', 'partial', 'estimate')
+
+# Label for cards with no status / confidence / phase recorded
+UNSET = 'unset'
+
+FACT_COLUMNS = ('workflow_id', 'workflow_name', 'phase', 'status', 'data_confidence',
+                'activities', 'costed', 'monthly_cost', 'annual_cost',
+                'projected_annual_savings', 'cost_to_change')
+
+SUM_COLUMNS = ('activities', 'costed', 'monthly_cost', 'annual_cost',
+               'projected_annual_savings', 'cost_to_change')
+
+PORTFOLIO_QUERY = f"""
+    SELECT w.id, w.workflow_name, a.phase, a.status, a.data_confidence,
+           COUNT(a.id),
+           COUNT(a.monthly_cost),
+           COALESCE(SUM(a.monthly_cost), 0),
+           COALESCE(SUM(a.annual_cost), 0),
+           COALESCE(SUM(a.projected_annual_savings::FLOAT), 0),
+           COALESCE(SUM(a.cost_to_change::FLOAT), 0)
+    FROM workflows w
+    LEFT JOIN (
+        SELECT a.id, a.workflow_id, a.phase, a.status, a.data_confidence,
+               a.projected_annual_savings, a.cost_to_change,
+               {SQL_MONTHLY_COST.format(a='a.')} AS monthly_cost,
+               {SQL_ANNUAL_COST.format(a='a.')} AS annual_cost
+        FROM activities a
+    ) a ON a.workflow_id = w.id
+    GROUP BY w.id, w.workflow_name, a.phase, a.status, a.data_confidence
+"""
+
+
+# One grouped query over every workflow - cached per all-workflows version, 30 min safety TTL
+@keyed_cache(ttl=1800, max_entries=4)
+def _load_portfolio(version):
+    cursor = get_read_cursor()
+    cursor.execute(PORTFOLIO_QUERY)
+    rows = cursor.fetchall()
+    cursor.close()
+    facts = pd.DataFrame(rows, columns=list(FACT_COLUMNS))
+    for column in SUM_COLUMNS:
+        facts[column] = pd.to_numeric(facts[column]).astype(float)
+    for column in ('status', 'data_confidence'):
+        facts[column] = facts[column].replace('', None).fillna(UNSET)
+    return facts
+
+
+def load_portfolio():
+    """Aggregated activity facts: one row per (workflow, phase, status, confidence).
+
+    Workflows without activities appear once with zero counts. Shared
+    between sessions - copy before modifying.
+    """
+    return _load_portfolio(workflow_version(ALL_WORKFLOWS))
+
+
+def portfolio_totals(facts):
+    totals = {column: float(facts[column].sum()) for column in SUM_COLUMNS}
+    totals['workflows'] = int(facts['workflow_id'].nunique())
+    return totals
+
+
+def _mix(facts, column, values, prefix):
+    # Activity counts per value of ``column`` as {prefix}_{value} columns, in a fixed order
+    mix = facts[facts['activities'] > 0].pivot_table(
+        index='workflow_id', columns=column, values='activities', aggfunc='sum', fill_value=0
+    )
+    ordered = list(values) + [UNSET] + sorted(set(mix.columns) - set(values) - {UNSET})
+    mix = mix.reindex(columns=ordered, fill_value=0)
+    mix.columns = [f'{prefix}_{value}' for value in mix.columns]
+    return mix
+
+
+def by_workflow(facts):
+    """Per workflow: totals, net savings, % costed and status / confidence counts."""
+    grouped = facts.groupby(['workflow_id', 'workflow_name'], sort=False)[list(SUM_COLUMNS)].sum()
+    grouped = grouped.reset_index().set_index('workflow_id')
+    grouped['costed_pct'] = (grouped['costed'] / grouped['activities'].where(grouped['activities'] > 0)).fillna(0)
+    grouped['net_first_year'] = grouped['projected_annual_savings'] - grouped['cost_to_change']
+    grouped = grouped.join(_mix(facts, 'status', STATUSES, 'status'))
+    grouped = grouped.join(_mix(facts, 'data_confidence', CONFIDENCES, 'confidence'))
+    mix_columns = [c for c in grouped.columns if c.startswith(('status_', 'confidence_'))]
+    grouped[mix_columns] = grouped[mix_columns].fillna(0).astype(int)
+    return grouped.reset_index().sort_values('annual_cost', ascending=False, kind='stable')
+
+
+def by_phase(facts):
+    """Per transformation phase (unphased cards last): totals and workflows involved."""
+    with_cards = facts[facts['activities'] > 0]
+    grouped = with_cards.groupby('phase', dropna=False, sort=True).agg(
+        workflows=('workflow_id', 'nunique'),
+        **{column: (column, 'sum') for column in SUM_COLUMNS},
+    ).reset_index()
+    grouped['phase'] = [UNSET if pd.isna(phase) else str(int(phase)) for phase in grouped['phase']]
+    return grouped
+
+
+def status_mix(facts):
+    """Activity count per status across the portfolio (STATUSES order, then the rest)."""
+    counts = facts[facts['activities'] > 0].groupby('status')['activities'].sum()
+    ordered = [s for s in STATUSES if s in counts.index] + sorted(set(counts.index) - set(STATUSES))
+    return counts.reindex(ordered).astype(int)
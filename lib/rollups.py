@@ -0,0 +1,335 @@
+"""Materialized per-workflow and per-swimlane rollups.
+
+``workflow_rollups`` holds, for every workflow, one row per swimlane plus a
+``'*'`` row for the whole workflow. Each row has the activity count, the
+number of costed activities, monthly and annual cost, projected annual
+savings and cost to change. Writes keep the table current in their own
+transaction: ``apply_activity_rollup`` subtracts a card's contribution
+before the card changes and adds it back afterwards, computed server-side
+from the row itself. Reading a workflow's totals is then a primary-key
+lookup instead of a scan over its activities.
+
+A workflow only gets incremental updates once it has a ``'*'`` row.
+``create_workflow`` adds that row for new workflows; for existing ones
+``rebuild_rollups`` (scripts/rebuild_rollups.py, or the button on the
+Snowflake Test page) builds it, recomputing everything from scratch and
+checking the result against the Python cost engine. Readers never write:
+``load_rollup`` returns no total for a workflow that has not been built.
+
+The map/ app writes activities without touching the rollup, so its edits
+leave the totals drifting until they are reconciled: run
+``scripts/rebuild_rollups.py --reconcile`` on a schedule to rebuild just
+the workflows whose rows no longer match their activities.
+
+The table itself is created by map/scripts/create-cache-tables.sql (and
+by the rebuild command), not on first use.
+"""
+import json
+
+import pandas as pd
+
+from lib.cache import keyed_cache
+from lib.costs import SQL_ANNUAL_COST, SQL_MONTHLY_COST, compute_costs, swimlane_column
+from lib.db import SNOWFLAKE, SQLITE, dialect, get_read_cursor, write_transaction
+from lib.grid import SQL_LANE
+from lib.versions import bump_versions, workflow_version
+
+WORKFLOW_TOTAL = '*'
+
+ROLLUP_FIELDS = ('activity_count', 'costed_count', 'monthly_cost', 'annual_cost',
+                 'projected_annual_savings', 'cost_to_change')
+
+# Cost differences smaller than this (in dollars) are float noise, not drift
+VERIFY_TOLERANCE = 0.01
+
+WORKFLOW_ROLLUPS_DDL = """
+    CREATE TABLE IF NOT EXISTS workflow_rollups (
+        workflow_id NUMBER(38, 0) NOT NULL,
+        swimlane VARCHAR NOT NULL,
+        activity_count NUMBER(38, 0) NOT NULL DEFAULT 0,
+        costed_count NUMBER(38, 0) NOT NULL DEFAULT 0,
+        monthly_cost FLOAT NOT NULL DEFAULT 0,
+        annual_cost FLOAT NOT NULL DEFAULT 0,
+        projected_annual_savings FLOAT NOT NULL DEFAULT 0,
+        cost_to_change FLOAT NOT NULL DEFAULT 0,
+        modified_at TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP(),
+        PRIMARY KEY (workflow_id, swimlane)
+    )
+"""
+
+# Each selected activity's lane and cost fields
+_CONTRIBUTION_ROWS = f"""
+    SELECT a.workflow_id, {SQL_LANE.format(a='a.')} AS lane,
+           {SQL_MONTHLY_COST.format(a='a.')} AS monthly_cost,
+           {SQL_ANNUAL_COST.format(a='a.')} AS annual_cost,
+           a.projected_annual_savings::FLOAT AS projected_annual_savings,
+           a.cost_to_change::FLOAT AS cost_to_change
+    FROM activities a
+    WHERE {{where}}
+"""
+
+_CONTRIBUTION_SUMS = """
+           %(sign)s * COUNT(*) AS activity_count,
+           %(sign)s * COUNT(monthly_cost) AS costed_count,
+           %(sign)s * COALESCE(SUM(monthly_cost), 0) AS monthly_cost,
+           %(sign)s * COALESCE(SUM(annual_cost), 0) AS annual_cost,
+           %(sign)s * COALESCE(SUM(projected_annual_savings), 0) AS projected_annual_savings,
+           %(sign)s * COALESCE(SUM(cost_to_change), 0) AS cost_to_change
+"""
+
+# Contribution of the selected activities, per lane and per workflow, times %(sign)s.
+# SQLite has no GROUPING SETS, so it adds the two groupings up with UNION ALL.
+_CONTRIBUTION = {
+    SNOWFLAKE: f"""
+        SELECT workflow_id,
+               IFF(GROUPING(lane) = 1, '{WORKFLOW_TOTAL}', lane) AS swimlane,
+               {_CONTRIBUTION_SUMS}
+        FROM ({_CONTRIBUTION_ROWS})
+        GROUP BY GROUPING SETS ((workflow_id, lane), (workflow_id))
+        HAVING GROUPING(lane) = 1 OR lane IS NOT NULL
+    """,
+    SQLITE: f"""
+        SELECT workflow_id, lane AS swimlane, {_CONTRIBUTION_SUMS}
+        FROM ({_CONTRIBUTION_ROWS})
+        WHERE lane IS NOT NULL
+        GROUP BY workflow_id, lane
+        UNION ALL
+        SELECT workflow_id, '{WORKFLOW_TOTAL}' AS swimlane, {_CONTRIBUTION_SUMS}
+        FROM ({_CONTRIBUTION_ROWS})
+        GROUP BY workflow_id
+    """,
+}
+
+# The ids in the JSON array bound as %(ids)s, one row each in column id
+_ID_LIST = {
+    SNOWFLAKE: "SELECT value::NUMBER AS id FROM TABLE(FLATTEN(input => PARSE_JSON(%(ids)s)))",
+    SQLITE: "SELECT value AS id FROM json_each(%(ids)s)",
+}
+
+def apply_activity_rollup(cursor, workflow_id, activity_ids, sign):
+    """Add (sign=1) or subtract (sign=-1) the activities' contribution, in the caller's transaction.
+
+    Call with -1 before an UPDATE or DELETE and with 1 after an INSERT or
+    UPDATE; moving a card between swimlanes then moves its cost with it.
+    Workflows whose rollup has not been built yet are left alone, and lane
+    rows that drop to no activities are removed.
+    """
+    if not activity_ids:
+        return
+    where = f"a.workflow_id = %(workflow_id)s AND a.id IN ({_ID_LIST[dialect()]})"
+    params = {'workflow_id': workflow_id, 'ids': json.dumps([int(i) for i in activity_ids]), 'sign': sign}
+    if dialect() == SQLITE:
+        # No MERGE: upsert the contribution, then drop lanes it emptied
+        cursor.execute(f"""
+            INSERT INTO workflow_rollups (workflow_id, swimlane, {', '.join(ROLLUP_FIELDS)})
+            SELECT c.* FROM ({_CONTRIBUTION[SQLITE].format(where=where)}) c
+            WHERE EXISTS (
+                SELECT 1 FROM workflow_rollups r
+                WHERE r.workflow_id = c.workflow_id AND r.swimlane = '{WORKFLOW_TOTAL}'
+            )
+            ON CONFLICT (workflow_id, swimlane) DO UPDATE SET
+                {', '.join(f'{field} = {field} + excluded.{field}' for field in ROLLUP_FIELDS)},
+                modified_at = CURRENT_TIMESTAMP()
+        """, params)
+        cursor.execute(f"""
+            DELETE FROM workflow_rollups
+            WHERE workflow_id = %(workflow_id)s AND swimlane <> '{WORKFLOW_TOTAL}' AND activity_count <= 0
+        """, params)
+        return
+    cursor.execute(f"""
+        MERGE INTO workflow_rollups t
+        USING (
+            SELECT c.* FROM ({_CONTRIBUTION[SNOWFLAKE].format(where=where)}) c
+            WHERE EXISTS (
+                SELECT 1 FROM workflow_rollups r
+                WHERE r.workflow_id = c.workflow_id AND r.swimlane = '{WORKFLOW_TOTAL}'
+            )
+        ) s
+        ON t.workflow_id = s.workflow_id AND t.swimlane = s.swimlane
+        WHEN MATCHED AND t.swimlane <> '{WORKFLOW_TOTAL}' AND t.activity_count + s.activity_count <= 0 THEN DELETE
+        WHEN MATCHED THEN UPDATE SET
+            activity_count = t.activity_count + s.activity_count,
+            costed_count = t.costed_count + s.costed_count,
+            monthly_cost = t.monthly_cost + s.monthly_cost,
+            annual_cost = t.annual_cost + s.annual_cost,
+            projected_annual_savings = t.projected_annual_savings + s.projected_annual_savings,
+            cost_to_change = t.cost_to_change + s.cost_to_change,
+            modified_at = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED AND s.activity_count > 0 THEN INSERT
+            (workflow_id, swimlane, {', '.join(ROLLUP_FIELDS)})
+            VALUES (s.workflow_id, s.swimlane, {', '.join(f's.{field}' for field in ROLLUP_FIELDS)})
+    """, params)
+
+
+def start_rollup(cursor, workflow_id):
+    """Give a new workflow its (zero) total row, in the caller's transaction, so writes maintain it."""
+    cursor.execute(f"""
+        INSERT INTO workflow_rollups (workflow_id, swimlane) VALUES (%s, '{WORKFLOW_TOTAL}')
+    """, (workflow_id,))
+
+
+def _workflow_ids(cursor, workflow_id):
+    if workflow_id is not None:
+        return [workflow_id]
+    cursor.execute("SELECT id FROM workflows ORDER BY id")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _rebuild(cursor, workflow_ids):
+    params = {'ids': json.dumps([int(i) for i in workflow_ids]), 'sign': 1}
+    in_scope = f"IN ({_ID_LIST[dialect()]})"
+    cursor.execute(f"DELETE FROM workflow_rollups WHERE workflow_id {in_scope}", params)
+    cursor.execute(f"""
+        INSERT INTO workflow_rollups (workflow_id, swimlane, {', '.join(ROLLUP_FIELDS)})
+        {_CONTRIBUTION[dialect()].format(where=f'a.workflow_id {in_scope}')}
+    """, params)
+    rows = cursor.rowcount
+    # Workflows without activities still get a (zero) total row, so they are updated from now on
+    cursor.execute(f"""
+        INSERT INTO workflow_rollups (workflow_id, swimlane)
+        SELECT f.id, '{WORKFLOW_TOTAL}' FROM ({_ID_LIST[dialect()]}) f
+        WHERE NOT EXISTS (
+            SELECT 1 FROM workflow_rollups r
+            WHERE r.workflow_id = f.id AND r.swimlane = '{WORKFLOW_TOTAL}'
+        )
+    """, params)
+    return rows + cursor.rowcount
+
+
+def rebuild_rollups(workflow_id=None, verify=True):
+    """Recompute the rollups of one workflow (or all of them) from the activities table.
+
+    Runs in one transaction and bumps the affected workflows' versions. With
+    ``verify`` the stored rows are then compared against compute_costs.
+    Returns {'workflows', 'rows', 'mismatches'}.
+    """
+    # DDL commits on Snowflake, so the table is created in a transaction of its own
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(WORKFLOW_ROLLUPS_DDL)
+        cursor.close()
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        workflow_ids = _workflow_ids(cursor, workflow_id)
+        rows = _rebuild(cursor, workflow_ids) if workflow_ids else 0
+        bump_versions(cursor, workflow_ids)
+        cursor.close()
+    report = {'workflows': len(workflow_ids), 'rows': rows, 'mismatches': []}
+    if verify:
+        report['mismatches'] = verify_rollups(workflow_id)
+    return report
+
+
+def _stored_rollups(cursor, workflow_id):
+    query = f"SELECT workflow_id, swimlane, {', '.join(ROLLUP_FIELDS)} FROM workflow_rollups"
+    if workflow_id is None:
+        cursor.execute(query)
+    else:
+        cursor.execute(query + " WHERE workflow_id = %s", (workflow_id,))
+    return {
+        (row[0], row[1]): {field: float(value) for field, value in zip(ROLLUP_FIELDS, row[2:])}
+        for row in cursor.fetchall()
+    }
+
+
+def _expected_rollups(cursor, workflow_id):
+    query = """
+        SELECT workflow_id, id, grid_location,
+               task_time_size, task_time_midpoint::FLOAT, task_time_custom::FLOAT,
+               labor_rate_size, labor_rate_midpoint::FLOAT, labor_rate_custom::FLOAT,
+               volume_size, volume_midpoint::FLOAT, volume_custom::FLOAT,
+               projected_annual_savings::FLOAT, cost_to_change::FLOAT
+        FROM activities
+    """
+    if workflow_id is None:
+        cursor.execute(query)
+    else:
+        cursor.execute(query + " WHERE workflow_id = %s", (workflow_id,))
+    columns = ['workflow_id', 'id', 'grid_location',
+               'task_time_size', 'task_time_midpoint', 'task_time_custom',
+               'labor_rate_size', 'labor_rate_midpoint', 'labor_rate_custom',
+               'volume_size', 'volume_midpoint', 'volume_custom',
+               'projected_annual_savings', 'cost_to_change']
+    activities = pd.DataFrame(cursor.fetchall(), columns=columns)
+    costs = compute_costs(activities)
+    costs['workflow_id'] = activities['workflow_id']
+    costs['swimlane'] = swimlane_column(costs)
+    costs['projected_annual_savings'] = activities['projected_annual_savings'].fillna(0)
+    costs['cost_to_change'] = activities['cost_to_change'].fillna(0)
+    aggregations = {
+        'activity_count': ('id', 'size'),
+        'costed_count': ('monthly_cost', 'count'),
+        'monthly_cost': ('monthly_cost', 'sum'),
+        'annual_cost': ('annual_cost', 'sum'),
+        'projected_annual_savings': ('projected_annual_savings', 'sum'),
+        'cost_to_change': ('cost_to_change', 'sum'),
+    }
+    by_lane = costs.groupby(['workflow_id', 'swimlane'], dropna=True).agg(**aggregations)
+    by_workflow = costs.groupby('workflow_id').agg(**aggregations)
+    expected = {key: {field: float(value) for field, value in row.items()} for key, row in by_lane.iterrows()}
+    for wf_id, row in by_workflow.iterrows():
+        expected[(wf_id, WORKFLOW_TOTAL)] = {field: float(value) for field, value in row.items()}
+    return expected
+
+
+def verify_rollups(workflow_id=None):
+    """Differences between the stored rollups and a fresh compute_costs pass.
+
+    Returns a list of {'workflow_id', 'swimlane', 'field', 'stored',
+    'expected'}; empty means the rollups are correct. Workflows with no
+    activities are expected to have an all-zero total row.
+    """
+    cursor = get_read_cursor()
+    stored = _stored_rollups(cursor, workflow_id)
+    expected = _expected_rollups(cursor, workflow_id)
+    cursor.close()
+    zero = dict.fromkeys(ROLLUP_FIELDS, 0.0)
+    mismatches = []
+    for key in sorted(set(stored) | set(expected), key=lambda key: (key[0], key[1])):
+        # Empty workflows only have their zero total row; any missing row counts as zero
+        have = stored.get(key, zero)
+        want = expected.get(key, zero)
+        for field in ROLLUP_FIELDS:
+            if abs(have[field] - want[field]) > VERIFY_TOLERANCE:
+                mismatches.append({
+                    'workflow_id': key[0], 'swimlane': key[1], 'field': field,
+                    'stored': have[field] if key in stored else None, 'expected': want[field],
+                })
+    return mismatches
+
+
+def reconcile_rollups(workflow_id=None):
+    """Rebuild the rollups of the workflows whose rows no longer match their activities.
+
+    For the scheduled reconcile run, not the request path: it reads every
+    activity once. Returns {'mismatches', 'rebuilt'} (the workflow ids rebuilt).
+    """
+    mismatches = verify_rollups(workflow_id)
+    rebuilt = sorted({m['workflow_id'] for m in mismatches})
+    for wf_id in rebuilt:
+        rebuild_rollups(wf_id, verify=False)
+    return {'mismatches': mismatches, 'rebuilt': rebuilt}
+
+
+def _read_rollup(workflow_id):
+    cursor = get_read_cursor()
+    rows = _stored_rollups(cursor, workflow_id)
+    cursor.close()
+    return {lane: values for (_, lane), values in rows.items()}
+
+
+# Rollup rows of a workflow - cached per workflow version, 30 min safety TTL
+@keyed_cache(ttl=1800, max_entries=64)
+def _load_rollup(workflow_id, version):
+    rows = _read_rollup(workflow_id)
+    total = rows.pop(WORKFLOW_TOTAL, None)
+    return {'total': total, 'swimlanes': rows}
+
+
+def load_rollup(workflow_id):
+    """{'total': {field: value}, 'swimlanes': {lane: {field: value}}} for a workflow.
+
+    Counts come back as floats like the other fields. ``total`` is None if
+    the workflow's rollup has not been built yet (see rebuild_rollups).
+    """
+    return _load_rollup(workflow_id, workflow_version(workflow_id))
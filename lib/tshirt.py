@@ -0,0 +1,47 @@
+"""T-shirt size bands (task time, labor rate, volume) from ``tshirt_config``."""
+import hashlib
+import json
+
+from lib.cache import keyed_cache
+from lib.db import get_read_cursor
+
+
+# Global size bands - rarely edited and not versioned, so a 5 minute TTL
+@keyed_cache(ttl=300, max_entries=1)
+def load_tshirt_config():
+    """Category -> list of {size, label, min_value, max_value, midpoint, unit}, smallest first."""
+    cursor = get_read_cursor()
+    cursor.execute("""
+        SELECT category, size, label, min_value, max_value, midpoint, unit
+        FROM tshirt_config
+        WHERE engagement_id IS NULL
+        ORDER BY category, min_value
+    """)
+    rows = cursor.fetchall()
+    cursor.close()
+
+    config = {}
+    for row in rows:
+        config.setdefault(row[0], []).append({
+            'size': row[1],
+            'label': row[2],
+            'min_value': row[3],
+            'max_value': row[4],
+            'midpoint': row[5],
+            'unit': row[6]
+        })
+    return config
+
+
+def get_midpoint(config, category, size):
+    """Midpoint of ``size`` in ``category``, or None if it isn't configured."""
+    for item in config.get(category, []):
+        if item['size'] == size:
+            return item['midpoint']
+    return None
+
+
+def bands_hash(config):
+    """Short digest of the size bands, for cache keys of results computed from them."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
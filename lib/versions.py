@@ -0,0 +1,103 @@
+"""Per-workflow version stamps for cross-session cache coherence.
+
+Every write bumps a counter in ``workflow_versions`` inside its own
+transaction. Readers compare that cheap stamp against the version their
+cached payload was built from and only reload when it moved, so cached data
+can be kept indefinitely without serving another consultant's stale view.
+
+Row ``ALL_WORKFLOWS`` (id 0) is bumped by every write as well and versions
+the workflow list and any cross-workflow view.
+
+The map/ app writes the same tables and bumps the same stamps
+(``bumpWorkflowVersions`` in map/lib/snowflake.ts), so its edits show up
+here on the next rerun too.
+
+The table is created by map/scripts/create-cache-tables.sql (the SQLite
+backend creates it when it bootstraps), not on first use.
+"""
+import threading
+import time
+
+from lib.db import SNOWFLAKE, SQLITE, dialect, get_read_cursor
+
+ALL_WORKFLOWS = 0
+
+# A fetched stamp is trusted this long, so one rerun's reads share a single check
+VERSION_CHECK_INTERVAL = 2
+
+WORKFLOW_VERSIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS workflow_versions (
+        workflow_id NUMBER(38, 0) NOT NULL PRIMARY KEY,
+        version NUMBER(38, 0) NOT NULL,
+        modified_at TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP()
+    )
+"""
+
+# Add 1 to each listed workflow's stamp, starting new ones at 1. {values} is one (%s) per id.
+BUMP_VERSIONS = {
+    SNOWFLAKE: """
+        MERGE INTO workflow_versions t
+        USING (SELECT DISTINCT column1 AS workflow_id FROM VALUES {values}) s
+        ON t.workflow_id = s.workflow_id
+        WHEN MATCHED THEN UPDATE SET version = t.version + 1, modified_at = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN INSERT (workflow_id, version) VALUES (s.workflow_id, 1)
+    """,
+    SQLITE: """
+        INSERT INTO workflow_versions (workflow_id, version)
+        SELECT DISTINCT column1, 1 FROM (VALUES {values}) WHERE TRUE
+        ON CONFLICT (workflow_id) DO UPDATE SET version = version + 1, modified_at = CURRENT_TIMESTAMP()
+    """,
+}
+
+_known = {}  # workflow_id -> (version, fetched_at)
+_lock = threading.Lock()
+_stats = {'checks': 0, 'bumps': 0}
+
+
+def bump_version(cursor, workflow_id):
+    """Bump the workflow's stamp (and the all-workflows stamp) in the caller's transaction."""
+    bump_versions(cursor, [workflow_id])
+
+
+def bump_versions(cursor, workflow_ids):
+    """bump_version for several workflows in one statement."""
+    ids = list(dict.fromkeys(list(workflow_ids) + [ALL_WORKFLOWS]))
+    cursor.execute(BUMP_VERSIONS[dialect()].format(values=', '.join(['(%s)'] * len(ids))), ids)
+    with _lock:
+        _stats['bumps'] += 1
+
+
+def forget_version(workflow_id):
+    """Drop remembered stamps after a local write so the next read sees the new version."""
+    with _lock:
+        _known.pop(workflow_id, None)
+        _known.pop(ALL_WORKFLOWS, None)
+
+
+def workflow_version(workflow_id):
+    """Current version stamp for a workflow (0 if it has never been written)."""
+    now = time.monotonic()
+    with _lock:
+        known = _known.get(workflow_id)
+        if known and now - known[1] < VERSION_CHECK_INTERVAL:
+            return known[0]
+
+    # Fetch the workflow's stamp and the all-workflows stamp in one round trip
+    cursor = get_read_cursor()
+    cursor.execute("""
+        SELECT workflow_id, version FROM workflow_versions WHERE workflow_id IN (%s, %s)
+    """, (workflow_id, ALL_WORKFLOWS))
+    versions = dict(cursor.fetchall())
+    cursor.close()
+
+    with _lock:
+        _stats['checks'] += 1
+        for key in (workflow_id, ALL_WORKFLOWS):
+            _known[key] = (versions.get(key, 0), now)
+    return versions.get(workflow_id, 0)
+
+
+def version_stats():
+    """Stamp checks made and bumps written by this process."""
+    with _lock:
+        return dict(_stats)
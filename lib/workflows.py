@@ -0,0 +1,102 @@
+"""Workflows and their swimlane names, shared by every page.
+
+Reads are cached in the process-wide registry (lib/cache.py) and keyed on
+version stamps, so the workflow list or a workflow's swimlane names loaded
+on one page are reused by the next. Writes bump the stamp in the same
+transaction and forget the locally remembered one, so the change shows on
+the very next read.
+"""
+from lib.cache import keyed_cache
+from lib.db import get_read_cursor, write_transaction
+from lib.grid import lane_number
+from lib.ids import next_id
+from lib.rollups import start_rollup
+from lib.versions import ALL_WORKFLOWS, bump_version, forget_version, workflow_version
+
+
+# Workflow list - cached until any workflow changes, 30 min safety TTL
+@keyed_cache(ttl=1800, max_entries=4)
+def _load_workflows(version):
+    cursor = get_read_cursor()
+    cursor.execute("SELECT id, workflow_name, description FROM workflows ORDER BY workflow_name")
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def load_workflows():
+    """(id, workflow_name, description) rows, ordered by name."""
+    return _load_workflows(workflow_version(ALL_WORKFLOWS))
+
+
+def create_workflow(name, description, user):
+    """Insert a workflow and return its new id."""
+    new_id = next_id('workflows')
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO workflows (id, workflow_name, description, created_by)
+            VALUES (%s, %s, %s, %s)
+        """, (new_id, name, description, user))
+        start_rollup(cursor, new_id)
+        bump_version(cursor, new_id)
+        cursor.close()
+    # New version stamp makes the new workflow appear
+    forget_version(new_id)
+    return new_id
+
+
+# Swimlane names for a workflow - cached per workflow version, 30 min safety TTL
+@keyed_cache(ttl=1800)
+def _load_swimlane_config(workflow_id, version):
+    cursor = get_read_cursor()
+    cursor.execute("""
+        SELECT swimlane_letter, swimlane_name
+        FROM swimlane_config
+        WHERE workflow_id = %s
+        ORDER BY swimlane_letter
+    """, (workflow_id,))
+    rows = cursor.fetchall()
+    cursor.close()
+    return {row[0]: row[1] for row in rows}
+
+
+def load_swimlane_config(workflow_id):
+    """Swimlane letter -> name for one workflow (shared - don't modify)."""
+    return _load_swimlane_config(workflow_id, workflow_version(workflow_id))
+
+
+def save_swimlane_name(workflow_id, letter, name, display_order=None, overwrite=True):
+    """Name a swimlane, creating its row if needed.
+
+    With ``overwrite=False`` an existing name is left alone. Returns True if
+    anything was written.
+    """
+    if display_order is None:
+        display_order = lane_number(letter) - 1
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id FROM swimlane_config
+            WHERE workflow_id = %s AND swimlane_letter = %s
+        """, (workflow_id, letter))
+        existing = cursor.fetchone()
+        if existing and not overwrite:
+            cursor.close()
+            return False
+        if existing:
+            cursor.execute("""
+                UPDATE swimlane_config
+                SET swimlane_name = %s, modified_at = CURRENT_TIMESTAMP()
+                WHERE workflow_id = %s AND swimlane_letter = %s
+            """, (name, workflow_id, letter))
+        else:
+            cursor.execute("""
+                INSERT INTO swimlane_config (workflow_id, swimlane_letter, swimlane_name, display_order)
+                VALUES (%s, %s, %s, %s)
+            """, (workflow_id, letter, name, display_order))
+        bump_version(cursor, workflow_id)
+        cursor.close()
+    # New version stamp makes changes appear
+    forget_version(workflow_id)
+    return True
@@ -1,5 +1,5 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { executeQuery } from '@/lib/snowflake';
+import { bumpActivityWorkflowVersions, executeQuery } from '@/lib/snowflake';
 
 export async function PUT(
   request: NextRequest,
@@ -43,6 +43,8 @@ export async function PUT(
       [activityId, 'app_user', JSON.stringify({ grid_location: normalizedLocation })]
     );
 
+    await bumpActivityWorkflowVersions([activityId]);
+
     return NextResponse.json({ success: true, grid_location: normalizedLocation });
   } catch (error) {
     console.error('API error updating activity position:', error);
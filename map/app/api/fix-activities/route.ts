@@ -1,5 +1,5 @@
 import { NextResponse } from 'next/server';
-import { executeQuery } from '@/lib/snowflake';
+import { bumpActivityWorkflowVersions, executeQuery } from '@/lib/snowflake';
 
 export async function POST() {
   try {
@@ -26,6 +26,8 @@ export async function POST() {
     );
     results.push('Updated id 7 (Auto Risk Assessment): A4 -> C6');
 
+    await bumpActivityWorkflowVersions([5, 6, 7]);
+
     return NextResponse.json({ success: true, results });
   } catch (error) {
     console.error('Fix error:', error);
@@ -1,5 +1,5 @@
 import { NextResponse } from 'next/server';
-import { executeQuery, getActivities } from '@/lib/snowflake';
+import { bumpActivityWorkflowVersions, executeQuery, getActivities } from '@/lib/snowflake';
 
 // Process steps templates based on activity type and name patterns
 const processStepsTemplates: Record<string, string[]> = {
@@ -263,6 +263,8 @@ export async function POST() {
       });
     }
 
+    await bumpActivityWorkflowVersions(updates.map((update) => update.id));
+
     return NextResponse.json({
       success: true,
       message: `Updated ${updates.length} activities`,
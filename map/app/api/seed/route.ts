@@ -1,5 +1,5 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { executeQuery } from '@/lib/snowflake';
+import { bumpWorkflowVersions, executeQuery } from '@/lib/snowflake';
 
 const WORKFLOW_ID = 1;
 
@@ -81,13 +81,7 @@ export async function POST(request: NextRequest) {
       results.push(`Swimlane ${NEW_SWIMLANE.letter} already exists`);
     }
 
-    // 2. Get max activity ID
-    const maxIdResult = await executeQuery<Record<string, unknown>>(
-      'SELECT COALESCE(MAX(id), 0) as MAX_ID FROM activities'
-    );
-    let nextId = (maxIdResult[0].MAX_ID as number) + 1;
-
-    // 3. Insert activities
+    // 2. Insert activities
     let inserted = 0;
     let skipped = 0;
 
@@ -110,6 +104,12 @@ export async function POST(request: NextRequest) {
       const volumeMid = VOLUME_MIDPOINTS[volume] || null;
       const connectionsJson = connections ? JSON.stringify(connections) : null;
 
+      // Next ID from the sequence shared with the Streamlit app
+      const idResult = await executeQuery<Record<string, unknown>>(
+        'SELECT activities_id_seq.NEXTVAL as NEXT_ID'
+      );
+      const nextId = idResult[0].NEXT_ID as number;
+
       await executeQuery(
         `INSERT INTO activities (
           id, workflow_id, activity_name, activity_type, grid_location, connections,
@@ -127,12 +127,14 @@ export async function POST(request: NextRequest) {
         ]
       );
 
-      nextId++;
       inserted++;
     }
 
     results.push(`Inserted ${inserted} activities, skipped ${skipped} (already exist)`);
 
+    // 3. Tell the Streamlit app's caches the workflow changed
+    await bumpWorkflowVersions([WORKFLOW_ID]);
+
     return NextResponse.json({ success: true, results });
   } catch (error) {
     console.error('Seed error:', error);
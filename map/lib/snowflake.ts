@@ -58,6 +58,41 @@ export async function executeQuery<T>(sql: string, binds: unknown[] = []): Promi
   });
 }
 
+// Version stamps the Streamlit app's caches check before serving cached data
+// (lib/versions.py there). Every write to activities, workflows or swimlane_config
+// must bump them, or the app keeps showing the old data. The table is created by
+// scripts/create-cache-tables.sql.
+
+// Bump the given workflows' stamps and the all-workflows stamp (id 0)
+export async function bumpWorkflowVersions(workflowIds: number[]): Promise<void> {
+  const ids = Array.from(new Set([...workflowIds, 0]));
+  await executeQuery(
+    `MERGE INTO workflow_versions t
+     USING (SELECT DISTINCT column1 AS workflow_id FROM VALUES ${ids.map(() => '(?)').join(', ')}) s
+     ON t.workflow_id = s.workflow_id
+     WHEN MATCHED THEN UPDATE SET version = t.version + 1, modified_at = CURRENT_TIMESTAMP()
+     WHEN NOT MATCHED THEN INSERT (workflow_id, version) VALUES (s.workflow_id, 1)`,
+    ids
+  );
+}
+
+// Workflows owning the given activities, for bumping their stamps
+export async function getActivityWorkflowIds(activityIds: number[]): Promise<number[]> {
+  if (activityIds.length === 0) {
+    return [];
+  }
+  const rows = await executeQuery<Record<string, unknown>>(
+    `SELECT DISTINCT workflow_id FROM activities WHERE id IN (${activityIds.map(() => '?').join(', ')})`,
+    activityIds
+  );
+  return rows.map((row) => row.WORKFLOW_ID as number);
+}
+
+// Bump the stamps of the workflows owning the given activities
+export async function bumpActivityWorkflowVersions(activityIds: number[]): Promise<void> {
+  await bumpWorkflowVersions(await getActivityWorkflowIds(activityIds));
+}
+
 // Map a database row to Activity type
 function mapRowToActivity(row: Record<string, unknown>): Activity {
   return {
@@ -124,9 +159,9 @@ export async function getActivity(activityId: number): Promise<Activity | null>
 
 // Create a new activity
 export async function createActivity(workflowId: number, data: ActivityInput): Promise<number> {
-  // Get next sequential ID
+  // Next ID from the sequence shared with the Streamlit app
   const idResult = await executeQuery<Record<string, unknown>>(
-    'SELECT COALESCE(MAX(id), 0) + 1 as NEXT_ID FROM activities'
+    'SELECT activities_id_seq.NEXTVAL as NEXT_ID'
   );
   const nextId = idResult[0].NEXT_ID as number;
 
@@ -190,6 +225,8 @@ export async function createActivity(workflowId: number, data: ActivityInput): P
     [nextId, 'app_user']
   );
 
+  await bumpWorkflowVersions([workflowId]);
+
   return nextId;
 }
 
@@ -276,10 +313,15 @@ export async function updateActivity(activityId: number, data: ActivityInput): P
     `INSERT INTO activity_audit_log (activity_id, action, changed_by) VALUES (?, 'UPDATE', ?)`,
     [activityId, 'app_user']
   );
+
+  await bumpActivityWorkflowVersions([activityId]);
 }
 
 // Delete an activity
 export async function deleteActivity(activityId: number): Promise<void> {
+  // Look up the owning workflow while the row still exists
+  const workflowIds = await getActivityWorkflowIds([activityId]);
+
   // Log audit first
   await executeQuery(
     `INSERT INTO activity_audit_log (activity_id, action, changed_by) VALUES (?, 'DELETE', ?)`,
@@ -287,6 +329,8 @@ export async function deleteActivity(activityId: number): Promise<void> {
   );
 
   await executeQuery('DELETE FROM activities WHERE id = ?', [activityId]);
+
+  await bumpWorkflowVersions(workflowIds);
 }
 
 // Fetch swimlane config for a workflow
@@ -332,6 +376,8 @@ export async function saveSwimlaneConfig(
       [workflowId, letter, name, letter.charCodeAt(0) - 'A'.charCodeAt(0)]
     );
   }
+
+  await bumpWorkflowVersions([workflowId]);
 }
 
 // Fetch all workflows
@@ -354,9 +400,9 @@ export async function getWorkflows(): Promise<Workflow[]> {
 
 // Create a new workflow
 export async function createWorkflow(name: string, description?: string): Promise<number> {
-  // Get next sequential ID
+  // Next ID from the sequence shared with the Streamlit app
   const idResult = await executeQuery<Record<string, unknown>>(
-    'SELECT COALESCE(MAX(id), 0) + 1 as NEXT_ID FROM workflows'
+    'SELECT workflows_id_seq.NEXTVAL as NEXT_ID'
   );
   const nextId = idResult[0].NEXT_ID as number;
 
@@ -365,6 +411,8 @@ export async function createWorkflow(name: string, description?: string): Promis
     [nextId, name, description || null, 'app_user']
   );
 
+  await bumpWorkflowVersions([nextId]);
+
   return nextId;
 }
 
@@ -374,6 +422,8 @@ export async function updateWorkflow(workflowId: number, name: string, descripti
     `UPDATE workflows SET workflow_name = ?, description = ?, modified_at = CURRENT_TIMESTAMP() WHERE id = ?`,
     [name, description || null, workflowId]
   );
+
+  await bumpWorkflowVersions([workflowId]);
 }
 
 // Delete a workflow and all associated data
@@ -386,6 +436,8 @@ export async function deleteWorkflow(workflowId: number): Promise<void> {
 
   // Delete the workflow
   await executeQuery('DELETE FROM workflows WHERE id = ?', [workflowId]);
+
+  await bumpWorkflowVersions([workflowId]);
 }
 
 // Fetch t-shirt config
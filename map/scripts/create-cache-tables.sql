@@ -0,0 +1,27 @@
+-- Helper tables the Streamlit app reads on every request
+-- Run once before deploying; the app no longer creates them on first use.
+
+-- Per-workflow and per-swimlane totals (lib/rollups.py). After creating it, build the
+-- rows with `python scripts/rebuild_rollups.py`, and schedule
+-- `python scripts/rebuild_rollups.py --reconcile` to fold in this app's edits, which
+-- don't maintain the rollup.
+CREATE TABLE IF NOT EXISTS workflow_rollups (
+    workflow_id NUMBER(38, 0) NOT NULL,
+    swimlane VARCHAR NOT NULL,
+    activity_count NUMBER(38, 0) NOT NULL DEFAULT 0,
+    costed_count NUMBER(38, 0) NOT NULL DEFAULT 0,
+    monthly_cost FLOAT NOT NULL DEFAULT 0,
+    annual_cost FLOAT NOT NULL DEFAULT 0,
+    projected_annual_savings FLOAT NOT NULL DEFAULT 0,
+    cost_to_change FLOAT NOT NULL DEFAULT 0,
+    modified_at TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP(),
+    PRIMARY KEY (workflow_id, swimlane)
+);
+
+-- Per-workflow version stamps (lib/versions.py). Every writer of activities, workflows
+-- or swimlane_config bumps them; the Streamlit app's caches reload when they move.
+CREATE TABLE IF NOT EXISTS workflow_versions (
+    workflow_id NUMBER(38, 0) NOT NULL PRIMARY KEY,
+    version NUMBER(38, 0) NOT NULL,
+    modified_at TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP()
+);
@@ -0,0 +1,32 @@
+-- Shared id sequences for the tables written by both the map app and the Streamlit app
+-- Every writer takes ids from <table>_id_seq instead of SELECT COALESCE(MAX(id), 0) + 1,
+-- which could hand out ids the Streamlit app had already reserved (Snowflake doesn't
+-- enforce primary keys, so that produced duplicate ids).
+-- Run once before deploying the apps that use the sequences. Each sequence starts past
+-- the table's current ids and past any block the old id_allocator counter handed out.
+
+EXECUTE IMMEDIATE $$
+DECLARE
+  start_id NUMBER;
+  allocated NUMBER;
+  tables ARRAY DEFAULT ARRAY_CONSTRUCT('activities', 'workflows', 'test_input');
+BEGIN
+  FOR i IN 0 TO ARRAY_SIZE(tables) - 1 DO
+    LET tbl VARCHAR := tables[i]::VARCHAR;
+    LET max_rs RESULTSET := (EXECUTE IMMEDIATE 'SELECT COALESCE(MAX(id), 0) + 1 AS start_id FROM ' || tbl);
+    LET max_cur CURSOR FOR max_rs;
+    OPEN max_cur;
+    FETCH max_cur INTO start_id;
+    CLOSE max_cur;
+    allocated := 0;
+    BEGIN
+      SELECT COALESCE(MAX(next_id), 0) INTO :allocated FROM id_allocator WHERE table_name = :tbl;
+    EXCEPTION
+      WHEN OTHER THEN allocated := 0;  -- no id_allocator table
+    END;
+    EXECUTE IMMEDIATE 'CREATE SEQUENCE IF NOT EXISTS ' || tbl || '_id_seq START = '
+      || GREATEST(start_id, allocated) || ' INCREMENT = 1 ORDER';
+  END FOR;
+  RETURN 'ok';
+END;
+$$;
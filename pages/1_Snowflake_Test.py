@@ -1,47 +1,19 @@
 import streamlit as st
-import snowflake.connector
+
+from lib.activities import snapshot_stats
+from lib.audit import audit_stats
+from lib.bootstrap import bootstrap_stats
+from lib.cache import cache_stats
+from lib.db import get_backend, get_pool, get_read_connection, get_read_cursor, get_read_pool, write_transaction
+from lib.ids import next_id
+from lib.rollups import rebuild_rollups
+from lib.versions import version_stats
 
 st.set_page_config(page_title="Snowflake Test", page_icon="❄️")
 
 st.title("❄️ Snowflake Test")
 st.markdown("Verify database connectivity by writing and reading test records.")
-
-# Cached Snowflake connection for reads
-@st.cache_resource
-def _get_cached_connection():
-    return snowflake.connector.connect(
-        account=st.secrets["snowflake"]["account"],
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
-
-def get_read_cursor():
-    """Get a cursor from the cached connection for read operations."""
-    try:
-        conn = _get_cached_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.fetchone()
-        cursor.close()
-        return conn.cursor()
-    except Exception:
-        _get_cached_connection.clear()
-        conn = _get_cached_connection()
-        return conn.cursor()
-
-def get_write_connection():
-    """Get a fresh connection for write operations."""
-    return snowflake.connector.connect(
-        account=st.secrets["snowflake"]["account"],
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
+st.caption(f"Storage backend: {get_backend().describe()}")
 
 # Input form
 st.markdown("### Write a Record")
@@ -50,18 +22,14 @@ user_text = st.text_input("Enter some text:")
 if st.button("Submit to Snowflake"):
     if user_text.strip():
         try:
-            conn = get_write_connection()
-            cursor = conn.cursor()
-            # Get next sequential ID
-            cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM test_input")
-            next_id = cursor.fetchone()[0]
-            cursor.execute(
-                "INSERT INTO test_input (id, user_text) VALUES (%s, %s)",
-                (next_id, user_text)
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
+            new_id = next_id('test_input')
+            with write_transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO test_input (id, user_text) VALUES (%s, %s)",
+                    (new_id, user_text)
+                )
+                cursor.close()
             st.success("✅ Record saved to Snowflake!")
         except Exception as e:
             st.error(f"❌ Error: {e}")
@@ -88,3 +56,116 @@ try:
         st.info("No records yet.")
 except Exception as e:
     st.error(f"❌ Could not load records: {e}")
+
+# Connection health
+st.markdown("---")
+st.markdown("### Connection Pool")
+pool_stats = get_pool().stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("In Use", f"{pool_stats['in_use']} / {pool_stats['max_size']}")
+col2.metric("Idle", pool_stats['idle'])
+col3.metric("Created", pool_stats['created'])
+col4.metric("Evicted", pool_stats['evicted'])
+st.caption(
+    f"{pool_stats['checkouts']} checkouts · "
+    f"avg wait {pool_stats['wait_seconds_avg'] * 1000:.1f} ms · "
+    f"max wait {pool_stats['wait_seconds_max'] * 1000:.1f} ms · "
+    f"{pool_stats['discarded']} discarded · {pool_stats['timeouts']} timeouts"
+)
+
+st.markdown("### Read Connection")
+read_stats = get_read_connection().stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Queries", read_stats['queries'])
+col2.metric("Pings Avoided", read_stats['pings_avoided'])
+col3.metric("Reconnects", read_stats['reconnects'])
+col4.metric("Retries", read_stats['retries'])
+st.caption(
+    f"Connection age {read_stats['age_seconds'] / 60:.1f} min · "
+    f"last success {read_stats['idle_seconds']:.0f}s ago"
+)
+read_pool_stats = get_read_pool().stats()
+st.caption(
+    f"Loader connections: {read_pool_stats['in_use']} / {read_pool_stats['max_size']} in use · "
+    f"{read_pool_stats['idle']} idle · {read_pool_stats['checkouts']} checkouts · "
+    f"{read_pool_stats['timeouts']} fell back to the shared connection"
+)
+
+st.markdown("### Audit Log Writes")
+audit = audit_stats()
+col1, col2, col3 = st.columns(3)
+col1.metric("Rows Written", audit['rows'])
+col2.metric("Statements", audit['statements'])
+col3.metric("Statements Saved", audit['statements_saved'])
+
+st.markdown("### Caches")
+caches = cache_stats()
+if caches:
+    st.dataframe(
+        [
+            {
+                "Cache": name,
+                "Entries": f"{stats['size']} / {stats['max_entries']}",
+                "Hits": stats['hits'],
+                "Misses": stats['misses'],
+                "Hit Rate": f"{stats['hit_rate']:.0%}",
+                "Evictions": stats['evictions'],
+                "Expirations": stats['expirations'],
+                "Invalidations": stats['invalidations'],
+            }
+            for name, stats in caches.items()
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+else:
+    st.info("No caches populated yet in this server process.")
+
+refresh = snapshot_stats()
+st.caption(
+    f"Activity snapshots: {refresh['full_loads']} full loads · "
+    f"{refresh['incremental_refreshes']} incremental refreshes "
+    f"({refresh['rows_refreshed']} rows, {refresh['deletes_applied']} deletes)"
+)
+versions = version_stats()
+st.caption(f"Workflow version stamps: {versions['checks']} checks · {versions['bumps']} bumps")
+
+# Concurrent page bootstrap - wall-clock time versus the same queries one after another
+st.markdown("### Page Bootstrap")
+boot = bootstrap_stats()
+if boot['runs']:
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Runs", boot['runs'])
+    col2.metric("Avg Load", f"{boot['elapsed_seconds'] / boot['runs'] * 1000:.0f} ms")
+    col3.metric("Time Saved", f"{boot['saved_seconds']:.1f} s")
+    st.dataframe(
+        [
+            {
+                "Query": name,
+                "Runs": stats['runs'],
+                "Avg": f"{stats['avg_seconds'] * 1000:.0f} ms",
+                "Max": f"{stats['max_seconds'] * 1000:.0f} ms",
+                "Last": f"{stats['last_seconds'] * 1000:.0f} ms",
+            }
+            for name, stats in boot['loaders'].items()
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+    st.caption(f"{boot['errors']} loader errors")
+else:
+    st.info("No page has bootstrapped yet in this server process.")
+
+# Rollups are kept up to date on every write; rebuild if they were edited outside the app
+st.markdown("### Workflow Rollups")
+if st.button("Rebuild and Verify Rollups"):
+    try:
+        with st.spinner("Rebuilding rollups..."):
+            report = rebuild_rollups()
+        if report['mismatches']:
+            st.error(f"❌ Rebuilt {report['workflows']} workflows but {len(report['mismatches'])} values don't match")
+            st.dataframe(report['mismatches'], hide_index=True, use_container_width=True)
+        else:
+            st.success(f"✅ Rebuilt {report['workflows']} workflows ({report['rows']} rows) and verified")
+    except Exception as e:
+        st.error(f"❌ Error: {e}")
@@ -1,11 +1,29 @@
 import streamlit as st
-import snowflake.connector
+from streamlit.errors import StreamlitAPIException
 import json
 import os
 import uuid
-import re
 from datetime import datetime
 
+from lib.activity_list import PAGE_SIZES, load_activity_page
+from lib.activities import (
+    ActivityCardStore, ConcurrentEditError, activity_changed_at, clear_activities_cache,
+    delete_activity, load_activities_data, load_activities_with_costs, load_grid,
+    load_process_graph, save_activity, shift_activities,
+)
+from lib.bootstrap import bootstrap
+from lib.cache import keyed_cache
+from lib.costs import CONFIG
+from lib.flow import solve_flow
+from lib.graph import parse_connections
+from lib.grid import build_location, lane_sort_key, parse_location
+from lib.grid_chart import SELECTION as GRID_SELECTION, grid_chart_spec
+from lib.montecarlo import MC_DRAWS, simulate_costs
+from lib.rollups import load_rollup
+from lib.tshirt import bands_hash, get_midpoint, load_tshirt_config
+from lib.versions import workflow_version
+from lib.workflows import create_workflow, load_swimlane_config, load_workflows, save_swimlane_name
+
 st.set_page_config(page_title="Activity Cards", page_icon="📋", layout="wide")
 
 st.title("📋 Activity Cards")
@@ -18,504 +36,73 @@ CURRENT_USER = "app_user"
 UPLOADS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "user_uploads")
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
-# Swimlane letters to always show
-SWIMLANE_LETTERS = [chr(ord('A') + i) for i in range(10)]  # A through J
-
-# Config - eventually move to a settings page or database
-CONFIG = {
-    "productivity_factor": 0.85,  # Assumes 85% productive time
-    "hours_per_year": 1840,       # Total work hours per year
-    "training_hours_per_year": 40, # Hours spent on training per year
-    "work_months_per_year": 12,
+# Transformation statuses, in workflow order
+STATUS_OPTIONS = ['not_started', 'analyzing', 'in_progress', 'transformed', 'deferred']
+
+# Activity List sort choices (lib/activity_list.py SORTS keys) and their labels
+LIST_SORTS = {
+    'grid': "Grid location",
+    'name': "Name",
+    'type': "Type",
+    'status': "Status",
+    'monthly_cost': "Cost",
+    'changed_at': "Last changed",
+    'id': "ID",
 }
-# Derived: adjusted work hours per month
-CONFIG["work_hours_per_month"] = (CONFIG["hours_per_year"] - CONFIG["training_hours_per_year"]) / CONFIG["work_months_per_year"]
-
-# Cached Snowflake connection for reads
-@st.cache_resource
-def _get_cached_connection():
-    return snowflake.connector.connect(
-        account=st.secrets["snowflake"]["account"],
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
 
-def get_read_cursor():
-    """Get a cursor from the cached connection for read operations, reconnecting if needed."""
-    try:
-        conn = _get_cached_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.fetchone()
-        cursor.close()
-        return conn.cursor()
-    except Exception:
-        # Connection died, clear cache and reconnect
-        _get_cached_connection.clear()
-        conn = _get_cached_connection()
-        return conn.cursor()
-
-def get_write_connection():
-    """Get a fresh connection for write operations that need commit/rollback."""
-    return snowflake.connector.connect(
-        account=st.secrets["snowflake"]["account"],
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
-
-# Load workflows - cached for 5 minutes
-@st.cache_data(ttl=300)
-def load_workflows():
-    cursor = get_read_cursor()
-    cursor.execute("SELECT id, workflow_name, description FROM workflows ORDER BY workflow_name")
-    rows = cursor.fetchall()
-    cursor.close()
-    return rows
-
-# Create workflow
-def create_workflow(name, description):
-    conn = get_write_connection()
-    cursor = conn.cursor()
-    # Get next sequential ID
-    cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM workflows")
-    next_id = cursor.fetchone()[0]
-    cursor.execute("""
-        INSERT INTO workflows (id, workflow_name, description, created_by)
-        VALUES (%s, %s, %s, %s)
-    """, (next_id, name, description, CURRENT_USER))
-    conn.commit()
-    cursor.close()
-    conn.close()
-    # Clear workflows cache so new workflow appears
-    load_workflows.clear()
-    return next_id
-
-# Load t-shirt config from database - cached for 5 minutes
-@st.cache_data(ttl=300)
-def load_tshirt_config():
-    cursor = get_read_cursor()
-    cursor.execute("""
-        SELECT category, size, label, min_value, max_value, midpoint, unit
-        FROM tshirt_config
-        WHERE engagement_id IS NULL
-        ORDER BY category, min_value
-    """)
-    rows = cursor.fetchall()
-    cursor.close()
-
-    config = {}
-    for row in rows:
-        category = row[0]
-        if category not in config:
-            config[category] = []
-        config[category].append({
-            'size': row[1],
-            'label': row[2],
-            'min_value': row[3],
-            'max_value': row[4],
-            'midpoint': row[5],
-            'unit': row[6]
-        })
-    return config
-
-# Load swimlane config for a workflow - cached for 5 minutes
-@st.cache_data(ttl=300)
-def load_swimlane_config(workflow_id):
-    cursor = get_read_cursor()
-    cursor.execute("""
-        SELECT swimlane_letter, swimlane_name
-        FROM swimlane_config
-        WHERE workflow_id = %s
-        ORDER BY swimlane_letter
-    """, (workflow_id,))
-    rows = cursor.fetchall()
-    cursor.close()
-    return {row[0]: row[1] for row in rows}
-
-# Save swimlane name
-def save_swimlane_name(workflow_id, letter, name):
-    conn = get_write_connection()
-    cursor = conn.cursor()
-    # Check if exists
-    cursor.execute("""
-        SELECT id FROM swimlane_config
-        WHERE workflow_id = %s AND swimlane_letter = %s
-    """, (workflow_id, letter))
-    existing = cursor.fetchone()
-    if existing:
-        cursor.execute("""
-            UPDATE swimlane_config
-            SET swimlane_name = %s, modified_at = CURRENT_TIMESTAMP()
-            WHERE workflow_id = %s AND swimlane_letter = %s
-        """, (name, workflow_id, letter))
-    else:
-        cursor.execute("""
-            INSERT INTO swimlane_config (workflow_id, swimlane_letter, swimlane_name, display_order)
-            VALUES (%s, %s, %s, %s)
-        """, (workflow_id, letter, name, ord(letter) - ord('A')))
-    conn.commit()
-    cursor.close()
-    conn.close()
-    # Clear swimlane cache so changes appear
-    load_swimlane_config.clear()
-
-# Load all activities for a workflow - single query returns both list and grid formats
-@st.cache_data(ttl=60)
-def _load_activities_data(workflow_id):
-    """Internal cached function that loads activities once and returns both formats."""
-    cursor = get_read_cursor()
-    cursor.execute("""
-        SELECT id, activity_name, activity_type, grid_location, status, created_at, connections,
-               task_time_size, task_time_midpoint, task_time_custom,
-               labor_rate_size, labor_rate_midpoint, labor_rate_custom,
-               volume_size, volume_midpoint, volume_custom
-        FROM activities
-        WHERE workflow_id = %s
-        ORDER BY grid_location, activity_name
-    """, (workflow_id,))
-    rows = cursor.fetchall()
-    cursor.close()
-
-    # Build list format with cost-related fields
-    activities_list = []
-    for r in rows:
-        activities_list.append({
-            'id': r[0],
-            'name': r[1],
-            'type': r[2],
-            'grid_location': r[3],
-            'status': r[4],
-            'created_at': r[5],
-            'task_time_size': r[7],
-            'task_time_midpoint': r[8],
-            'task_time_custom': r[9],
-            'labor_rate_size': r[10],
-            'labor_rate_midpoint': r[11],
-            'labor_rate_custom': r[12],
-            'volume_size': r[13],
-            'volume_midpoint': r[14],
-            'volume_custom': r[15],
-        })
-
-    # Build grid format
-    grid = {}
-    for row in rows:
-        if row[3]:  # grid_location
-            grid[row[3].upper()] = {
-                'id': row[0],
-                'name': row[1],
-                'type': row[2],
-                'connections': row[6]
-            }
-
-    return activities_list, grid
+# Swimlanes to always offer when editing names (A through J); more appear as they are used
+MIN_SWIMLANES = 10
 
+# Load all activities for a workflow - one snapshot serves both list and grid formats,
+# refreshed incrementally from a modified_at watermark (see lib/activities.py)
 def load_activities(workflow_id):
     """Get activities as a list for the Activity List view."""
-    activities_list, _ = _load_activities_data(workflow_id)
+    activities_list, _ = load_activities_data(workflow_id)
     return activities_list
 
-def load_activities_grid(workflow_id):
-    """Get activities as a grid map for the visual grid picker."""
-    _, grid = _load_activities_data(workflow_id)
-    return grid
-
-def clear_activities_cache():
-    """Clear the activities cache after modifications."""
-    _load_activities_data.clear()
-
-def calculate_activity_costs(activity):
-    """Calculate monthly and annual costs for an activity."""
-    # Get effective values (use custom if "Other" was selected, otherwise midpoint)
-    task_time = None
-    if activity.get('task_time_size') == 'Other' and activity.get('task_time_custom'):
-        task_time = float(activity['task_time_custom'])
-    elif activity.get('task_time_midpoint'):
-        task_time = float(activity['task_time_midpoint'])
-
-    labor_rate = None
-    if activity.get('labor_rate_size') == 'Other' and activity.get('labor_rate_custom'):
-        labor_rate = float(activity['labor_rate_custom'])
-    elif activity.get('labor_rate_midpoint'):
-        labor_rate = float(activity['labor_rate_midpoint'])
-
-    volume = None
-    if activity.get('volume_size') == 'Other' and activity.get('volume_custom'):
-        volume = float(activity['volume_custom'])
-    elif activity.get('volume_midpoint'):
-        volume = float(activity['volume_midpoint'])
-
-    # Calculate costs if we have all required values
-    if task_time and labor_rate and volume and task_time > 0:
-        productivity = CONFIG["productivity_factor"]
-        effective_task_time = task_time / productivity  # minutes per task adjusted
-        tasks_per_hour = 60 / effective_task_time
-        cost_per_task = labor_rate / tasks_per_hour
-        monthly_cost = cost_per_task * volume
-        annual_cost = monthly_cost * CONFIG["work_months_per_year"]
-        return {
-            'monthly_cost': monthly_cost,
-            'annual_cost': annual_cost,
-            'cost_per_task': cost_per_task,
-            'tasks_per_hour': tasks_per_hour,
-        }
-    return None
-
-# Parse grid location into letter and number
-def parse_grid_location(loc):
-    if not loc:
-        return None, None
-    match = re.match(r'([A-Z]+)(\d+)', loc.upper())
-    if match:
-        return match.group(1), int(match.group(2))
-    return None, None
-
-# Build grid location from letter and number
-def build_grid_location(letter, number):
-    return f"{letter}{number}"
-
-# Load single activity (not cached - needs fresh data for editing)
-def load_activity(activity_id):
-    cursor = get_read_cursor()
-    cursor.execute("SELECT * FROM activities WHERE id = %s", (activity_id,))
-    columns = [desc[0] for desc in cursor.description]
-    row = cursor.fetchone()
-    cursor.close()
-    if row:
-        return dict(zip(columns, row))
-    return None
-
-# Shift activities in a swimlane
-def shift_activities(workflow_id, swimlane_letter, from_position):
-    """Shift all activities in a swimlane from position onwards by +1"""
-    conn = get_write_connection()
-    cursor = conn.cursor()
-
-    # Get all activities in this swimlane at or after the position
-    cursor.execute("""
-        SELECT id, grid_location, connections
-        FROM activities
-        WHERE workflow_id = %s AND grid_location LIKE %s
-        ORDER BY grid_location DESC
-    """, (workflow_id, f"{swimlane_letter}%"))
-
-    activities_to_shift = []
-    for row in cursor.fetchall():
-        letter, num = parse_grid_location(row[1])
-        if num and num >= from_position:
-            activities_to_shift.append({
-                'id': row[0],
-                'old_location': row[1],
-                'new_location': build_grid_location(letter, num + 1),
-                'old_num': num,
-                'new_num': num + 1
-            })
-
-    # Build mapping of old -> new locations for connection updates
-    location_map = {a['old_location']: a['new_location'] for a in activities_to_shift}
-
-    # Update grid locations (do in reverse order to avoid conflicts)
-    for activity in activities_to_shift:
-        cursor.execute("""
-            UPDATE activities
-            SET grid_location = %s, modified_at = CURRENT_TIMESTAMP(), modified_by = %s
-            WHERE id = %s
-        """, (activity['new_location'], CURRENT_USER, activity['id']))
-
-        # Log the shift
-        cursor.execute("""
-            INSERT INTO activity_audit_log (activity_id, action, field_changed, old_value, new_value, changed_by)
-            VALUES (%s, 'SHIFT', 'grid_location', %s, %s, %s)
-        """, (activity['id'], activity['old_location'], activity['new_location'], CURRENT_USER))
-
-    # Now update all connections that point to shifted locations
-    if location_map:
-        cursor.execute("""
-            SELECT id, connections FROM activities
-            WHERE workflow_id = %s AND connections IS NOT NULL
-        """, (workflow_id,))
-        for row in cursor.fetchall():
-            activity_id = row[0]
-            connections_str = row[1]
-            if connections_str:
-                try:
-                    connections = json.loads(connections_str)
-                    updated = False
-                    for conn_item in connections:
-                        if 'next' in conn_item and conn_item['next'] in location_map:
-                            conn_item['next'] = location_map[conn_item['next']]
-                            updated = True
-                    if updated:
-                        cursor.execute("""
-                            UPDATE activities
-                            SET connections = %s, modified_at = CURRENT_TIMESTAMP(), modified_by = %s
-                            WHERE id = %s
-                        """, (json.dumps(connections), CURRENT_USER, activity_id))
-                except json.JSONDecodeError:
-                    pass
-
-    conn.commit()
-    cursor.close()
-    conn.close()
-    clear_activities_cache()
-    return len(activities_to_shift)
-
-# Save activity
-def save_activity(data, workflow_id, activity_id=None):
-    conn = get_write_connection()
-    cursor = conn.cursor()
-
-    if activity_id:
-        # Update existing
-        old_data = load_activity(activity_id)
-
-        cursor.execute("""
-            UPDATE activities SET
-                activity_name = %s,
-                activity_type = %s,
-                grid_location = %s,
-                connections = %s,
-                task_time_size = %s,
-                task_time_midpoint = %s,
-                task_time_custom = %s,
-                labor_rate_size = %s,
-                labor_rate_midpoint = %s,
-                labor_rate_custom = %s,
-                volume_size = %s,
-                volume_midpoint = %s,
-                volume_custom = %s,
-                target_cycle_time_hours = %s,
-                actual_cycle_time_hours = %s,
-                disposition_complete_pct = %s,
-                disposition_forwarded_pct = %s,
-                disposition_pended_pct = %s,
-                transformation_plan = %s,
-                phase = %s,
-                status = %s,
-                cost_to_change = %s,
-                projected_annual_savings = %s,
-                process_steps = %s,
-                systems_touched = %s,
-                constraints_rules = %s,
-                opportunities = %s,
-                next_steps = %s,
-                attachments = %s,
-                comments = %s,
-                data_confidence = %s,
-                data_source = %s,
-                modified_at = CURRENT_TIMESTAMP(),
-                modified_by = %s
-            WHERE id = %s
-        """, (
-            data['activity_name'], data['activity_type'], data['grid_location'],
-            data['connections'], data['task_time_size'], data['task_time_midpoint'],
-            data['task_time_custom'], data['labor_rate_size'], data['labor_rate_midpoint'],
-            data['labor_rate_custom'], data['volume_size'], data['volume_midpoint'],
-            data['volume_custom'], data['target_cycle_time_hours'], data['actual_cycle_time_hours'],
-            data['disposition_complete_pct'], data['disposition_forwarded_pct'],
-            data['disposition_pended_pct'], data['transformation_plan'], data['phase'],
-            data['status'], data['cost_to_change'], data['projected_annual_savings'],
-            data['process_steps'], data['systems_touched'], data['constraints_rules'],
-            data['opportunities'], data['next_steps'], data['attachments'],
-            data['comments'], data['data_confidence'], data['data_source'],
-            CURRENT_USER, activity_id
-        ))
-
-        # Log changes to audit
-        log_audit(cursor, activity_id, 'UPDATE', old_data, data)
-    else:
-        # Insert new - get next sequential ID
-        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM activities")
-        next_id = cursor.fetchone()[0]
-        cursor.execute("""
-            INSERT INTO activities (
-                id, workflow_id, activity_name, activity_type, grid_location, connections,
-                task_time_size, task_time_midpoint, task_time_custom,
-                labor_rate_size, labor_rate_midpoint, labor_rate_custom,
-                volume_size, volume_midpoint, volume_custom,
-                target_cycle_time_hours, actual_cycle_time_hours,
-                disposition_complete_pct, disposition_forwarded_pct, disposition_pended_pct,
-                transformation_plan, phase, status, cost_to_change, projected_annual_savings,
-                process_steps, systems_touched, constraints_rules, opportunities, next_steps,
-                attachments, comments, data_confidence, data_source, created_by
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            )
-        """, (
-            next_id, workflow_id, data['activity_name'], data['activity_type'], data['grid_location'],
-            data['connections'], data['task_time_size'], data['task_time_midpoint'],
-            data['task_time_custom'], data['labor_rate_size'], data['labor_rate_midpoint'],
-            data['labor_rate_custom'], data['volume_size'], data['volume_midpoint'],
-            data['volume_custom'], data['target_cycle_time_hours'], data['actual_cycle_time_hours'],
-            data['disposition_complete_pct'], data['disposition_forwarded_pct'],
-            data['disposition_pended_pct'], data['transformation_plan'], data['phase'],
-            data['status'], data['cost_to_change'], data['projected_annual_savings'],
-            data['process_steps'], data['systems_touched'], data['constraints_rules'],
-            data['opportunities'], data['next_steps'], data['attachments'],
-            data['comments'], data['data_confidence'], data['data_source'], CURRENT_USER
-        ))
-
-        # Log creation with the ID we assigned
-        cursor.execute("""
-            INSERT INTO activity_audit_log (activity_id, action, changed_by)
-            VALUES (%s, 'CREATE', %s)
-        """, (next_id, CURRENT_USER))
-
-    conn.commit()
-    cursor.close()
-    conn.close()
-    clear_activities_cache()
-    return True
-
-# Log audit changes
-def log_audit(cursor, activity_id, action, old_data, new_data):
-    fields_to_track = [
-        'activity_name', 'activity_type', 'grid_location',
-        'connections', 'task_time_size', 'labor_rate_size', 'volume_size',
-        'transformation_plan', 'status', 'data_confidence'
-    ]
-
-    for field in fields_to_track:
-        old_val = str(old_data.get(field.upper(), '')) if old_data else ''
-        new_val = str(new_data.get(field, ''))
-        if old_val != new_val:
-            cursor.execute("""
-                INSERT INTO activity_audit_log (activity_id, action, field_changed, old_value, new_value, changed_by)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (activity_id, action, field, old_val, new_val, CURRENT_USER))
-
-# Delete activity
-def delete_activity(activity_id):
-    conn = get_write_connection()
-    cursor = conn.cursor()
-
-    # Log deletion
-    cursor.execute("""
-        INSERT INTO activity_audit_log (activity_id, action, changed_by)
-        VALUES (%s, 'DELETE', %s)
-    """, (activity_id, CURRENT_USER))
-
-    # Delete
-    cursor.execute("DELETE FROM activities WHERE id = %s", (activity_id,))
-    conn.commit()
-    cursor.close()
-    conn.close()
-    clear_activities_cache()
-
-# Get midpoint for t-shirt size
-def get_midpoint(config, category, size):
-    if category in config:
-        for item in config[category]:
-            if item['size'] == size:
-                return item['midpoint']
-    return None
+# Monte Carlo cost ranges - cached per workflow version and size bands, 30 min safety TTL.
+# The bands aren't versioned, so their hash is in the key: editing them re-simulates.
+@keyed_cache(ttl=1800, max_entries=32)
+def _load_cost_ranges(workflow_id, version, bands):
+    return simulate_costs(load_activities(workflow_id), load_tshirt_config())
+
+def load_cost_ranges(workflow_id):
+    return _load_cost_ranges(workflow_id, workflow_version(workflow_id), bands_hash(load_tshirt_config()))
+
+# Volume flow through the process graph - cached per workflow version, 30 min safety TTL
+@keyed_cache(ttl=1800, max_entries=32)
+def _load_volume_flow(workflow_id, version):
+    activities, costs = load_activities_with_costs(workflow_id)
+    _, graph = load_process_graph(workflow_id)
+    return solve_flow(graph, activities, costs)
+
+def load_volume_flow(workflow_id):
+    return _load_volume_flow(workflow_id, workflow_version(workflow_id))
+
+# Load single activity for editing - fetched once per session and reused
+# until the loaded snapshot shows the card changed
+def load_activity(activity_id, workflow_id=None, changed_at=None):
+    if changed_at is None and workflow_id is not None:
+        changed_at = activity_changed_at(workflow_id, activity_id)
+    return st.session_state.activity_cards.get(activity_id, changed_at)
+
+# The card being edited, as it was when the editor opened. The form's defaults
+# and the save's expected version both come from this copy, so an edit saved
+# elsewhere meanwhile neither changes the fields under the user's input nor
+# slips past the concurrent-edit check.
+def load_editing_card(workflow_id):
+    card = st.session_state.editing_card
+    if card is None or card.get('ID') != st.session_state.editing_id:
+        card = load_activity(st.session_state.editing_id, workflow_id)
+        st.session_state.editing_card = card
+    return card
+
+# Connections of a card, from the process graph when it holds this version of the card
+def card_connections(card, graph):
+    location = card.get('GRID_LOCATION')
+    if location in graph and graph.ids[graph.index[location.upper()]] == card.get('ID'):
+        return graph.connections(location)
+    return parse_connections(card.get('CONNECTIONS'))
 
 # Save uploaded file
 def save_uploaded_file(uploaded_file):
@@ -529,6 +116,8 @@ def save_uploaded_file(uploaded_file):
 # Initialize session state
 if 'editing_id' not in st.session_state:
     st.session_state.editing_id = None
+if 'editing_card' not in st.session_state:
+    st.session_state.editing_card = None
 if 'show_form' not in st.session_state:
     st.session_state.show_form = False
 if 'delete_confirm' not in st.session_state:
@@ -551,20 +140,33 @@ if 'selected_workflow_id' not in st.session_state:
     st.session_state.selected_workflow_id = None
 if 'creating_workflow' not in st.session_state:
     st.session_state.creating_workflow = False
-
-# Load t-shirt config
-try:
-    tshirt_config = load_tshirt_config()
-except Exception as e:
-    st.error(f"Failed to load t-shirt config: {e}")
-    tshirt_config = {}
+if 'activity_cards' not in st.session_state:
+    st.session_state.activity_cards = ActivityCardStore()
+if 'grid_clicks' not in st.session_state:
+    st.session_state.grid_clicks = 0
+
+# Bootstrap - the queries the first render needs don't depend on each other,
+# so they run concurrently and a cold load waits for the slowest, not the sum.
+# Later calls to the same loaders in the fragments hit the warmed caches.
+page_loaders = {
+    'tshirt_config': load_tshirt_config,
+    'workflows': load_workflows,
+}
+if st.session_state.selected_workflow_id:
+    bootstrap_workflow_id = st.session_state.selected_workflow_id
+    page_loaders.update({
+        'swimlanes': lambda: load_swimlane_config(bootstrap_workflow_id),
+        'activities': lambda: load_grid(bootstrap_workflow_id),
+        'rollup': lambda: load_rollup(bootstrap_workflow_id),
+    })
+page_context = bootstrap(page_loaders)
 
 # =====================
 # WORKFLOW SELECTOR
 # =====================
 st.markdown("### Select Workflow")
 
-workflows = load_workflows()
+workflows = page_context['workflows']
 workflow_options = {w[0]: w[1] for w in workflows}  # id -> name
 
 if st.session_state.creating_workflow:
@@ -577,7 +179,7 @@ if st.session_state.creating_workflow:
     with col1:
         if st.button("Create", type="primary"):
             if new_wf_name.strip():
-                new_id = create_workflow(new_wf_name.strip(), new_wf_desc.strip() if new_wf_desc else None)
+                new_id = create_workflow(new_wf_name.strip(), new_wf_desc.strip() if new_wf_desc else None, CURRENT_USER)
                 st.session_state.selected_workflow_id = new_id
                 st.session_state.creating_workflow = False
                 st.rerun()
@@ -634,94 +236,205 @@ if not st.session_state.selected_workflow_id:
     st.warning("Please select or create a workflow to continue.")
     st.stop()
 
-# Load data for selected workflow
-workflow_id = st.session_state.selected_workflow_id
-swimlane_names = load_swimlane_config(workflow_id)
-activities_grid = load_activities_grid(workflow_id)
-
-# Determine grid dimensions based on activities
-def get_max_col(activities_grid):
-    max_col = 1
-    for loc in activities_grid.keys():
-        letter, num = parse_grid_location(loc)
-        if num and num > max_col:
-            max_col = num
-    return max_col
-
-max_col = get_max_col(activities_grid)
-# Show exactly 1 extra unpopulated column, but minimum 4 columns for usability
-cols_to_display = list(range(1, max(max_col + 2, 5)))
-
-st.markdown("---")
-
-# =====================
-# PROCESS GRID
-# =====================
-st.markdown("### Process Grid")
-
-# Swimlane edit mode toggle
-col1, col2 = st.columns([6, 1])
-with col2:
-    if st.button("Edit Swimlanes" if not st.session_state.edit_swimlane_mode else "Done Editing"):
-        st.session_state.edit_swimlane_mode = not st.session_state.edit_swimlane_mode
+# Reruns. Each section below is a fragment: widgets inside one rerun only that
+# section. A change other sections show (saved data, the editor opened from the
+# list) invalidates them all with a full page rerun.
+def refresh_section():
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        # Only allowed during a fragment rerun; on a full run rerun the page
         st.rerun()
 
-# Swimlane naming dialog (for grid cell clicks)
-if st.session_state.naming_swimlane:
-    st.markdown(f"#### Name Swimlane {st.session_state.naming_swimlane}")
-    new_name = st.text_input("Swimlane name:", key="new_swimlane_name",
-                              placeholder="e.g., Mail Room, Claims Processing")
-    col1, col2 = st.columns([1, 4])
-    with col1:
-        if st.button("Save Name", type="primary"):
-            if new_name.strip():
-                save_swimlane_name(workflow_id, st.session_state.naming_swimlane, new_name.strip())
-                st.session_state.naming_swimlane = None
-                st.session_state.show_form = True
-                st.rerun()
-            else:
-                st.error("Please enter a name")
-    with col2:
-        if st.button("Cancel##naming"):
-            st.session_state.naming_swimlane = None
-            st.session_state.selected_grid = None
-            st.rerun()
+def refresh_page():
+    st.rerun()
+
+# Open the editor for a card picked on the grid or in the Activity List
+def open_editor(process_graph, activity_id, activity_type, grid_location, changed_at=None):
+    st.session_state.editing_id = activity_id
+    st.session_state.show_form = True
+    st.session_state.selected_grid = grid_location
+    # Set activity type from existing data
+    st.session_state.activity_type = activity_type or 'task'
+    st.session_state.activity_type_initialized = True
+    existing = load_activity(activity_id, changed_at=changed_at)
+    st.session_state.editing_card = existing
+    if existing and existing.get('ATTACHMENTS'):
+        try:
+            st.session_state.current_attachments = json.loads(existing.get('ATTACHMENTS', '[]'))
+        except:
+            st.session_state.current_attachments = []
+    else:
+        st.session_state.current_attachments = []
+    st.session_state.decision_branches = max(2, process_graph.branch_count(grid_location))
+
+# Clicking a grid cell: edit its card, or start a new card there. Only the
+# grid and editor change, so only their fragment reruns.
+def handle_grid_click(grid_loc, activities_grid, process_graph, swimlane_names):
+    cell_data = activities_grid.get(grid_loc)
+    if cell_data:
+        if st.session_state.show_form and not st.session_state.editing_id:
+            # Trying to place new activity on occupied cell
+            st.session_state.conflict_dialog = {
+                'location': grid_loc,
+                'existing_id': cell_data['id'],
+                'existing_name': cell_data['name']
+            }
+            refresh_section()
+        # Edit existing activity
+        open_editor(process_graph, cell_data['id'], cell_data['type'], grid_loc, cell_data['changed_at'])
+        refresh_section()
+
+    row_letter, _ = parse_location(grid_loc)
+    if row_letter not in swimlane_names:
+        # Prompt to name it first
+        st.session_state.naming_swimlane = row_letter
+        st.session_state.selected_grid = grid_loc
+        refresh_section()
+
+    # Named swimlane, proceed with selection
+    st.session_state.selected_grid = grid_loc
+    st.session_state.show_form = True
+    st.session_state.editing_id = None
+    st.session_state.decision_branches = 2
+    st.session_state.current_attachments = []
+    st.session_state.activity_type = 'task'
+    st.session_state.activity_type_initialized = False
+    refresh_section()
+
+# Data-grid list: one page fetched at a time, filtered and sorted in the query
+def render_activity_grid(workflow_id, grid_index, process_graph, swimlane_names):
+    cols = st.columns([1, 1, 1, 1, 0.7, 0.7])
+    type_filter = cols[0].multiselect("Type", ['task', 'decision'], key="list_filter_type")
+    status_filter = cols[1].multiselect("Status", STATUS_OPTIONS, key="list_filter_status")
+    lanes = sorted(set(grid_index.lanes()) | set(swimlane_names), key=lane_sort_key)
+    lane_filter = cols[2].multiselect(
+        "Swimlane", lanes, key="list_filter_swimlane",
+        format_func=lambda lane: f"{lane} - {swimlane_names.get(lane, 'Unnamed')}"
+    )
+    sort = cols[3].selectbox("Sort by", list(LIST_SORTS), format_func=LIST_SORTS.get, key="list_sort")
+    descending = cols[4].toggle("Descending", key="list_descending")
+    page_size = cols[5].selectbox("Per page", PAGE_SIZES, key="list_page_size")
+
+    # Back to the first page whenever the query changes
+    filters = {'type': type_filter, 'status': status_filter, 'swimlane': lane_filter}
+    query = (workflow_id, repr(filters), sort, descending, page_size)
+    if st.session_state.get('list_query') != query:
+        st.session_state.list_query = query
+        st.session_state.list_page = 0
+    page = st.session_state.list_page
+
+    page_frame, matching = load_activity_page(workflow_id, filters, sort, descending, page, page_size)
+    if page_frame.empty and page > 0:
+        st.session_state.list_page = 0
+        refresh_section()
+    if page_frame.empty:
+        st.info("No activities match these filters.")
+        return
+
+    event = st.dataframe(
+        page_frame[['id', 'grid_location', 'name', 'type', 'status', 'monthly_cost', 'annual_cost']],
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"activity_grid_{page}",
+        column_config={
+            'id': 'ID',
+            'grid_location': 'Grid',
+            'name': 'Name',
+            'type': 'Type',
+            'status': 'Status',
+            'monthly_cost': st.column_config.NumberColumn('Monthly Cost', format="$%.2f"),
+            'annual_cost': st.column_config.NumberColumn('Annual Cost', format="$%.2f"),
+        },
+    )
 
-# Conflict resolution dialog
-if st.session_state.conflict_dialog:
-    conflict = st.session_state.conflict_dialog
-    st.markdown("---")
-    st.warning(f"**{conflict['location']}** is occupied by **'{conflict['existing_name']}'**")
+    # Selecting a row opens the editor (once per selection, not on every rerun)
+    selected_rows = event.selection.rows
+    if selected_rows:
+        selected = page_frame.iloc[selected_rows[0]]
+        selected_id = int(selected['id'])
+        if st.session_state.get('list_selection') != selected_id:
+            st.session_state.list_selection = selected_id
+            # The editor lives in another fragment, so the whole page reruns
+            open_editor(process_graph, selected_id, selected['type'], selected['grid_location'], selected['changed_at'])
+            refresh_page()
+    else:
+        st.session_state.list_selection = None
+
+    pages = max(1, -(-matching // page_size))
+    cols = st.columns([1, 3, 1])
+    if cols[0].button("◀ Previous", disabled=page == 0, key="list_previous"):
+        st.session_state.list_page = page - 1
+        refresh_section()
+    first = page * page_size + 1
+    cols[1].caption(
+        f"Page {page + 1} of {pages} · activities {first:,}-{first + len(page_frame) - 1:,} "
+        f"of {matching:,} matching · select a row to edit"
+    )
+    if cols[2].button("Next ▶", disabled=page + 1 >= pages, key="list_next"):
+        st.session_state.list_page = page + 1
+        refresh_section()
+
+# Row-per-card list with an Edit button each; fine for small workflows
+def render_activity_rows(workflow_id, process_graph):
+    activities, activity_costs = load_activities_with_costs(workflow_id)
+
+    # Header row
+    cols = st.columns([0.5, 2.5, 1.5, 1, 1.5, 1.5, 0.8])
+    cols[0].markdown("**ID**")
+    cols[1].markdown("**Name**")
+    cols[2].markdown("**Type**")
+    cols[3].markdown("**Grid**")
+    cols[4].markdown("**Monthly Cost**")
+    cols[5].markdown("**Annual Cost**")
+    cols[6].markdown("**Actions**")
+
+    st.divider()
+
+    # Costs for every activity come from one vectorized pass, cached per version
+    monthly_costs = activity_costs['monthly_cost'].tolist()
+    annual_costs = activity_costs['annual_cost'].tolist()
+
+    for activity, monthly_cost, annual_cost in zip(activities, monthly_costs, annual_costs):
+        # NaN means the activity is missing a cost input
+        if monthly_cost != monthly_cost:
+            monthly_cost = annual_cost = None
 
-    col1, col2, col3, col4 = st.columns([1, 1, 1, 2])
-    with col1:
-        if st.button("Insert Here", type="primary", help="Shift existing activities to the right"):
-            letter, num = parse_grid_location(conflict['location'])
-            shifted = shift_activities(workflow_id, letter, num)
-            st.session_state.selected_grid = conflict['location']
-            st.session_state.conflict_dialog = None
-            st.session_state.show_form = True
-            st.success(f"Shifted {shifted} activities. Now placing new activity at {conflict['location']}.")
-            st.rerun()
+        cols = st.columns([0.5, 2.5, 1.5, 1, 1.5, 1.5, 0.8])
+        cols[0].write(activity['id'])
+        cols[1].write(activity['name'] or "-")
+        cols[2].write(activity['type'] or "-")
+        cols[3].write(activity['grid_location'] or "-")
+        cols[4].write(f"${monthly_cost:,.2f}" if monthly_cost else "-")
+        cols[5].write(f"${annual_cost:,.2f}" if annual_cost else "-")
+        if cols[6].button("Edit", key=f"edit_{activity['id']}"):
+            open_editor(process_graph, activity['id'], activity['type'], activity['grid_location'], activity['changed_at'])
+            refresh_page()
+    st.divider()
+
+
+# Swimlane edit mode toggle - swaps the grid fragment for the swimlane editor
+def swimlane_mode_toggle():
+    col1, col2 = st.columns([6, 1])
     with col2:
-        if st.button("Replace", type="secondary", help="Delete existing and place new"):
-            delete_activity(conflict['existing_id'])
-            st.session_state.selected_grid = conflict['location']
-            st.session_state.conflict_dialog = None
-            st.session_state.show_form = True
-            st.rerun()
-    with col3:
-        if st.button("Cancel##conflict"):
-            st.session_state.conflict_dialog = None
-            st.rerun()
-    st.markdown("---")
+        if st.button("Edit Swimlanes" if not st.session_state.edit_swimlane_mode else "Done Editing"):
+            st.session_state.edit_swimlane_mode = not st.session_state.edit_swimlane_mode
+            refresh_page()
+
+# Edit swimlanes mode - show A-J plus every used lane and one spare
+@st.fragment
+def swimlane_editor(workflow_id):
+    swimlane_names = load_swimlane_config(workflow_id)
+    _, grid_index, _ = load_grid(workflow_id)
+    st.markdown("### Process Grid")
+    swimlane_mode_toggle()
 
-# Edit swimlanes mode - show ALL letters A-J
-if st.session_state.edit_swimlane_mode:
     st.markdown("#### Edit Swimlane Names")
     st.caption("Name your swimlanes (rows). Each workflow has its own swimlane names.")
 
-    for letter in SWIMLANE_LETTERS:
+    for letter in grid_index.lanes_to_show(swimlane_names, minimum=MIN_SWIMLANES):
         current_name = swimlane_names.get(letter, '')
         col1, col2, col3 = st.columns([1, 3, 1])
         with col1:
@@ -737,605 +450,707 @@ if st.session_state.edit_swimlane_mode:
         with col3:
             if st.button("Save", key=f"save_swimlane_{letter}"):
                 save_swimlane_name(workflow_id, letter, new_name.strip() if new_name else '')
-                st.rerun()
-else:
-    # Visual Grid Picker
-    # Header row with column numbers
-    header_cols = st.columns([2] + [1] * len(cols_to_display))
-    header_cols[0].markdown("**Swimlane**")
-    for i, col_num in enumerate(cols_to_display):
-        header_cols[i + 1].markdown(f"**{col_num}**")
-
-    # Determine which rows to show (named ones + any with activities + exactly 1 unnamed extra)
-    rows_with_activities = set()
-    for loc in activities_grid.keys():
-        letter, _ = parse_grid_location(loc)
-        if letter:
-            rows_with_activities.add(letter)
-
-    rows_with_names = set(swimlane_names.keys())
-
-    # Show rows up to max used + exactly 1 extra unnamed row, minimum 3 rows for usability
-    all_used_rows = rows_with_activities | rows_with_names
-    if all_used_rows:
-        max_row_ord = max(ord(r) for r in all_used_rows)
-        last_row_to_show = chr(min(max(max_row_ord + 1, ord('C')), ord('J')))  # +1 extra, min C
-    else:
-        last_row_to_show = 'C'  # Start with rows A-C if nothing used
+                refresh_page()
 
-    rows_to_display = [chr(ord('A') + i) for i in range(ord(last_row_to_show) - ord('A') + 1)]
+# Form for add/edit
+def activity_form(workflow_id, grid_index, process_graph, tshirt_config):
+    if st.session_state.show_form and not st.session_state.naming_swimlane and not st.session_state.conflict_dialog:
+        st.markdown("---")
+
+        existing = None
+        if st.session_state.editing_id:
+            existing = load_editing_card(workflow_id)
+            st.markdown(f"### Edit Activity #{st.session_state.editing_id}")
+            # Where the card sits in the process, from the snapshot's graph
+            editing_location = existing.get('GRID_LOCATION') if existing else None
+            if editing_location in process_graph:
+                st.caption(
+                    f"{len(process_graph.upstream(editing_location))} activities upstream · "
+                    f"{len(process_graph.reachable(editing_location))} downstream"
+                )
+            # Initialize type from existing when editing
+            if 'activity_type_initialized' not in st.session_state:
+                st.session_state.activity_type = existing.get('ACTIVITY_TYPE', 'task') if existing else 'task'
+                st.session_state.activity_type_initialized = True
+        else:
+            st.markdown("### New Activity")
+            if not st.session_state.selected_grid:
+                st.warning("Please select a grid location above before filling out the form.")
 
-    # Grid rows
-    for row_letter in rows_to_display:
-        row_cols = st.columns([2] + [1] * len(cols_to_display))
+        # Type selector OUTSIDE the form so it updates dynamically
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            pass  # Name goes in form
+        with col2:
+            activity_type = st.selectbox("Type*", ['task', 'decision'],
+                index=['task', 'decision'].index(st.session_state.activity_type),
+                key="activity_type_selector")
+            if activity_type != st.session_state.activity_type:
+                st.session_state.activity_type = activity_type
+                refresh_section()
+        with col3:
+            grid_loc = st.session_state.selected_grid or (existing.get('GRID_LOCATION', '') if existing else '')
+            st.text_input("Grid Location", value=grid_loc, disabled=True, key="grid_loc_display")
 
-        # Swimlane label
-        swimlane_name = swimlane_names.get(row_letter, '')
+        # Existing connections, already parsed in the process graph
+        existing_connections = card_connections(existing, process_graph) if existing else []
 
-        if swimlane_name:
-            label = f"**{row_letter}** - {swimlane_name}"
-        else:
-            label = f"**{row_letter}** - *(unnamed)*"
-
-        row_cols[0].markdown(label)
-
-        # Grid cells
-        for i, col_num in enumerate(cols_to_display):
-            grid_loc = build_grid_location(row_letter, col_num)
-            cell_data = activities_grid.get(grid_loc)
-
-            with row_cols[i + 1]:
-                if cell_data:
-                    # Occupied cell
-                    btn_label = "🔵"
-                    help_text = f"{cell_data['name']} ({cell_data['type']})"
-                    if st.button(btn_label, key=f"grid_{grid_loc}", help=help_text, use_container_width=True):
-                        if st.session_state.show_form and not st.session_state.editing_id:
-                            # Trying to place new activity on occupied cell
-                            st.session_state.conflict_dialog = {
-                                'location': grid_loc,
-                                'existing_id': cell_data['id'],
-                                'existing_name': cell_data['name']
-                            }
-                            st.rerun()
-                        else:
-                            # Edit existing activity
-                            st.session_state.editing_id = cell_data['id']
-                            st.session_state.selected_grid = grid_loc
-                            st.session_state.show_form = True
-                            # Set activity type from cell data
-                            st.session_state.activity_type = cell_data['type'] or 'task'
-                            st.session_state.activity_type_initialized = True
-                            existing = load_activity(cell_data['id'])
-                            if existing and existing.get('ATTACHMENTS'):
-                                try:
-                                    st.session_state.current_attachments = json.loads(existing.get('ATTACHMENTS', '[]'))
-                                except:
-                                    st.session_state.current_attachments = []
-                            else:
-                                st.session_state.current_attachments = []
-                            if existing and existing.get('CONNECTIONS'):
-                                try:
-                                    conns = json.loads(existing.get('CONNECTIONS', '[]'))
-                                    st.session_state.decision_branches = max(2, len(conns))
-                                except:
-                                    st.session_state.decision_branches = 2
-                            else:
-                                st.session_state.decision_branches = 2
-                            st.rerun()
-                else:
-                    # Empty cell
-                    if st.button("⬜", key=f"grid_{grid_loc}", use_container_width=True):
-                        # Check if swimlane is named
-                        if row_letter not in swimlane_names:
-                            # Prompt to name it first
-                            st.session_state.naming_swimlane = row_letter
-                            st.session_state.selected_grid = grid_loc
-                            st.rerun()
-                        else:
-                            # Named swimlane, proceed with selection
-                            st.session_state.selected_grid = grid_loc
-                            st.session_state.show_form = True
-                            st.session_state.editing_id = None
-                            st.session_state.decision_branches = 2
-                            st.session_state.current_attachments = []
-                            st.session_state.activity_type = 'task'
-                            st.session_state.activity_type_initialized = False
-                            st.rerun()
+        # Add Branch button OUTSIDE form (so it can trigger rerun)
+        if st.session_state.activity_type == 'decision':
+            col1, col2 = st.columns([1, 5])
+            with col1:
+                if st.button("+ Add Branch"):
+                    st.session_state.decision_branches += 1
+                    refresh_section()
+            with col2:
+                if st.session_state.decision_branches > 2:
+                    if st.button("- Remove Branch"):
+                        st.session_state.decision_branches -= 1
+                        refresh_section()
+
+        with st.form("activity_form"):
+            # Basic Info Section
+            st.markdown("#### Basic Info")
+            activity_name = st.text_input("Activity Name*", value=existing.get('ACTIVITY_NAME', '') if existing else '', max_chars=100)
+
+            # Activity type (read from session state, set by selector above)
+            activity_type = st.session_state.activity_type
+
+            # Connections Section INSIDE the form
+            st.markdown("#### Connections")
+
+            if st.session_state.activity_type == 'task':
+                next_step = st.text_input("Next Activity (grid location)",
+                    value=existing_connections[0].get('next', '') if existing_connections else '',
+                    help="Enter the grid location of the next activity (e.g., A2)")
+                connections_data = [{"next": next_step}] if next_step else []
+            else:
+                st.caption("Define each branch with a label (e.g., 'Auto', 'Home') and destination grid location")
+
+                connections_data = []
+                for i in range(st.session_state.decision_branches):
+                    col1, col2, col3 = st.columns([2, 2, 1])
+                    default_conditions = ['Yes', 'No', 'Maybe', 'Escalate', 'Approve', 'Deny']
+                    with col1:
+                        default_cond = default_conditions[i] if i < len(default_conditions) else ''
+                        condition = st.text_input(
+                            f"Branch {i+1} Label",
+                            value=existing_connections[i].get('condition', default_cond) if i < len(existing_connections) else default_cond,
+                            key=f"cond_{i}",
+                            placeholder="e.g., Auto, Home, Escalate"
+                        )
+                    with col2:
+                        next_loc = st.text_input(
+                            f"Destination {i+1}",
+                            value=existing_connections[i].get('next', '') if i < len(existing_connections) else '',
+                            key=f"next_{i}",
+                            placeholder="e.g., C3, D3"
+                        )
+                    with col3:
+                        existing_share = existing_connections[i].get('probability') if i < len(existing_connections) else None
+                        try:
+                            existing_share = float(existing_share or 0)
+                        except (TypeError, ValueError):
+                            existing_share = 0.0
+                        share = st.number_input(
+                            f"Share {i+1} %", min_value=0.0, max_value=100.0,
+                            value=existing_share * 100 if existing_share <= 1 else existing_share,
+                            key=f"share_{i}",
+                            help="Share of this card's volume taking this branch. Leave at 0 to derive it from the disposition breakdown."
+                        )
+                    if condition or next_loc:
+                        branch = {"condition": condition, "next": next_loc}
+                        if share:
+                            branch["probability"] = round(share / 100, 4)
+                        connections_data.append(branch)
+
+            # Time & Cost Section
+            st.markdown("#### Time & Cost")
+
+            def build_size_options(category):
+                options = [''] + [f"{item['size']} - {item['label']}" for item in tshirt_config.get(category, [])] + ['Other']
+                return options
+
+            col1, col2, col3 = st.columns(3)
 
-# Show selected location
-if st.session_state.selected_grid and not st.session_state.naming_swimlane:
-    letter, num = parse_grid_location(st.session_state.selected_grid)
-    swimlane_name = swimlane_names.get(letter, 'Unnamed')
-    st.info(f"**Selected: {st.session_state.selected_grid}** ({swimlane_name}, Step {num})")
-
-# New Activity button
-if not st.session_state.show_form:
-    if st.button("+ New Activity", type="primary"):
-        st.session_state.show_form = True
-        st.session_state.editing_id = None
-        st.session_state.decision_branches = 2
-        st.session_state.current_attachments = []
-        st.session_state.activity_type = 'task'
-        st.session_state.activity_type_initialized = False
-        st.session_state.selected_grid = None
-        st.info("Click a cell on the grid above to select where to place the activity.")
+            with col1:
+                st.markdown("**Task Time**")
+                task_time_options = build_size_options('task_time')
+                existing_task_time = existing.get('TASK_TIME_SIZE', '') if existing else ''
+                task_time_idx = 0
+                for i, opt in enumerate(task_time_options):
+                    if opt.startswith(existing_task_time + ' ') and existing_task_time:
+                        task_time_idx = i
+                        break
+                if existing and existing.get('TASK_TIME_CUSTOM') and not existing.get('TASK_TIME_SIZE'):
+                    task_time_idx = len(task_time_options) - 1
+
+                task_time_size_full = st.selectbox("Size", task_time_options, index=task_time_idx, key="task_time_size")
+                task_time_size = task_time_size_full.split(' - ')[0] if ' - ' in task_time_size_full else task_time_size_full
+
+                task_time_custom = None
+                task_time_midpoint = None
+                if task_time_size == 'Other':
+                    task_time_custom = st.number_input("Custom value (minutes)", min_value=0.0,
+                        value=float(existing.get('TASK_TIME_CUSTOM', 0)) if existing and existing.get('TASK_TIME_CUSTOM') else 0.0,
+                        key="task_time_custom")
+                    task_time_midpoint = task_time_custom
+                elif task_time_size:
+                    task_time_midpoint = get_midpoint(tshirt_config, 'task_time', task_time_size)
+                    if task_time_midpoint:
+                        st.caption(f"Midpoint: {task_time_midpoint} min")
 
-# List view
-st.markdown("---")
-st.markdown("### Activity List")
-try:
-    activities = load_activities(workflow_id)
+            with col2:
+                st.markdown("**Labor Rate**")
+                labor_rate_options = build_size_options('labor_rate')
+                existing_labor_rate = existing.get('LABOR_RATE_SIZE', '') if existing else ''
+                labor_rate_idx = 0
+                for i, opt in enumerate(labor_rate_options):
+                    if opt.startswith(existing_labor_rate + ' ') and existing_labor_rate:
+                        labor_rate_idx = i
+                        break
+                if existing and existing.get('LABOR_RATE_CUSTOM') and not existing.get('LABOR_RATE_SIZE'):
+                    labor_rate_idx = len(labor_rate_options) - 1
+
+                labor_rate_size_full = st.selectbox("Size", labor_rate_options, index=labor_rate_idx, key="labor_rate_size")
+                labor_rate_size = labor_rate_size_full.split(' - ')[0] if ' - ' in labor_rate_size_full else labor_rate_size_full
+
+                labor_rate_custom = None
+                labor_rate_midpoint = None
+                if labor_rate_size == 'Other':
+                    labor_rate_custom = st.number_input("Custom value ($/hour)", min_value=0.0,
+                        value=float(existing.get('LABOR_RATE_CUSTOM', 0)) if existing and existing.get('LABOR_RATE_CUSTOM') else 0.0,
+                        key="labor_rate_custom")
+                    labor_rate_midpoint = labor_rate_custom
+                elif labor_rate_size:
+                    labor_rate_midpoint = get_midpoint(tshirt_config, 'labor_rate', labor_rate_size)
+                    if labor_rate_midpoint:
+                        st.caption(f"Midpoint: ${labor_rate_midpoint}/hr")
+
+            with col3:
+                st.markdown("**Volume**")
+                volume_options = build_size_options('volume')
+                existing_volume = existing.get('VOLUME_SIZE', '') if existing else ''
+                volume_idx = 0
+                for i, opt in enumerate(volume_options):
+                    if opt.startswith(existing_volume + ' ') and existing_volume:
+                        volume_idx = i
+                        break
+                if existing and existing.get('VOLUME_CUSTOM') and not existing.get('VOLUME_SIZE'):
+                    volume_idx = len(volume_options) - 1
+
+                volume_size_full = st.selectbox("Size", volume_options, index=volume_idx, key="volume_size")
+                volume_size = volume_size_full.split(' - ')[0] if ' - ' in volume_size_full else volume_size_full
+
+                volume_custom = None
+                volume_midpoint = None
+                if volume_size == 'Other':
+                    volume_custom = st.number_input("Custom value (per month)", min_value=0.0,
+                        value=float(existing.get('VOLUME_CUSTOM', 0)) if existing and existing.get('VOLUME_CUSTOM') else 0.0,
+                        key="volume_custom")
+                    volume_midpoint = volume_custom
+                elif volume_size:
+                    volume_midpoint = get_midpoint(tshirt_config, 'volume', volume_size)
+                    if volume_midpoint:
+                        st.caption(f"Midpoint: {volume_midpoint:,.0f}/mo")
+
+            # SLA Section
+            st.markdown("#### SLA / Cycle Time")
+            col1, col2 = st.columns(2)
+            with col1:
+                target_cycle_time = st.number_input("Target Cycle Time (hours)", min_value=0.0,
+                    value=float(existing.get('TARGET_CYCLE_TIME_HOURS', 0)) if existing and existing.get('TARGET_CYCLE_TIME_HOURS') else 0.0)
+            with col2:
+                actual_cycle_time = st.number_input("Actual Cycle Time (hours)", min_value=0.0,
+                    value=float(existing.get('ACTUAL_CYCLE_TIME_HOURS', 0)) if existing and existing.get('ACTUAL_CYCLE_TIME_HOURS') else 0.0)
 
-    if activities:
-        # Header row
-        cols = st.columns([0.5, 2.5, 1.5, 1, 1.5, 1.5, 0.8])
-        cols[0].markdown("**ID**")
-        cols[1].markdown("**Name**")
-        cols[2].markdown("**Type**")
-        cols[3].markdown("**Grid**")
-        cols[4].markdown("**Monthly Cost**")
-        cols[5].markdown("**Annual Cost**")
-        cols[6].markdown("**Actions**")
-
-        st.divider()
-
-        # Track totals
-        total_monthly = 0
-        total_annual = 0
-
-        for activity in activities:
-            # Calculate costs for this activity
-            costs = calculate_activity_costs(activity)
-            monthly_cost = costs['monthly_cost'] if costs else None
-            annual_cost = costs['annual_cost'] if costs else None
-
-            if monthly_cost:
-                total_monthly += monthly_cost
-            if annual_cost:
-                total_annual += annual_cost
-
-            cols = st.columns([0.5, 2.5, 1.5, 1, 1.5, 1.5, 0.8])
-            cols[0].write(activity['id'])
-            cols[1].write(activity['name'] or "-")
-            cols[2].write(activity['type'] or "-")
-            cols[3].write(activity['grid_location'] or "-")
-            cols[4].write(f"${monthly_cost:,.2f}" if monthly_cost else "-")
-            cols[5].write(f"${annual_cost:,.2f}" if annual_cost else "-")
-            if cols[6].button("Edit", key=f"edit_{activity['id']}"):
-                st.session_state.editing_id = activity['id']
-                st.session_state.show_form = True
-                st.session_state.selected_grid = activity['grid_location']
-                # Set activity type from existing data
-                st.session_state.activity_type = activity['type'] or 'task'
-                st.session_state.activity_type_initialized = True
-                existing = load_activity(activity['id'])
-                if existing and existing.get('ATTACHMENTS'):
-                    try:
-                        st.session_state.current_attachments = json.loads(existing.get('ATTACHMENTS', '[]'))
-                    except:
-                        st.session_state.current_attachments = []
-                else:
-                    st.session_state.current_attachments = []
-                if existing and existing.get('CONNECTIONS'):
-                    try:
-                        conns = json.loads(existing.get('CONNECTIONS', '[]'))
-                        st.session_state.decision_branches = max(2, len(conns))
-                    except:
-                        st.session_state.decision_branches = 2
-                else:
-                    st.session_state.decision_branches = 2
-                st.rerun()
+            # Disposition Section
+            st.markdown("#### Disposition Breakdown")
+            st.caption("Percentages should sum to 100%")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                disp_complete = st.number_input("Complete %", min_value=0.0, max_value=100.0,
+                    value=float(existing.get('DISPOSITION_COMPLETE_PCT', 0)) if existing and existing.get('DISPOSITION_COMPLETE_PCT') else 0.0)
+            with col2:
+                disp_forwarded = st.number_input("Forwarded %", min_value=0.0, max_value=100.0,
+                    value=float(existing.get('DISPOSITION_FORWARDED_PCT', 0)) if existing and existing.get('DISPOSITION_FORWARDED_PCT') else 0.0)
+            with col3:
+                disp_pended = st.number_input("Pended %", min_value=0.0, max_value=100.0,
+                    value=float(existing.get('DISPOSITION_PENDED_PCT', 0)) if existing and existing.get('DISPOSITION_PENDED_PCT') else 0.0)
+
+            disp_total = disp_complete + disp_forwarded + disp_pended
+            if disp_total > 0 and disp_total != 100:
+                st.warning(f"Disposition total: {disp_total}% (should be 100%)")
+
+            # Transformation Section
+            st.markdown("#### Transformation")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                transform_options = ['', 'eliminate', 'automate', 'optimize', 'outsource']
+                existing_transform = existing.get('TRANSFORMATION_PLAN', '') if existing else ''
+                transform_idx = transform_options.index(existing_transform) if existing_transform in transform_options else 0
+                transformation_plan = st.selectbox("Plan", transform_options, index=transform_idx)
+            with col2:
+                phase = st.number_input("Phase", min_value=0, max_value=10,
+                    value=int(existing.get('PHASE', 0)) if existing and existing.get('PHASE') else 0)
+            with col3:
+                status_options = STATUS_OPTIONS
+                existing_status = existing.get('STATUS', '') if existing else ''
+                status_idx = status_options.index(existing_status) if existing_status in status_options else 0
+                status = st.selectbox("Transformation Status", status_options, index=status_idx)
+            with col4:
+                pass
+
+            col1, col2 = st.columns(2)
+            with col1:
+                cost_to_change = st.number_input("Cost to Change ($)", min_value=0.0,
+                    value=float(existing.get('COST_TO_CHANGE', 0)) if existing and existing.get('COST_TO_CHANGE') else 0.0)
+            with col2:
+                projected_savings = st.number_input("Projected Annual Savings ($)", min_value=0.0,
+                    value=float(existing.get('PROJECTED_ANNUAL_SAVINGS', 0)) if existing and existing.get('PROJECTED_ANNUAL_SAVINGS') else 0.0)
+
+            # Detail Section
+            st.markdown("#### Detail")
+            process_steps = st.text_area("Process Steps",
+                value=existing.get('PROCESS_STEPS', '') if existing else '', height=100)
+            systems_touched = st.text_input("Systems Touched",
+                value=existing.get('SYSTEMS_TOUCHED', '') if existing else '', max_chars=500)
+            constraints_rules = st.text_area("Constraints / Rules",
+                value=existing.get('CONSTRAINTS_RULES', '') if existing else '', height=80)
+            opportunities = st.text_area("Opportunities",
+                value=existing.get('OPPORTUNITIES', '') if existing else '', height=80)
+            next_steps_text = st.text_area("Next Steps",
+                value=existing.get('NEXT_STEPS', '') if existing else '', height=80)
+
+            # Attachments Section
+            st.markdown("#### Attachments")
+
+            if st.session_state.current_attachments:
+                st.markdown("**Current Attachments:**")
+                for att in st.session_state.current_attachments:
+                    filepath = os.path.join(UPLOADS_DIR, att.get('filename', ''))
+                    if os.path.exists(filepath):
+                        st.markdown(f"- {att.get('name', 'Unknown')}")
+
+            uploaded_files = st.file_uploader(
+                "Upload new files",
+                accept_multiple_files=True,
+                key="file_uploader"
+            )
 
-        # Total row
-        st.divider()
-        cols = st.columns([0.5, 2.5, 1.5, 1, 1.5, 1.5, 0.8])
-        cols[0].write("")
-        cols[1].markdown("**TOTAL**")
-        cols[2].write("")
-        cols[3].write("")
-        cols[4].markdown(f"**${total_monthly:,.2f}**")
-        cols[5].markdown(f"**${total_annual:,.2f}**")
-        cols[6].write("")
-
-        # Productivity assumption note
-        st.caption(f"*Assumes {CONFIG['productivity_factor']*100:.0f}% productivity factor, {CONFIG['hours_per_year']:,} hrs/year - {CONFIG['training_hours_per_year']} training = {CONFIG['work_hours_per_month']:.0f} hrs/month capacity*")
-    else:
-        st.info("No activities in this workflow yet. Click a cell on the grid to create one.")
-except Exception as e:
-    st.error(f"Failed to load activities: {e}")
+            # Notes Section
+            st.markdown("#### Notes")
+            comments = st.text_area("Comments",
+                value=existing.get('COMMENTS', '') if existing else '', height=100)
 
-# Form for add/edit
-if st.session_state.show_form and not st.session_state.naming_swimlane and not st.session_state.conflict_dialog:
-    st.markdown("---")
-
-    existing = None
-    if st.session_state.editing_id:
-        existing = load_activity(st.session_state.editing_id)
-        st.markdown(f"### Edit Activity #{st.session_state.editing_id}")
-        # Initialize type from existing when editing
-        if 'activity_type_initialized' not in st.session_state:
-            st.session_state.activity_type = existing.get('ACTIVITY_TYPE', 'task') if existing else 'task'
-            st.session_state.activity_type_initialized = True
-    else:
-        st.markdown("### New Activity")
-        if not st.session_state.selected_grid:
-            st.warning("Please select a grid location above before filling out the form.")
+            # Data Quality Section
+            st.markdown("#### Data Quality")
+            col1, col2 = st.columns(2)
+            with col1:
+                confidence_options = ['', 'estimate', 'partial', 'confirmed']
+                existing_confidence = existing.get('DATA_CONFIDENCE', '') if existing else ''
+                confidence_idx = confidence_options.index(existing_confidence) if existing_confidence in confidence_options else 0
+                data_confidence = st.selectbox("Confidence", confidence_options, index=confidence_idx)
+            with col2:
+                data_source = st.text_input("Data Source",
+                    value=existing.get('DATA_SOURCE', '') if existing else '', max_chars=200)
 
-    # Type selector OUTSIDE the form so it updates dynamically
-    col1, col2, col3 = st.columns([2, 1, 1])
-    with col1:
-        pass  # Name goes in form
-    with col2:
-        activity_type = st.selectbox("Type*", ['task', 'decision'],
-            index=['task', 'decision'].index(st.session_state.activity_type),
-            key="activity_type_selector")
-        if activity_type != st.session_state.activity_type:
-            st.session_state.activity_type = activity_type
-            st.rerun()
-    with col3:
-        grid_loc = st.session_state.selected_grid or (existing.get('GRID_LOCATION', '') if existing else '')
-        st.text_input("Grid Location", value=grid_loc, disabled=True, key="grid_loc_display")
+            # Form buttons
+            col1, col2, col3 = st.columns([1, 1, 4])
+            with col1:
+                submitted = st.form_submit_button("Save", type="primary")
+            with col2:
+                cancelled = st.form_submit_button("Cancel")
 
-    # Parse existing connections
-    existing_connections = []
-    if existing and existing.get('CONNECTIONS'):
-        try:
-            existing_connections = json.loads(existing.get('CONNECTIONS', '[]'))
-        except:
-            existing_connections = []
+            if submitted:
+                grid_location = st.session_state.selected_grid or (existing.get('GRID_LOCATION', '') if existing else '')
 
-    # Add Branch button OUTSIDE form (so it can trigger rerun)
-    if st.session_state.activity_type == 'decision':
-        col1, col2 = st.columns([1, 5])
-        with col1:
-            if st.button("+ Add Branch"):
-                st.session_state.decision_branches += 1
-                st.rerun()
-        with col2:
-            if st.session_state.decision_branches > 2:
-                if st.button("- Remove Branch"):
-                    st.session_state.decision_branches -= 1
-                    st.rerun()
-
-    with st.form("activity_form"):
-        # Basic Info Section
-        st.markdown("#### Basic Info")
-        activity_name = st.text_input("Activity Name*", value=existing.get('ACTIVITY_NAME', '') if existing else '', max_chars=100)
-
-        # Activity type (read from session state, set by selector above)
-        activity_type = st.session_state.activity_type
-
-        # Connections Section INSIDE the form
-        st.markdown("#### Connections")
-
-        if st.session_state.activity_type == 'task':
-            next_step = st.text_input("Next Activity (grid location)",
-                value=existing_connections[0].get('next', '') if existing_connections else '',
-                help="Enter the grid location of the next activity (e.g., A2)")
-            connections_data = [{"next": next_step}] if next_step else []
-        else:
-            st.caption("Define each branch with a label (e.g., 'Auto', 'Home') and destination grid location")
+                if not activity_name:
+                    st.error("Activity Name is required.")
+                elif not grid_location:
+                    st.error("Please select a grid location from the grid above.")
+                else:
+                    attachments_list = list(st.session_state.current_attachments)
+                    if uploaded_files:
+                        for uploaded_file in uploaded_files:
+                            file_info = save_uploaded_file(uploaded_file)
+                            attachments_list.append(file_info)
+
+                    data = {
+                        'activity_name': activity_name,
+                        'activity_type': activity_type,
+                        'grid_location': grid_location.upper(),
+                        'connections': json.dumps(connections_data) if connections_data else None,
+                        'task_time_size': task_time_size if task_time_size and task_time_size != 'Other' else None,
+                        'task_time_midpoint': task_time_midpoint,
+                        'task_time_custom': task_time_custom,
+                        'labor_rate_size': labor_rate_size if labor_rate_size and labor_rate_size != 'Other' else None,
+                        'labor_rate_midpoint': labor_rate_midpoint,
+                        'labor_rate_custom': labor_rate_custom,
+                        'volume_size': volume_size if volume_size and volume_size != 'Other' else None,
+                        'volume_midpoint': volume_midpoint,
+                        'volume_custom': volume_custom,
+                        'target_cycle_time_hours': target_cycle_time or None,
+                        'actual_cycle_time_hours': actual_cycle_time or None,
+                        'disposition_complete_pct': disp_complete or None,
+                        'disposition_forwarded_pct': disp_forwarded or None,
+                        'disposition_pended_pct': disp_pended or None,
+                        'transformation_plan': transformation_plan or None,
+                        'phase': phase or None,
+                        'status': status or None,
+                        'cost_to_change': cost_to_change or None,
+                        'projected_annual_savings': projected_savings or None,
+                        'process_steps': process_steps or None,
+                        'systems_touched': systems_touched or None,
+                        'constraints_rules': constraints_rules or None,
+                        'opportunities': opportunities or None,
+                        'next_steps': next_steps_text or None,
+                        'attachments': json.dumps(attachments_list) if attachments_list else None,
+                        'comments': comments or None,
+                        'data_confidence': data_confidence or None,
+                        'data_source': data_source or None,
+                    }
 
-            connections_data = []
-            for i in range(st.session_state.decision_branches):
-                col1, col2 = st.columns(2)
-                default_conditions = ['Yes', 'No', 'Maybe', 'Escalate', 'Approve', 'Deny']
+                    try:
+                        save_activity(data, workflow_id, CURRENT_USER, st.session_state.editing_id, old_data=existing,
+                                      cards=st.session_state.activity_cards)
+                        st.success("Activity saved successfully!")
+                        st.session_state.show_form = False
+                        st.session_state.editing_id = None
+                        st.session_state.current_attachments = []
+                        st.session_state.selected_grid = None
+                        st.session_state.activity_type = 'task'
+                        st.session_state.activity_type_initialized = False
+                        refresh_page()
+                    except ConcurrentEditError as e:
+                        # Drop our copy so the form reloads with the other edit
+                        st.session_state.activity_cards.forget(st.session_state.editing_id)
+                        st.session_state.editing_card = None
+                        clear_activities_cache(workflow_id)
+                        st.warning(f"{e}. Reload the card to see the latest version, then reapply your changes.")
+                    except Exception as e:
+                        st.error(f"Failed to save: {e}")
+
+            if cancelled:
+                st.session_state.show_form = False
+                st.session_state.editing_id = None
+                st.session_state.current_attachments = []
+                st.session_state.selected_grid = None
+                st.session_state.activity_type = 'task'
+                st.session_state.activity_type_initialized = False
+                refresh_section()
+
+        # Delete button (outside form)
+        if st.session_state.editing_id:
+            st.divider()
+            st.markdown("#### Danger Zone")
+
+            if st.session_state.delete_confirm == st.session_state.editing_id:
+                st.warning("Are you sure you want to delete this activity?")
+                gap_lane, gap_col = parse_location(existing.get('GRID_LOCATION') if existing else None)
+                later = grid_index.count_from(gap_lane, gap_col + 1) if gap_lane else 0
+                gap_location = existing.get('GRID_LOCATION') if existing else None
+                feeding = process_graph.predecessors(gap_location) if gap_location in process_graph else []
+                if feeding:
+                    st.caption(f"Connections from {', '.join(feeding)} will point at an empty cell.")
+                close_gap = later > 0 and st.checkbox(
+                    f"Shift the {later} later activities in this swimlane left to close the gap"
+                )
+                col1, col2, col3 = st.columns([1, 1, 4])
                 with col1:
-                    default_cond = default_conditions[i] if i < len(default_conditions) else ''
-                    condition = st.text_input(
-                        f"Branch {i+1} Label",
-                        value=existing_connections[i].get('condition', default_cond) if i < len(existing_connections) else default_cond,
-                        key=f"cond_{i}",
-                        placeholder="e.g., Auto, Home, Escalate"
-                    )
+                    if st.button("Yes, Delete", type="primary"):
+                        try:
+                            delete_activity(
+                                st.session_state.editing_id, workflow_id, CURRENT_USER,
+                                close_gap_at=gap_location if close_gap else None,
+                                cards=st.session_state.activity_cards,
+                            )
+                            st.success("Activity deleted.")
+                            st.session_state.show_form = False
+                            st.session_state.editing_id = None
+                            st.session_state.delete_confirm = None
+                            st.session_state.current_attachments = []
+                            st.session_state.activity_type = 'task'
+                            st.session_state.activity_type_initialized = False
+                            st.session_state.selected_grid = None
+                            refresh_page()
+                        except Exception as e:
+                            st.error(f"Failed to delete: {e}")
                 with col2:
-                    next_loc = st.text_input(
-                        f"Destination {i+1}",
-                        value=existing_connections[i].get('next', '') if i < len(existing_connections) else '',
-                        key=f"next_{i}",
-                        placeholder="e.g., C3, D3"
-                    )
-                if condition or next_loc:
-                    connections_data.append({"condition": condition, "next": next_loc})
-
-        # Time & Cost Section
-        st.markdown("#### Time & Cost")
-
-        def build_size_options(category):
-            options = [''] + [f"{item['size']} - {item['label']}" for item in tshirt_config.get(category, [])] + ['Other']
-            return options
-
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            st.markdown("**Task Time**")
-            task_time_options = build_size_options('task_time')
-            existing_task_time = existing.get('TASK_TIME_SIZE', '') if existing else ''
-            task_time_idx = 0
-            for i, opt in enumerate(task_time_options):
-                if opt.startswith(existing_task_time + ' ') and existing_task_time:
-                    task_time_idx = i
-                    break
-            if existing and existing.get('TASK_TIME_CUSTOM') and not existing.get('TASK_TIME_SIZE'):
-                task_time_idx = len(task_time_options) - 1
-
-            task_time_size_full = st.selectbox("Size", task_time_options, index=task_time_idx, key="task_time_size")
-            task_time_size = task_time_size_full.split(' - ')[0] if ' - ' in task_time_size_full else task_time_size_full
-
-            task_time_custom = None
-            task_time_midpoint = None
-            if task_time_size == 'Other':
-                task_time_custom = st.number_input("Custom value (minutes)", min_value=0.0,
-                    value=float(existing.get('TASK_TIME_CUSTOM', 0)) if existing and existing.get('TASK_TIME_CUSTOM') else 0.0,
-                    key="task_time_custom")
-                task_time_midpoint = task_time_custom
-            elif task_time_size:
-                task_time_midpoint = get_midpoint(tshirt_config, 'task_time', task_time_size)
-                if task_time_midpoint:
-                    st.caption(f"Midpoint: {task_time_midpoint} min")
-
-        with col2:
-            st.markdown("**Labor Rate**")
-            labor_rate_options = build_size_options('labor_rate')
-            existing_labor_rate = existing.get('LABOR_RATE_SIZE', '') if existing else ''
-            labor_rate_idx = 0
-            for i, opt in enumerate(labor_rate_options):
-                if opt.startswith(existing_labor_rate + ' ') and existing_labor_rate:
-                    labor_rate_idx = i
-                    break
-            if existing and existing.get('LABOR_RATE_CUSTOM') and not existing.get('LABOR_RATE_SIZE'):
-                labor_rate_idx = len(labor_rate_options) - 1
-
-            labor_rate_size_full = st.selectbox("Size", labor_rate_options, index=labor_rate_idx, key="labor_rate_size")
-            labor_rate_size = labor_rate_size_full.split(' - ')[0] if ' - ' in labor_rate_size_full else labor_rate_size_full
-
-            labor_rate_custom = None
-            labor_rate_midpoint = None
-            if labor_rate_size == 'Other':
-                labor_rate_custom = st.number_input("Custom value ($/hour)", min_value=0.0,
-                    value=float(existing.get('LABOR_RATE_CUSTOM', 0)) if existing and existing.get('LABOR_RATE_CUSTOM') else 0.0,
-                    key="labor_rate_custom")
-                labor_rate_midpoint = labor_rate_custom
-            elif labor_rate_size:
-                labor_rate_midpoint = get_midpoint(tshirt_config, 'labor_rate', labor_rate_size)
-                if labor_rate_midpoint:
-                    st.caption(f"Midpoint: ${labor_rate_midpoint}/hr")
-
-        with col3:
-            st.markdown("**Volume**")
-            volume_options = build_size_options('volume')
-            existing_volume = existing.get('VOLUME_SIZE', '') if existing else ''
-            volume_idx = 0
-            for i, opt in enumerate(volume_options):
-                if opt.startswith(existing_volume + ' ') and existing_volume:
-                    volume_idx = i
-                    break
-            if existing and existing.get('VOLUME_CUSTOM') and not existing.get('VOLUME_SIZE'):
-                volume_idx = len(volume_options) - 1
-
-            volume_size_full = st.selectbox("Size", volume_options, index=volume_idx, key="volume_size")
-            volume_size = volume_size_full.split(' - ')[0] if ' - ' in volume_size_full else volume_size_full
-
-            volume_custom = None
-            volume_midpoint = None
-            if volume_size == 'Other':
-                volume_custom = st.number_input("Custom value (per month)", min_value=0.0,
-                    value=float(existing.get('VOLUME_CUSTOM', 0)) if existing and existing.get('VOLUME_CUSTOM') else 0.0,
-                    key="volume_custom")
-                volume_midpoint = volume_custom
-            elif volume_size:
-                volume_midpoint = get_midpoint(tshirt_config, 'volume', volume_size)
-                if volume_midpoint:
-                    st.caption(f"Midpoint: {volume_midpoint:,.0f}/mo")
-
-        # SLA Section
-        st.markdown("#### SLA / Cycle Time")
-        col1, col2 = st.columns(2)
-        with col1:
-            target_cycle_time = st.number_input("Target Cycle Time (hours)", min_value=0.0,
-                value=float(existing.get('TARGET_CYCLE_TIME_HOURS', 0)) if existing and existing.get('TARGET_CYCLE_TIME_HOURS') else 0.0)
-        with col2:
-            actual_cycle_time = st.number_input("Actual Cycle Time (hours)", min_value=0.0,
-                value=float(existing.get('ACTUAL_CYCLE_TIME_HOURS', 0)) if existing and existing.get('ACTUAL_CYCLE_TIME_HOURS') else 0.0)
-
-        # Disposition Section
-        st.markdown("#### Disposition Breakdown")
-        st.caption("Percentages should sum to 100%")
-        col1, col2, col3 = st.columns(3)
+                    if st.button("No, Cancel##delete"):
+                        st.session_state.delete_confirm = None
+                        refresh_section()
+            else:
+                if st.button("Delete Activity", type="secondary"):
+                    st.session_state.delete_confirm = st.session_state.editing_id
+                    refresh_section()
+
+# Grid and editor share a fragment: clicking a cell, switching the activity
+# type or adding a branch reruns only this section, not the list below
+@st.fragment
+def activity_workspace(workflow_id):
+    swimlane_names = load_swimlane_config(workflow_id)
+    activities_grid, grid_index, process_graph = load_grid(workflow_id)
+    # From the cached loader rather than the full run's copy, so a rerun of only
+    # this fragment still sees the current size bands
+    try:
+        tshirt_config = load_tshirt_config()
+    except Exception as e:
+        st.error(f"Failed to load t-shirt config: {e}")
+        tshirt_config = {}
+
+    # Columns: exactly 1 extra unpopulated column, but minimum 4 columns for usability
+    cols_to_display = grid_index.columns_to_show(minimum=4)
+
+    st.markdown("### Process Grid")
+    swimlane_mode_toggle()
+
+    # Swimlane naming dialog (for grid cell clicks)
+    if st.session_state.naming_swimlane:
+        st.markdown(f"#### Name Swimlane {st.session_state.naming_swimlane}")
+        new_name = st.text_input("Swimlane name:", key="new_swimlane_name",
+                                  placeholder="e.g., Mail Room, Claims Processing")
+        col1, col2 = st.columns([1, 4])
         with col1:
-            disp_complete = st.number_input("Complete %", min_value=0.0, max_value=100.0,
-                value=float(existing.get('DISPOSITION_COMPLETE_PCT', 0)) if existing and existing.get('DISPOSITION_COMPLETE_PCT') else 0.0)
+            if st.button("Save Name", type="primary"):
+                if new_name.strip():
+                    save_swimlane_name(workflow_id, st.session_state.naming_swimlane, new_name.strip())
+                    st.session_state.naming_swimlane = None
+                    st.session_state.show_form = True
+                    refresh_page()
+                else:
+                    st.error("Please enter a name")
         with col2:
-            disp_forwarded = st.number_input("Forwarded %", min_value=0.0, max_value=100.0,
-                value=float(existing.get('DISPOSITION_FORWARDED_PCT', 0)) if existing and existing.get('DISPOSITION_FORWARDED_PCT') else 0.0)
-        with col3:
-            disp_pended = st.number_input("Pended %", min_value=0.0, max_value=100.0,
-                value=float(existing.get('DISPOSITION_PENDED_PCT', 0)) if existing and existing.get('DISPOSITION_PENDED_PCT') else 0.0)
+            if st.button("Cancel##naming"):
+                st.session_state.naming_swimlane = None
+                st.session_state.selected_grid = None
+                refresh_section()
 
-        disp_total = disp_complete + disp_forwarded + disp_pended
-        if disp_total > 0 and disp_total != 100:
-            st.warning(f"Disposition total: {disp_total}% (should be 100%)")
+    # Conflict resolution dialog
+    if st.session_state.conflict_dialog:
+        conflict = st.session_state.conflict_dialog
+        st.markdown("---")
+        st.warning(f"**{conflict['location']}** is occupied by **'{conflict['existing_name']}'**")
 
-        # Transformation Section
-        st.markdown("#### Transformation")
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4 = st.columns([1, 1, 1, 2])
         with col1:
-            transform_options = ['', 'eliminate', 'automate', 'optimize', 'outsource']
-            existing_transform = existing.get('TRANSFORMATION_PLAN', '') if existing else ''
-            transform_idx = transform_options.index(existing_transform) if existing_transform in transform_options else 0
-            transformation_plan = st.selectbox("Plan", transform_options, index=transform_idx)
+            # Only the run of cards up to the lane's first empty cell has to move
+            conflict_lane, conflict_col = parse_location(conflict['location'])
+            gap_col = grid_index.first_gap(conflict_lane, conflict_col)
+            plan = grid_index.shift_plan(conflict_lane, conflict_col, 1, end=gap_col)
+            moves = ', '.join(f"{old} → {new}" for old, new in plan)
+            if st.button("Insert Here", type="primary", help=f"Shift {len(plan)} activities to the right: {moves}"):
+                shifted = shift_activities(workflow_id, conflict_lane, conflict_col, CURRENT_USER,
+                                           to_position=gap_col)
+                st.session_state.selected_grid = conflict['location']
+                st.session_state.conflict_dialog = None
+                st.session_state.show_form = True
+                st.success(f"Shifted {shifted} activities. Now placing new activity at {conflict['location']}.")
+                refresh_page()
         with col2:
-            phase = st.number_input("Phase", min_value=0, max_value=10,
-                value=int(existing.get('PHASE', 0)) if existing and existing.get('PHASE') else 0)
+            if st.button("Replace", type="secondary", help="Delete existing and place new"):
+                delete_activity(conflict['existing_id'], workflow_id, CURRENT_USER,
+                                cards=st.session_state.activity_cards)
+                st.session_state.selected_grid = conflict['location']
+                st.session_state.conflict_dialog = None
+                st.session_state.show_form = True
+                refresh_page()
         with col3:
-            status_options = ['not_started', 'analyzing', 'in_progress', 'transformed', 'deferred']
-            existing_status = existing.get('STATUS', '') if existing else ''
-            status_idx = status_options.index(existing_status) if existing_status in status_options else 0
-            status = st.selectbox("Transformation Status", status_options, index=status_idx)
-        with col4:
-            pass
-
-        col1, col2 = st.columns(2)
-        with col1:
-            cost_to_change = st.number_input("Cost to Change ($)", min_value=0.0,
-                value=float(existing.get('COST_TO_CHANGE', 0)) if existing and existing.get('COST_TO_CHANGE') else 0.0)
-        with col2:
-            projected_savings = st.number_input("Projected Annual Savings ($)", min_value=0.0,
-                value=float(existing.get('PROJECTED_ANNUAL_SAVINGS', 0)) if existing and existing.get('PROJECTED_ANNUAL_SAVINGS') else 0.0)
-
-        # Detail Section
-        st.markdown("#### Detail")
-        process_steps = st.text_area("Process Steps",
-            value=existing.get('PROCESS_STEPS', '') if existing else '', height=100)
-        systems_touched = st.text_input("Systems Touched",
-            value=existing.get('SYSTEMS_TOUCHED', '') if existing else '', max_chars=500)
-        constraints_rules = st.text_area("Constraints / Rules",
-            value=existing.get('CONSTRAINTS_RULES', '') if existing else '', height=80)
-        opportunities = st.text_area("Opportunities",
-            value=existing.get('OPPORTUNITIES', '') if existing else '', height=80)
-        next_steps_text = st.text_area("Next Steps",
-            value=existing.get('NEXT_STEPS', '') if existing else '', height=80)
-
-        # Attachments Section
-        st.markdown("#### Attachments")
-
-        if st.session_state.current_attachments:
-            st.markdown("**Current Attachments:**")
-            for att in st.session_state.current_attachments:
-                filepath = os.path.join(UPLOADS_DIR, att.get('filename', ''))
-                if os.path.exists(filepath):
-                    st.markdown(f"- {att.get('name', 'Unknown')}")
-
-        uploaded_files = st.file_uploader(
-            "Upload new files",
-            accept_multiple_files=True,
-            key="file_uploader"
-        )
-
-        # Notes Section
-        st.markdown("#### Notes")
-        comments = st.text_area("Comments",
-            value=existing.get('COMMENTS', '') if existing else '', height=100)
-
-        # Data Quality Section
-        st.markdown("#### Data Quality")
-        col1, col2 = st.columns(2)
-        with col1:
-            confidence_options = ['', 'estimate', 'partial', 'confirmed']
-            existing_confidence = existing.get('DATA_CONFIDENCE', '') if existing else ''
-            confidence_idx = confidence_options.index(existing_confidence) if existing_confidence in confidence_options else 0
-            data_confidence = st.selectbox("Confidence", confidence_options, index=confidence_idx)
-        with col2:
-            data_source = st.text_input("Data Source",
-                value=existing.get('DATA_SOURCE', '') if existing else '', max_chars=200)
-
-        # Form buttons
-        col1, col2, col3 = st.columns([1, 1, 4])
-        with col1:
-            submitted = st.form_submit_button("Save", type="primary")
-        with col2:
-            cancelled = st.form_submit_button("Cancel")
-
-        if submitted:
-            grid_location = st.session_state.selected_grid or (existing.get('GRID_LOCATION', '') if existing else '')
-
-            if not activity_name:
-                st.error("Activity Name is required.")
-            elif not grid_location:
-                st.error("Please select a grid location from the grid above.")
-            else:
-                attachments_list = list(st.session_state.current_attachments)
-                if uploaded_files:
-                    for uploaded_file in uploaded_files:
-                        file_info = save_uploaded_file(uploaded_file)
-                        attachments_list.append(file_info)
-
-                data = {
-                    'activity_name': activity_name,
-                    'activity_type': activity_type,
-                    'grid_location': grid_location.upper(),
-                    'connections': json.dumps(connections_data) if connections_data else None,
-                    'task_time_size': task_time_size if task_time_size and task_time_size != 'Other' else None,
-                    'task_time_midpoint': task_time_midpoint,
-                    'task_time_custom': task_time_custom,
-                    'labor_rate_size': labor_rate_size if labor_rate_size and labor_rate_size != 'Other' else None,
-                    'labor_rate_midpoint': labor_rate_midpoint,
-                    'labor_rate_custom': labor_rate_custom,
-                    'volume_size': volume_size if volume_size and volume_size != 'Other' else None,
-                    'volume_midpoint': volume_midpoint,
-                    'volume_custom': volume_custom,
-                    'target_cycle_time_hours': target_cycle_time or None,
-                    'actual_cycle_time_hours': actual_cycle_time or None,
-                    'disposition_complete_pct': disp_complete or None,
-                    'disposition_forwarded_pct': disp_forwarded or None,
-                    'disposition_pended_pct': disp_pended or None,
-                    'transformation_plan': transformation_plan or None,
-                    'phase': phase or None,
-                    'status': status or None,
-                    'cost_to_change': cost_to_change or None,
-                    'projected_annual_savings': projected_savings or None,
-                    'process_steps': process_steps or None,
-                    'systems_touched': systems_touched or None,
-                    'constraints_rules': constraints_rules or None,
-                    'opportunities': opportunities or None,
-                    'next_steps': next_steps_text or None,
-                    'attachments': json.dumps(attachments_list) if attachments_list else None,
-                    'comments': comments or None,
-                    'data_confidence': data_confidence or None,
-                    'data_source': data_source or None,
-                }
-
-                try:
-                    save_activity(data, workflow_id, st.session_state.editing_id)
-                    st.success("Activity saved successfully!")
-                    st.session_state.show_form = False
-                    st.session_state.editing_id = None
-                    st.session_state.current_attachments = []
-                    st.session_state.selected_grid = None
-                    st.session_state.activity_type = 'task'
-                    st.session_state.activity_type_initialized = False
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Failed to save: {e}")
-
-        if cancelled:
-            st.session_state.show_form = False
+            if st.button("Cancel##conflict"):
+                st.session_state.conflict_dialog = None
+                refresh_section()
+        st.markdown("---")
+
+    # Visual Grid Picker - one chart for every cell, icons and connection arrows
+    # Show rows up to the last named or used one + exactly 1 extra unnamed row, minimum 3 rows for usability
+    rows_to_display = grid_index.lanes_to_show(swimlane_names, minimum=3)
+    spec = grid_chart_spec(activities_grid, process_graph, rows_to_display, cols_to_display,
+                           swimlane_names, selected=st.session_state.selected_grid)
+    event = st.vega_lite_chart(spec, on_select="rerun", selection_mode=GRID_SELECTION,
+                               key=f"process_grid_{st.session_state.grid_clicks}")
+    clicked = event.selection.get(GRID_SELECTION) or []
+    if clicked and clicked[0].get('location'):
+        # A fresh chart key clears the selection, so the same cell can be clicked again
+        st.session_state.grid_clicks += 1
+        handle_grid_click(clicked[0]['location'], activities_grid, process_graph, swimlane_names)
+    st.caption("🔵 task · 🔶 decision · click a cell to add or edit an activity")
+
+    # Show selected location
+    if st.session_state.selected_grid and not st.session_state.naming_swimlane:
+        letter, num = parse_location(st.session_state.selected_grid)
+        swimlane_name = swimlane_names.get(letter, 'Unnamed')
+        # Neighbouring cards in the lane, from the grid index
+        neighbours = [
+            f"{label} {build_location(letter, column)}"
+            for label, column in (('after', grid_index.previous_occupied(letter, num)),
+                                  ('before', grid_index.next_occupied(letter, num)))
+            if column is not None
+        ] if letter and num else []
+        neighbour_text = f" · {' and '.join(neighbours)}" if neighbours else ''
+        st.info(f"**Selected: {st.session_state.selected_grid}** ({swimlane_name}, Step {num}){neighbour_text}")
+
+    # New Activity button
+    if not st.session_state.show_form:
+        if st.button("+ New Activity", type="primary"):
+            st.session_state.show_form = True
             st.session_state.editing_id = None
+            st.session_state.decision_branches = 2
             st.session_state.current_attachments = []
-            st.session_state.selected_grid = None
             st.session_state.activity_type = 'task'
             st.session_state.activity_type_initialized = False
-            st.rerun()
+            st.session_state.selected_grid = None
+            st.info("Click a cell on the grid above to select where to place the activity.")
 
-    # Delete button (outside form)
-    if st.session_state.editing_id:
-        st.divider()
-        st.markdown("#### Danger Zone")
+    activity_form(workflow_id, grid_index, process_graph, tshirt_config)
 
-        if st.session_state.delete_confirm == st.session_state.editing_id:
-            st.warning("Are you sure you want to delete this activity?")
-            col1, col2, col3 = st.columns([1, 1, 4])
-            with col1:
-                if st.button("Yes, Delete", type="primary"):
-                    try:
-                        delete_activity(st.session_state.editing_id)
-                        st.success("Activity deleted.")
-                        st.session_state.show_form = False
-                        st.session_state.editing_id = None
-                        st.session_state.delete_confirm = None
-                        st.session_state.current_attachments = []
-                        st.session_state.activity_type = 'task'
-                        st.session_state.activity_type_initialized = False
-                        st.session_state.selected_grid = None
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"Failed to delete: {e}")
-            with col2:
-                if st.button("No, Cancel##delete"):
-                    st.session_state.delete_confirm = None
-                    st.rerun()
+# List view - paging, filters and sorting rerun only this fragment
+@st.fragment
+def activity_list(workflow_id):
+    swimlane_names = load_swimlane_config(workflow_id)
+    _, grid_index, process_graph = load_grid(workflow_id)
+
+    st.markdown("### Activity List")
+    try:
+        activities_list, _ = load_activities_data(workflow_id)
+        # Totals come from the maintained rollup rather than summing every card
+        rollup = load_rollup(workflow_id)
+        totals = rollup['total']
+
+        if len(activities_list):
+            list_view = st.radio("List view", ["Data grid", "Rows"], horizontal=True,
+                                 key="activity_list_view", label_visibility="collapsed")
+            if list_view == "Data grid":
+                render_activity_grid(workflow_id, grid_index, process_graph, swimlane_names)
+            else:
+                render_activity_rows(workflow_id, process_graph)
+
+            # Total row
+            if totals is None:
+                st.info("Totals for this workflow haven't been built yet. Run scripts/rebuild_rollups.py "
+                        "or Rebuild and Verify Rollups on the Snowflake Test page.")
+            else:
+                cols = st.columns([0.5, 2.5, 1.5, 1, 1.5, 1.5, 0.8])
+                cols[0].write("")
+                cols[1].markdown("**TOTAL**")
+                cols[2].write("")
+                cols[3].write("")
+                cols[4].markdown(f"**${totals['monthly_cost']:,.2f}**")
+                cols[5].markdown(f"**${totals['annual_cost']:,.2f}**")
+                cols[6].write("")
+                st.caption(
+                    f"{totals['costed_count']:,.0f} of {totals['activity_count']:,.0f} activities costed · "
+                    f"projected savings ${totals['projected_annual_savings']:,.2f}/yr · "
+                    f"cost to change ${totals['cost_to_change']:,.2f}"
+                )
+
+            # Productivity assumption note
+            st.caption(f"*Assumes {CONFIG['productivity_factor']*100:.0f}% productivity factor, {CONFIG['hours_per_year']:,} hrs/year - {CONFIG['training_hours_per_year']} training = {CONFIG['work_hours_per_month']:.0f} hrs/month capacity*")
+
+            # Cost by swimlane, straight from the rollup's lane rows
+            with st.expander("Cost by swimlane"):
+                lanes = sorted(rollup['swimlanes'], key=lane_sort_key)
+                st.dataframe(
+                    [
+                        {
+                            'swimlane': lane,
+                            'swimlane_name': swimlane_names.get(lane, 'Unnamed'),
+                            'activities': int(rollup['swimlanes'][lane]['activity_count']),
+                            'costed': int(rollup['swimlanes'][lane]['costed_count']),
+                            'monthly_cost': rollup['swimlanes'][lane]['monthly_cost'],
+                            'annual_cost': rollup['swimlanes'][lane]['annual_cost'],
+                        }
+                        for lane in lanes
+                    ],
+                    hide_index=True,
+                    column_config={
+                        'swimlane': 'Swimlane',
+                        'swimlane_name': 'Name',
+                        'activities': 'Activities',
+                        'costed': 'With Costs',
+                        'monthly_cost': st.column_config.NumberColumn('Monthly Cost', format="$%.2f"),
+                        'annual_cost': st.column_config.NumberColumn('Annual Cost', format="$%.2f"),
+                    },
+                )
+
+            # Volume implied by entry points and branch splits
+            with st.expander("Volume flow"):
+                st.caption(
+                    "Propagates volume from entry points (cards nothing flows into) through the connections, "
+                    "using branch shares where entered, otherwise the disposition breakdown "
+                    "(pended = rework, complete = leaves, forwarded = next steps), otherwise an even split."
+                )
+                if st.checkbox("Solve volume flow", key="show_volume_flow"):
+                    flow = load_volume_flow(workflow_id)
+                    flow_cards = flow['cards']
+                    cols = st.columns(2)
+                    cols[0].metric("Entered Monthly Cost", f"${flow_cards['entered_monthly_cost'].sum():,.2f}")
+                    cols[1].metric("Flow-Implied Monthly Cost", f"${flow_cards['implied_monthly_cost'].sum():,.2f}")
+                    if flow['trapped']:
+                        st.warning(f"Work can never leave the loop through: {', '.join(flow['trapped'])}")
+                    if flow['dangling']:
+                        st.caption("Connections to empty cells (treated as leaving the process): " + ", ".join(
+                            f"{source} → {target}" for source, target in flow['dangling']
+                        ))
+                    st.dataframe(
+                        flow_cards.sort_values('volume_gap', key=lambda gap: gap.abs(), ascending=False, na_position='last'),
+                        hide_index=True,
+                        column_config={
+                            'grid_location': 'Grid', 'id': 'ID', 'name': 'Name',
+                            'arrivals': st.column_config.NumberColumn('Arrivals', format="%.0f"),
+                            'entered_volume': st.column_config.NumberColumn('Entered Volume', format="%.0f"),
+                            'implied_volume': st.column_config.NumberColumn('Implied Volume', format="%.0f"),
+                            'volume_gap': st.column_config.NumberColumn('Gap', format="%.0f"),
+                            'cost_per_task': st.column_config.NumberColumn('Cost / Task', format="$%.2f"),
+                            'entered_monthly_cost': st.column_config.NumberColumn('Entered Monthly', format="$%.2f"),
+                            'implied_monthly_cost': st.column_config.NumberColumn('Implied Monthly', format="$%.2f"),
+                        },
+                    )
+
+            # Cost ranges from the t-shirt size bands
+            with st.expander("Cost ranges (Monte Carlo)"):
+                st.caption(
+                    f"Samples task time, labor rate and volume within each size's min/max band "
+                    f"(custom values within a band set by Data Confidence) over {MC_DRAWS:,} draws."
+                )
+                if st.checkbox("Simulate cost ranges", key="show_cost_ranges"):
+                    ranges = load_cost_ranges(workflow_id)
+                    workflow_range = ranges['workflow']
+                    cols = st.columns(3)
+                    for col, p in zip(cols, (10, 50, 90)):
+                        col.metric(
+                            f"P{p} Annual Cost", f"${workflow_range[f'annual_p{p}']:,.0f}",
+                            help=f"Monthly: ${workflow_range[f'monthly_p{p}']:,.0f}"
+                        )
+                    money = lambda label: st.column_config.NumberColumn(label, format="$%.0f")
+                    range_columns = {
+                        'monthly_p10': money('Monthly P10'), 'monthly_p50': money('Monthly P50'),
+                        'monthly_p90': money('Monthly P90'), 'annual_p10': money('Annual P10'),
+                        'annual_p50': money('Annual P50'), 'annual_p90': money('Annual P90'),
+                    }
+                    st.markdown("**By swimlane**")
+                    st.dataframe(ranges['swimlanes'], hide_index=True,
+                                 column_config={'swimlane': 'Swimlane', 'activities': 'Activities', **range_columns})
+                    st.markdown("**By activity**")
+                    st.dataframe(ranges['activities'].drop(columns=['swimlane']), hide_index=True,
+                                 column_config={'id': 'ID', 'grid_location': 'Grid', **range_columns})
         else:
-            if st.button("Delete Activity", type="secondary"):
-                st.session_state.delete_confirm = st.session_state.editing_id
-                st.rerun()
+            st.info("No activities in this workflow yet. Click a cell on the grid to create one.")
+    except Exception as e:
+        st.error(f"Failed to load activities: {e}")
+
+# =====================
+# PROCESS GRID, EDITOR AND LIST
+# =====================
+workflow_id = st.session_state.selected_workflow_id
+
+st.markdown("---")
+if st.session_state.edit_swimlane_mode:
+    swimlane_editor(workflow_id)
+else:
+    activity_workspace(workflow_id)
+
+st.markdown("---")
+activity_list(workflow_id)
+
+# Where the page's first-render time went (fragment reruns don't repeat the bootstrap)
+st.caption(f"⏱ {page_context.summary()}")
@@ -1,23 +1,19 @@
 import streamlit as st
-import snowflake.connector
 import json
 
+from lib.activities import clear_activities_cache, grid_locations, load_activities_data, load_process_graph
+from lib.db import merge_missing_rows, write_transaction
+from lib.graph import ProcessGraph
+from lib.ids import reserve_ids
+from lib.rollups import apply_activity_rollup
+from lib.versions import bump_version
+from lib.workflows import load_swimlane_config, save_swimlane_name
+
 st.set_page_config(page_title="Seed Activities", page_icon="🌱")
 
 st.title("🌱 Seed Activities Data")
 st.markdown("Insert swimlane G and sample activities for the insurance workflow.")
 
-def get_write_connection():
-    """Get a fresh connection for write operations."""
-    return snowflake.connector.connect(
-        account=st.secrets["snowflake"]["account"],
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
-
 # Define the data to insert
 WORKFLOW_ID = 1  # Assuming workflow ID 1
 
@@ -79,6 +75,76 @@ VOLUME_MIDPOINTS = {
     "XS": 25, "S": 75, "M": 300, "L": 750, "XL": 2000, "XXL": 7500
 }
 
+# Columns written by the bulk loader, in row order
+SEED_COLUMNS = (
+    'id', 'workflow_id', 'activity_name', 'activity_type', 'grid_location', 'connections',
+    'task_time_size', 'task_time_midpoint',
+    'labor_rate_size', 'labor_rate_midpoint',
+    'volume_size', 'volume_midpoint',
+    'status', 'created_by',
+)
+
+def plan_seed(activities, existing_locations):
+    """Diff the dataset against the workflow: returns (to_insert, to_skip).
+
+    to_skip holds (activity, reason) pairs for locations that already exist
+    or repeat earlier in the dataset.
+    """
+    to_insert = []
+    to_skip = []
+    seen = set(existing_locations)
+    for act in activities:
+        grid_loc = act[0].upper()
+        if grid_loc in existing_locations:
+            to_skip.append((act, "already exists"))
+        elif grid_loc in seen:
+            to_skip.append((act, "duplicate in dataset"))
+        else:
+            seen.add(grid_loc)
+            to_insert.append(act)
+    return to_insert, to_skip
+
+def bulk_insert_activities(workflow_id, activities, batch_size):
+    """Insert activities with one MERGE per batch; returns rows actually inserted.
+
+    The MERGE only inserts locations that are still free, so a concurrent
+    seed or a re-run can't create duplicates.
+    """
+    if not activities:
+        return 0
+    new_ids = reserve_ids('activities', len(activities))
+    rows = []
+    for new_id, act in zip(new_ids, activities):
+        grid_loc, name, act_type, task_time, labor_rate, volume, connections = act
+        rows.append((
+            new_id, workflow_id, name, act_type, grid_loc.upper(),
+            json.dumps(connections) if connections else None,
+            task_time, TASK_TIME_MIDPOINTS.get(task_time),
+            labor_rate, LABOR_RATE_MIDPOINTS.get(labor_rate),
+            volume, VOLUME_MIDPOINTS.get(volume),
+            "not_started", "seed_script"
+        ))
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        inserted = merge_missing_rows(
+            cursor, 'activities', SEED_COLUMNS, rows,
+            key_columns=('workflow_id', 'grid_location'), batch_size=batch_size
+        )
+        if inserted:
+            # Ids of skipped rows match nothing, so only inserted cards are added
+            apply_activity_rollup(cursor, workflow_id, new_ids, 1)
+            bump_version(cursor, workflow_id)
+        cursor.close()
+    clear_activities_cache(workflow_id)
+    return inserted
+
+def seeded_graph(workflow_id, to_insert):
+    """Process graph of the workflow as it would look after the seed."""
+    grid, graph = load_process_graph(workflow_id)
+    nodes = [(location, entry['id'], graph.connections(location)) for location, entry in grid.items()]
+    nodes += [(act[0], None, act[6]) for act in to_insert]
+    return ProcessGraph(nodes)
+
 st.markdown("### Data Preview")
 
 st.markdown("**New Swimlane:**")
@@ -90,97 +156,62 @@ for act in ACTIVITIES:
 
 st.markdown("---")
 
+st.markdown("### Load Options")
+col1, col2 = st.columns(2)
+with col1:
+    batch_size = st.number_input("Batch size (rows per statement)", min_value=1, max_value=5000, value=500, step=100)
+with col2:
+    dry_run = st.checkbox("Dry run (preview changes only)", value=True)
+
 col1, col2 = st.columns(2)
 
 with col1:
     if st.button("🏊 Insert Swimlane G", type="primary"):
         try:
-            conn = get_write_connection()
-            cursor = conn.cursor()
-
-            # Check if swimlane G already exists
-            cursor.execute(
-                "SELECT id FROM swimlane_config WHERE workflow_id = %s AND swimlane_letter = %s",
-                (WORKFLOW_ID, NEW_SWIMLANE["letter"])
+            # Only adds the swimlane if it doesn't exist yet
+            inserted = save_swimlane_name(
+                WORKFLOW_ID, NEW_SWIMLANE["letter"], NEW_SWIMLANE["name"],
+                display_order=NEW_SWIMLANE["display_order"], overwrite=False,
             )
-            existing = cursor.fetchone()
 
-            if existing:
+            if not inserted:
                 st.warning(f"Swimlane {NEW_SWIMLANE['letter']} already exists for workflow {WORKFLOW_ID}")
             else:
-                cursor.execute(
-                    """INSERT INTO swimlane_config (workflow_id, swimlane_letter, swimlane_name, display_order)
-                       VALUES (%s, %s, %s, %s)""",
-                    (WORKFLOW_ID, NEW_SWIMLANE["letter"], NEW_SWIMLANE["name"], NEW_SWIMLANE["display_order"])
-                )
-                conn.commit()
                 st.success(f"✅ Inserted swimlane {NEW_SWIMLANE['letter']}: {NEW_SWIMLANE['name']}")
-
-            cursor.close()
-            conn.close()
         except Exception as e:
             st.error(f"❌ Error: {e}")
 
 with col2:
     if st.button("📋 Insert All Activities", type="primary"):
         try:
-            conn = get_write_connection()
-            cursor = conn.cursor()
-
-            # Get next ID
-            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM activities")
-            max_id = cursor.fetchone()[0]
-            next_id = max_id + 1
-
-            inserted = 0
-            skipped = 0
-
-            for act in ACTIVITIES:
-                grid_loc, name, act_type, task_time, labor_rate, volume, connections = act
-
-                # Check if activity already exists at this grid location
-                cursor.execute(
-                    "SELECT id FROM activities WHERE workflow_id = %s AND grid_location = %s",
-                    (WORKFLOW_ID, grid_loc)
-                )
-                existing = cursor.fetchone()
-
-                if existing:
-                    skipped += 1
-                    continue
-
-                # Get midpoints
-                task_time_mid = TASK_TIME_MIDPOINTS.get(task_time)
-                labor_rate_mid = LABOR_RATE_MIDPOINTS.get(labor_rate)
-                volume_mid = VOLUME_MIDPOINTS.get(volume)
-
-                # Format connections as JSON
-                connections_json = json.dumps(connections) if connections else None
-
-                cursor.execute(
-                    """INSERT INTO activities (
-                        id, workflow_id, activity_name, activity_type, grid_location, connections,
-                        task_time_size, task_time_midpoint,
-                        labor_rate_size, labor_rate_midpoint,
-                        volume_size, volume_midpoint,
-                        status, created_by
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                    (
-                        next_id, WORKFLOW_ID, name, act_type, grid_loc, connections_json,
-                        task_time, task_time_mid,
-                        labor_rate, labor_rate_mid,
-                        volume, volume_mid,
-                        "not_started", "seed_script"
-                    )
+            to_insert, to_skip = plan_seed(ACTIVITIES, grid_locations(WORKFLOW_ID))
+
+            if dry_run:
+                st.info(f"Dry run: would insert {len(to_insert)} activities, skip {len(to_skip)}")
+                preview = [
+                    {"Grid": act[0], "Name": act[1], "Type": act[2], "Action": "insert"}
+                    for act in to_insert
+                ] + [
+                    {"Grid": act[0], "Name": act[1], "Type": act[2], "Action": f"skip ({reason})"}
+                    for act, reason in to_skip
+                ]
+                st.dataframe(preview, hide_index=True, use_container_width=True)
+
+                # Check the connections against the workflow as it would be after the seed
+                graph = seeded_graph(WORKFLOW_ID, to_insert)
+                if graph.dangling:
+                    st.warning("Connections to empty cells: " + ", ".join(
+                        f"{source} → {target}" for source, target in graph.dangling
+                    ))
+                st.caption(
+                    f"After seeding: {len(graph)} activities, {graph.edge_count} connections · "
+                    f"entry points {', '.join(graph.sources()) or '-'} · "
+                    f"end points {', '.join(graph.sinks()) or '-'}"
                 )
-                next_id += 1
-                inserted += 1
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            st.success(f"✅ Inserted {inserted} activities, skipped {skipped} (already exist)")
+            else:
+                inserted = bulk_insert_activities(WORKFLOW_ID, to_insert, batch_size)
+                skipped = len(ACTIVITIES) - inserted
+                st.success(f"✅ Inserted {inserted} activities, skipped {skipped} (already exist)")
 
         except Exception as e:
             st.error(f"❌ Error: {e}")
@@ -190,19 +221,11 @@ st.markdown("---")
 # Show current data
 st.markdown("### Current Swimlanes")
 try:
-    conn = get_write_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT swimlane_letter, swimlane_name FROM swimlane_config WHERE workflow_id = %s ORDER BY swimlane_letter",
-        (WORKFLOW_ID,)
-    )
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    if rows:
-        for row in rows:
-            st.write(f"- **{row[0]}**: {row[1]}")
+    swimlanes = load_swimlane_config(WORKFLOW_ID)
+
+    if swimlanes:
+        for letter, name in swimlanes.items():
+            st.write(f"- **{letter}**: {name}")
     else:
         st.info("No swimlanes configured yet.")
 except Exception as e:
@@ -210,22 +233,12 @@ except Exception as e:
 
 st.markdown("### Current Activities")
 try:
-    conn = get_write_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """SELECT grid_location, activity_name, activity_type
-           FROM activities
-           WHERE workflow_id = %s
-           ORDER BY grid_location""",
-        (WORKFLOW_ID,)
-    )
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    if rows:
-        for row in rows:
-            st.write(f"- **{row[0]}**: {row[1]} ({row[2]})")
+    # Same snapshot the Activity Cards page reads, refreshed after a seed
+    activities, _ = load_activities_data(WORKFLOW_ID)
+
+    if activities:
+        for activity in activities:
+            st.write(f"- **{activity['grid_location']}**: {activity['name']} ({activity['type']})")
     else:
         st.info("No activities yet.")
 except Exception as e:
@@ -0,0 +1,109 @@
+import streamlit as st
+
+from lib.portfolio import (
+    CONFIDENCES, STATUSES, UNSET, by_phase, by_workflow, load_portfolio, portfolio_totals, status_mix,
+)
+
+st.set_page_config(page_title="Portfolio", page_icon="📊", layout="wide")
+
+st.title("📊 Portfolio")
+st.markdown("Cost, savings and transformation progress across every workflow.")
+
+try:
+    facts = load_portfolio()
+except Exception as e:
+    st.error(f"❌ Could not load the portfolio: {e}")
+    st.stop()
+
+if facts.empty:
+    st.info("No workflows yet. Create one on the Activity Cards page.")
+    st.stop()
+
+# Narrow to some workflows; every view below is a pivot of the same cached facts
+workflow_names = sorted(facts['workflow_name'].dropna().unique())
+selected = st.multiselect("Workflows", workflow_names, placeholder="All workflows")
+if selected:
+    facts = facts[facts['workflow_name'].isin(selected)]
+
+totals = portfolio_totals(facts)
+col1, col2, col3, col4, col5 = st.columns(5)
+col1.metric("Workflows", f"{totals['workflows']:,}")
+col2.metric("Activities", f"{totals['activities']:,.0f}", f"{totals['costed']:,.0f} costed", delta_color="off")
+col3.metric("Annual Cost", f"${totals['annual_cost']:,.0f}")
+col4.metric("Projected Savings", f"${totals['projected_annual_savings']:,.0f}")
+col5.metric("Cost to Change", f"${totals['cost_to_change']:,.0f}")
+
+# By workflow
+st.markdown("### By Workflow")
+workflows = by_workflow(facts)
+workflows['costed_pct'] *= 100
+status_columns = [f'status_{status}' for status in STATUSES] + [f'status_{UNSET}']
+confidence_columns = [f'confidence_{confidence}' for confidence in CONFIDENCES] + [f'confidence_{UNSET}']
+st.dataframe(
+    workflows[
+        ['workflow_name', 'activities', 'costed_pct', 'monthly_cost', 'annual_cost',
+         'projected_annual_savings', 'cost_to_change', 'net_first_year']
+        + [c for c in status_columns + confidence_columns if c in workflows.columns]
+    ],
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        'workflow_name': 'Workflow',
+        'activities': st.column_config.NumberColumn('Activities', format="%d"),
+        'costed_pct': st.column_config.ProgressColumn('Costed', format="%.0f%%", min_value=0, max_value=100),
+        'monthly_cost': st.column_config.NumberColumn('Monthly Cost', format="$%.0f"),
+        'annual_cost': st.column_config.NumberColumn('Annual Cost', format="$%.0f"),
+        'projected_annual_savings': st.column_config.NumberColumn('Projected Savings', format="$%.0f"),
+        'cost_to_change': st.column_config.NumberColumn('Cost to Change', format="$%.0f"),
+        'net_first_year': st.column_config.NumberColumn('Net (Year 1)', format="$%.0f"),
+        **{c: c.split('_', 1)[1].replace('_', ' ').title() for c in status_columns + confidence_columns},
+    },
+)
+
+col1, col2 = st.columns(2)
+
+# Status mix per workflow, as shares so small and large workflows compare
+with col1:
+    st.markdown("### Status Mix")
+    mix = workflows.set_index('workflow_name')[[c for c in status_columns if c in workflows.columns]]
+    mix = mix[mix.sum(axis=1) > 0]
+    if mix.empty:
+        st.info("No activities yet.")
+    else:
+        mix.columns = [c.split('_', 1)[1] for c in mix.columns]
+        st.bar_chart(mix.div(mix.sum(axis=1), axis=0))
+        overall = status_mix(facts)
+        st.caption(" · ".join(f"{status}: {count:,}" for status, count in overall.items()))
+
+# Confidence mix per workflow
+with col2:
+    st.markdown("### Confidence Mix")
+    mix = workflows.set_index('workflow_name')[[c for c in confidence_columns if c in workflows.columns]]
+    mix = mix[mix.sum(axis=1) > 0]
+    if mix.empty:
+        st.info("No activities yet.")
+    else:
+        mix.columns = [c.split('_', 1)[1] for c in mix.columns]
+        st.bar_chart(mix.div(mix.sum(axis=1), axis=0))
+
+# By phase
+st.markdown("### By Phase")
+phases = by_phase(facts)
+if phases.empty:
+    st.info("No activities yet.")
+else:
+    st.dataframe(
+        phases[['phase', 'workflows', 'activities', 'annual_cost', 'projected_annual_savings', 'cost_to_change']],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'phase': 'Phase',
+            'workflows': 'Workflows',
+            'activities': st.column_config.NumberColumn('Activities', format="%d"),
+            'annual_cost': st.column_config.NumberColumn('Annual Cost', format="$%.0f"),
+            'projected_annual_savings': st.column_config.NumberColumn('Projected Savings', format="$%.0f"),
+            'cost_to_change': st.column_config.NumberColumn('Cost to Change', format="$%.0f"),
+        },
+    )
+
+st.caption("Aggregated in Snowflake in one query and cached until any workflow changes.")
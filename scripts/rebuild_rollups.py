@@ -0,0 +1,55 @@
+"""Rebuild the workflow rollups from the activities table and verify them.
+
+Usage: python scripts/rebuild_rollups.py [workflow_id] [--verify-only] [--no-verify] [--reconcile]
+
+Recomputes every workflow's per-swimlane and total rows (or one workflow's)
+in a single transaction, then compares them with the Python cost engine and
+prints any mismatch. Exits non-zero if the rollups don't match.
+
+With --reconcile only the workflows whose rows no longer match are rebuilt.
+The map/ app doesn't maintain the rollups, so run that on a schedule (cron,
+every few minutes) to keep the Activity List totals in step with its edits. Uses the
+same Snowflake credentials as the app (.streamlit/secrets.toml), so run it
+from the repository root.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.rollups import rebuild_rollups, reconcile_rollups, verify_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('workflow_id', nargs='?', type=int, help="only this workflow (default: all)")
+    parser.add_argument('--verify-only', action='store_true', help="check the stored rollups without rebuilding")
+    parser.add_argument('--no-verify', action='store_true', help="skip the check after rebuilding")
+    parser.add_argument('--reconcile', action='store_true', help="rebuild only the workflows that don't match")
+    args = parser.parse_args()
+
+    if args.reconcile:
+        report = reconcile_rollups(args.workflow_id)
+        print(f"Rebuilt {len(report['rebuilt'])} drifted workflows: "
+              f"{', '.join(str(wf_id) for wf_id in report['rebuilt']) or '-'}")
+        return 0
+
+    if args.verify_only:
+        mismatches = verify_rollups(args.workflow_id)
+    else:
+        report = rebuild_rollups(args.workflow_id, verify=not args.no_verify)
+        print(f"Rebuilt {report['workflows']} workflows ({report['rows']} rollup rows)")
+        mismatches = report['mismatches']
+
+    for m in mismatches:
+        print(f"  workflow {m['workflow_id']} lane {m['swimlane']} {m['field']}: "
+              f"stored {m['stored']} expected {m['expected']}")
+    if args.no_verify and not args.verify_only:
+        return 0
+    print("Rollups match" if not mismatches else f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())